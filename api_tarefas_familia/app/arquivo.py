@@ -0,0 +1,54 @@
+"""
+Retencao de tarefa_conclusao_diaria: conclusoes mais antigas que o horizonte
+(ARQUIVO_DIAS) vao para tarefa_conclusao_arquivo em lotes limitados, cada
+lote em sua propria transacao, para nao segurar locks na tabela quente.
+
+O resumo diario (tarefa_conclusao_resumo) nao muda: ele ja tem as contagens
+dos dias arquivados.
+"""
+import os
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.tarefa_conclusao_arquivo import TarefaConclusaoArquivo
+from app.models.tarefa_conclusao_diaria import TarefaConclusaoDiaria
+
+# Dias mantidos na tabela quente
+ARQUIVO_DIAS = int(os.getenv("ARQUIVO_DIAS", "90"))
+# Linhas movidas por transacao
+ARQUIVO_LOTE = int(os.getenv("ARQUIVO_LOTE", "1000"))
+
+COLUNAS = ["id", "tarefa_email_id", "tarefa_usuario_id", "data", "data_hora_conclusao", "status"]
+
+
+def data_de_corte(dias: Optional[int] = None) -> date:
+    """Conclusoes com data anterior a esta sao arquivadas"""
+    dias = ARQUIVO_DIAS if dias is None else dias
+    if dias < 1:
+        raise ValueError("O horizonte de retencao precisa ser de pelo menos 1 dia")
+    return date.today() - timedelta(days=dias)
+
+
+def arquivar_conclusoes(db: Session, corte: date, tamanho_lote: Optional[int] = None, log=print) -> int:
+    """Move para o arquivo, lote a lote, as conclusoes anteriores ao corte. Retorna o total movido"""
+    tamanho_lote = tamanho_lote or ARQUIVO_LOTE
+    quente = TarefaConclusaoDiaria
+    total = 0
+    while True:
+        ids = db.execute(
+            select(quente.id).where(quente.data < corte).order_by(quente.id).limit(tamanho_lote)
+        ).scalars().all()
+        if not ids:
+            break
+        db.execute(insert(TarefaConclusaoArquivo).from_select(
+            COLUNAS,
+            select(*(getattr(quente, c) for c in COLUNAS)).where(quente.id.in_(ids))
+        ))
+        db.execute(delete(quente).where(quente.id.in_(ids)))
+        db.commit()
+        total += len(ids)
+        log(f"{total} conclusoes arquivadas")
+    return total
@@ -0,0 +1,124 @@
+"""
+Cache em memoria para os dados de referencia (Local, Category, Tarefa).
+
+Esses registros mudam poucas vezes por semana e sao lidos em quase toda
+requisicao. Cada cache tem tamanho maximo (LRU) e TTL; os handlers de
+criacao, atualizacao e remocao invalidam o cache da entidade no mesmo
+processo. Outros workers/pods enxergam a alteracao em ate CACHE_TTL segundos.
+
+Cada invalidar() avanca a geracao do cache. Quem carrega do banco le a
+geracao antes da consulta e a passa para guardar(): se uma escrita invalidou
+o cache no meio da leitura, o valor carregado (possivelmente antigo) e
+descartado em vez de ficar ate o TTL.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.models.tarefa import Tarefa
+from app.schemas.tarefa import TarefaResponse
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+CACHE_TAMANHO = int(os.getenv("CACHE_TAMANHO", "1024"))
+
+_AUSENTE = object()
+
+
+class CacheTTL:
+    """Cache LRU limitado, com expiracao por TTL e contadores de acerto/falha"""
+
+    def __init__(self, nome, tamanho_max=CACHE_TAMANHO, ttl=CACHE_TTL):
+        self.nome = nome
+        self.tamanho_max = tamanho_max
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.geracao = 0
+        self.descartados = 0
+
+    def obter(self, chave, padrao=None):
+        """Retorna o valor em cache ou padrao, contando acerto/falha"""
+        with self._lock:
+            item = self._itens.get(chave, _AUSENTE)
+            if item is not _AUSENTE:
+                expira_em, valor = item
+                if expira_em > time.monotonic():
+                    self._itens.move_to_end(chave)
+                    self.hits += 1
+                    return valor
+                del self._itens[chave]
+            self.misses += 1
+            return padrao
+
+    def guardar(self, chave, valor, geracao=None):
+        """
+        Guarda o valor. Com geracao (lida antes de carregar o valor), descarta
+        o valor se o cache foi invalidado depois da leitura
+        """
+        with self._lock:
+            if geracao is not None and geracao != self.geracao:
+                self.descartados += 1
+                return
+            self._itens[chave] = (time.monotonic() + self.ttl, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_max:
+                self._itens.popitem(last=False)
+
+    def obter_ou_carregar(self, chave, carregar):
+        """Retorna o valor em cache ou chama carregar() e guarda o resultado"""
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            geracao = self.geracao
+            valor = carregar()
+            self.guardar(chave, valor, geracao)
+        return valor
+
+    def invalidar(self):
+        """Remove todos os itens (chamado apos qualquer escrita na entidade)"""
+        with self._lock:
+            self._itens.clear()
+            self.geracao += 1
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "tamanho_max": self.tamanho_max,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "descartados": self.descartados,
+            }
+
+
+cache_locais = CacheTTL("locais")
+cache_categorias = CacheTTL("categorias")
+cache_tarefas = CacheTTL("tarefas")
+
+CACHES = (cache_locais, cache_categorias, cache_tarefas)
+
+
+def tarefas_por_id(db, ids):
+    """
+    Retorna {idTarefa: TarefaResponse} para os ids pedidos, buscando no banco
+    (em uma unica consulta) apenas os que nao estao no cache. Substitui o
+    JOIN com Tarefa nas consultas que so precisam do nome e da descricao.
+    """
+    tarefas = {}
+    faltando = []
+    for tarefa_id in set(ids):
+        tarefa = cache_tarefas.obter(("obter", tarefa_id))
+        if tarefa is None:
+            faltando.append(tarefa_id)
+        else:
+            tarefas[tarefa_id] = tarefa
+    if faltando:
+        geracao = cache_tarefas.geracao
+        for tarefa in db.query(Tarefa).filter(Tarefa.idTarefa.in_(faltando)).all():
+            resposta = TarefaResponse.model_validate(tarefa)
+            cache_tarefas.guardar(("obter", tarefa.idTarefa), resposta, geracao)
+            tarefas[tarefa.idTarefa] = resposta
+    return tarefas
@@ -0,0 +1,109 @@
+"""
+Commit em grupo (group commit) de escritas pequenas e concorrentes.
+
+A primeira requisicao abre um grupo e espera COMMIT_GRUPO_JANELA_MS (ou o
+grupo chegar a COMMIT_GRUPO_MAX pedidos); as que chegam nesse intervalo
+entram no mesmo grupo. O grupo e gravado em uma unica transacao, com a
+sessao da primeira requisicao, e cada requisicao recebe o proprio resultado.
+
+Nao e write-behind: a resposta so sai depois do commit do grupo, entao a
+durabilidade e a mesma da escrita avulsa. Se a transacao falhar, todas as
+requisicoes do grupo recebem o erro. O custo e ate uma janela a mais de
+latencia por requisicao.
+"""
+import asyncio
+import os
+
+
+def _env_bool(nome, padrao):
+    return os.getenv(nome, padrao).lower() in ("1", "true", "sim")
+
+
+COMMIT_EM_GRUPO = _env_bool("COMMIT_EM_GRUPO", "false")
+COMMIT_GRUPO_JANELA = float(os.getenv("COMMIT_GRUPO_JANELA_MS", "5")) / 1000
+COMMIT_GRUPO_MAX = int(os.getenv("COMMIT_GRUPO_MAX", "500"))
+
+
+class _Grupo:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pedidos = []
+        self.futuros = []
+        self.cheio = asyncio.Event()
+        self.tarefa = None
+
+
+class CommitEmGrupo:
+    """
+    Junta os pedidos concorrentes e grava cada grupo com gravar(db, pedidos),
+    funcao sincrona que retorna um resultado por pedido, na mesma ordem.
+    """
+
+    def __init__(self, nome, gravar, ativo=COMMIT_EM_GRUPO, janela=COMMIT_GRUPO_JANELA, maximo=COMMIT_GRUPO_MAX):
+        self.nome = nome
+        self.gravar = gravar
+        self.ativo = ativo
+        self.janela = janela
+        self.maximo = maximo
+        self._grupo = None
+        self.grupos = 0
+        self.pedidos = 0
+        self.maior_grupo = 0
+
+    async def executar(self, db, pedido):
+        """Inclui o pedido no grupo aberto (ou abre um) e retorna o resultado dele"""
+        loop = asyncio.get_running_loop()
+        grupo = self._grupo
+        lider = grupo is None or grupo.loop is not loop
+        if lider:
+            grupo = self._grupo = _Grupo(loop)
+            grupo.tarefa = loop.create_task(self._descarregar(db, grupo))
+        futuro = loop.create_future()
+        grupo.pedidos.append(pedido)
+        grupo.futuros.append(futuro)
+        if len(grupo.pedidos) >= self.maximo:
+            self._fechar(grupo)
+            grupo.cheio.set()
+        try:
+            return await asyncio.shield(futuro)
+        except asyncio.CancelledError:
+            # O grupo e gravado com a sessao do lider: ela so pode ser
+            # fechada depois da gravacao
+            if lider and not grupo.tarefa.done():
+                await asyncio.wait([grupo.tarefa])
+            raise
+
+    def _fechar(self, grupo):
+        if self._grupo is grupo:
+            self._grupo = None
+
+    async def _descarregar(self, db, grupo):
+        try:
+            await asyncio.wait_for(grupo.cheio.wait(), self.janela)
+        except asyncio.TimeoutError:
+            pass
+        self._fechar(grupo)
+        self.grupos += 1
+        self.pedidos += len(grupo.pedidos)
+        self.maior_grupo = max(self.maior_grupo, len(grupo.pedidos))
+        try:
+            resultados = await db.run(self.gravar, list(grupo.pedidos))
+        except Exception as erro:
+            for futuro in grupo.futuros:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+        else:
+            for futuro, resultado in zip(grupo.futuros, resultados):
+                if not futuro.done():
+                    futuro.set_result(resultado)
+
+    def estatisticas(self):
+        return {
+            "ativo": self.ativo,
+            "janela_ms": round(self.janela * 1000, 3),
+            "maximo": self.maximo,
+            "grupos": self.grupos,
+            "pedidos": self.pedidos,
+            "media_por_grupo": round(self.pedidos / self.grupos, 2) if self.grupos else 0.0,
+            "maior_grupo": self.maior_grupo,
+        }
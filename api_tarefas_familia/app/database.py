@@ -1,27 +1,231 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
 from urllib.parse import quote_plus
 
-# Configuração do banco de dados MySQL
+from app.limites import LimiteConcorrencia
+from app.telemetria import registrar_espera_pool
+
+
+def _env_bool(nome, padrao):
+    return os.getenv(nome, padrao).lower() in ("1", "true", "sim")
+
+
+# Configuração do banco de dados MySQL, vinda das variaveis de ambiente
+# (ConfigMap e Secret no k8s). DATABASE_URL, se definida, tem precedencia.
 # Senha com caracteres especiais precisa de URL encoding
-DB_USER = "dbamysql"
-DB_PASSWORD = quote_plus("@Fn.2026@")  # Codifica @ como %40
-DB_HOST = "76.13.69.127"
-DB_PORT = "3306"
-DB_NAME = "dbApiTarefasFamilia"
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = quote_plus(os.getenv("DB_PASSWORD", ""))  # Codifica @ como %40
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_PORT = os.getenv("DB_PORT", "3306")
+DB_NAME = os.getenv("DB_NAME", "dbApiTarefasFamilia")
+
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+# Driver assincrono equivalente ao driver sincrono da DATABASE_URL
+DRIVERS_ASYNC = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+_url = make_url(DATABASE_URL)
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    _url.set(drivername=DRIVERS_ASYNC.get(_url.drivername, _url.drivername)).render_as_string(hide_password=False)
+)
+
+# Modo de acesso dos routers portados para o executor (DB_ASYNC=true usa a
+# engine assincrona; caso contrario usa a engine sincrona no threadpool)
+DB_ASYNC = _env_bool("DB_ASYNC", "false")
+
+# Pool de conexoes. O pre-ping custa um round trip a cada checkout; por
+# padrao fica desligado e as conexoes sao recicladas antes do wait_timeout
+# do MySQL (DB_POOL_RECYCLE, em segundos)
+POOL_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "false"),
+}
+
+# Requisicoes usando o banco ao mesmo tempo (padrao: o que o pool atende sem
+# esperar) e segundos de espera por uma vaga antes de responder 503
+admissao_db = LimiteConcorrencia(
+    capacidade=int(os.getenv("DB_MAX_CONCORRENCIA", POOL_CONFIG["pool_size"] + POOL_CONFIG["max_overflow"])),
+    espera=float(os.getenv("DB_ADMISSAO_ESPERA", "0.5")),
+)
+
+
+class MetricasPool:
+    """Contadores de checkout do pool de conexoes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.aguardando = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def inicio_checkout(self):
+        with self._lock:
+            self.aguardando += 1
+
+    def fim_checkout(self, espera, timeout=False):
+        with self._lock:
+            self.aguardando -= 1
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+
+    def resumo(self, pool):
+        with self._lock:
+            return {
+                "tamanho": pool.size(),
+                "em_uso": pool.checkedout(),
+                "ociosas": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "aguardando": self.aguardando,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+                "espera_media_ms": round(self.espera_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "espera_max_ms": round(self.espera_max * 1000, 3),
+            }
+
+
+def pool_monitorado(base, metricas):
+    """Subclasse do pool que mede o tempo de checkout (espera + pre-ping)"""
+
+    def connect(self):
+        metricas.inicio_checkout()
+        inicio = time.perf_counter()
+        try:
+            conexao = base.connect(self)
+        except exc.TimeoutError:
+            metricas.fim_checkout(time.perf_counter() - inicio, timeout=True)
+            registrar_espera_pool(time.perf_counter() - inicio)
+            raise
+        except Exception:
+            metricas.fim_checkout(time.perf_counter() - inicio)
+            raise
+        espera = time.perf_counter() - inicio
+        metricas.fim_checkout(espera)
+        registrar_espera_pool(espera)
+        return conexao
+
+    return type(f"{base.__name__}Monitorado", (base,), {"connect": connect})
+
+
+metricas_pool = MetricasPool()
+metricas_pool_async = MetricasPool()
+
 
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+def criar_engine(url, metricas, **kwargs):
+    """Cria a engine sincrona com o pool configurado e monitorado"""
+    config = {**POOL_CONFIG, **kwargs}
+    return create_engine(url, poolclass=pool_monitorado(QueuePool, metricas), **config)
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+
+engine = criar_engine(DATABASE_URL, metricas_pool)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Engine assincrona criada sob demanda, para nao exigir o driver assincrono
+# quando a API roda no modo sincrono
+_async_engine = None
+_AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """Retorna a engine assincrona, criando-a no primeiro uso"""
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            poolclass=pool_monitorado(AsyncAdaptedQueuePool, metricas_pool_async),
+            **POOL_CONFIG
+        )
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
 # Dependency para obter sessão do banco
 def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    with admissao_db.reservar():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+
+# Dependency para respostas em streaming: a sessao do get_db e fechada antes
+# de o corpo ser enviado, entao o gerador abre a propria sessao com a fabrica
+def get_session_factory():
+    return SessionLocal
+
+
+# Dependency para obter sessão assíncrona do banco
+async def get_async_db():
+    get_async_engine()
+    async with _AsyncSessionLocal() as session:
+        yield session
+
+
+class Executor(ABC):
+    """Executa funcoes sincronas fn(session, ...) de acesso ao banco"""
+
+    def __init__(self, session):
+        self.session = session
+
+    @abstractmethod
+    async def run(self, fn, *args, **kwargs):
+        """Chama fn(session, *args, **kwargs) e retorna o resultado"""
+
+
+class ExecutorSync(Executor):
+    """Executa funcoes de acesso ao banco com uma Session no threadpool"""
+
+    async def run(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+class ExecutorAsync(Executor):
+    """Executa funcoes de acesso ao banco em uma AsyncSession via run_sync"""
+
+    async def run(self, fn, *args, **kwargs):
+        return await self.session.run_sync(fn, *args, **kwargs)
+
+
+# Dependency para os routers que funcionam nos dois modos: a mesma funcao
+# sincrona fn(session, ...) roda no threadpool ou na AsyncSession
+async def get_db_executor():
+    async with admissao_db.reservar_async():
+        if DB_ASYNC:
+            async for session in get_async_db():
+                yield ExecutorAsync(session)
+        else:
+            db = SessionLocal()
+            try:
+                yield ExecutorSync(db)
+            finally:
+                await run_in_threadpool(db.close)
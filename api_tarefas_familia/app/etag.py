@@ -0,0 +1,34 @@
+"""
+ETags fortes para os endpoints de leitura consultados em polling.
+
+O ETag e um hash do corpo JSON ja serializado (Serializador), os mesmos
+bytes que vao na resposta.
+Quando o If-None-Match da requisicao bate com o ETag atual a resposta e um
+304 sem corpo.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def etag_do_corpo(corpo: bytes) -> str:
+    """ETag forte de um corpo ja serializado"""
+    return '"' + hashlib.sha256(corpo).hexdigest()[:32] + '"'
+
+
+def etag_corresponde(request: Request, etag: str) -> bool:
+    """Compara o If-None-Match da requisicao com o ETag (comparacao fraca, RFC 9110)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidatos = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidatos)
+
+
+def resposta_json_com_etag(request: Request, corpo: bytes, etag: str) -> Response:
+    """304 se o cliente ja tem o corpo; senao o corpo JSON ja serializado, com o ETag"""
+    if etag_corresponde(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=corpo, media_type="application/json", headers={"ETag": etag})
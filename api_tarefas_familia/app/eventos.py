@@ -0,0 +1,170 @@
+"""
+Pub/sub em memoria para avisar os clientes conectados em /tarefas-dia/stream.
+
+Cada assinante tem uma fila limitada no event loop em que assinou. Publicar
+e seguro a partir de qualquer thread (os handlers sincronos rodam no
+threadpool): a entrega e agendada no loop de cada assinante com uma unica
+chamada call_soon_threadsafe por loop. O evento e serializado uma vez e a
+mesma mensagem SSE vai para todas as filas; se a fila de um cliente lento
+enche, o evento mais antigo dela e descartado.
+
+Os assinantes sao do processo: com varias replicas, cada pod so avisa os
+clientes conectados nele.
+"""
+import asyncio
+import json
+import threading
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.tarefa_email import TarefaEmail
+from app.models.tarefa_usuario import TarefaUsuario
+from app.singleflight import leituras_tarefas_dia
+
+# Eventos guardados por assinante enquanto o cliente nao le
+TAMANHO_FILA = 100
+
+
+class Assinatura:
+    """Fila de mensagens SSE de um cliente conectado"""
+
+    def __init__(self, canais: List[str], tamanho_fila: int):
+        self.canais = canais
+        self.loop = asyncio.get_running_loop()
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=tamanho_fila)
+        self.descartados = 0
+
+    def _entregar(self, mensagem: str):
+        if self.fila.full():
+            self.fila.get_nowait()
+            self.descartados += 1
+        self.fila.put_nowait(mensagem)
+
+
+class Barramento:
+    """Canais de eventos: "familia", "email:{email}" e "usuario:{id}" """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._canais: Dict[str, Set[Assinatura]] = {}
+        self.publicados = 0
+
+    def assinar(self, canais: Iterable[str], tamanho_fila: int = TAMANHO_FILA) -> Assinatura:
+        """Cria a assinatura; precisa ser chamado dentro do event loop"""
+        assinatura = Assinatura(list(canais), tamanho_fila)
+        with self._lock:
+            for canal in assinatura.canais:
+                self._canais.setdefault(canal, set()).add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura):
+        with self._lock:
+            for canal in assinatura.canais:
+                assinantes = self._canais.get(canal)
+                if assinantes is not None:
+                    assinantes.discard(assinatura)
+                    if not assinantes:
+                        del self._canais[canal]
+
+    def tem_assinantes(self) -> bool:
+        return bool(self._canais)
+
+    def total_assinantes(self) -> int:
+        with self._lock:
+            return len({a for assinantes in self._canais.values() for a in assinantes})
+
+    def publicar(self, canais: Iterable[str], tipo: str, dados: dict) -> int:
+        """Envia o evento aos assinantes de qualquer um dos canais. Retorna quantos receberam"""
+        with self._lock:
+            destinos = set()
+            for canal in canais:
+                destinos.update(self._canais.get(canal, ()))
+            self.publicados += 1
+        if not destinos:
+            return 0
+
+        mensagem = f"event: {tipo}\ndata: {json.dumps(dados, default=str, ensure_ascii=False)}\n\n"
+        por_loop: Dict[asyncio.AbstractEventLoop, List[Assinatura]] = {}
+        for assinatura in destinos:
+            por_loop.setdefault(assinatura.loop, []).append(assinatura)
+
+        try:
+            loop_atual: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop_atual = None
+        for loop, assinaturas in por_loop.items():
+            if loop is loop_atual:
+                _entregar(assinaturas, mensagem)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_entregar, assinaturas, mensagem)
+        return len(destinos)
+
+
+def _entregar(assinaturas: List[Assinatura], mensagem: str):
+    for assinatura in assinaturas:
+        assinatura._entregar(mensagem)
+
+
+barramento = Barramento()
+
+
+def canais_do_dono(usuario_id: Optional[int] = None, email: Optional[str] = None) -> List[str]:
+    """Canais que recebem os eventos de um membro: a familia e o proprio membro"""
+    canais = ["familia"]
+    if usuario_id is not None:
+        canais.append(f"usuario:{usuario_id}")
+    if email is not None:
+        canais.append(f"email:{email}")
+    return canais
+
+
+def _publicar_por_dono(tipo: str, acao: str, origem: str, por_dono: Dict, **extra):
+    for dono, ids in por_dono.items():
+        if origem == "usuario":
+            canais = canais_do_dono(usuario_id=dono)
+        else:
+            canais = canais_do_dono(email=dono)
+        barramento.publicar(canais, tipo, {"acao": acao, "origem": origem, "dono": dono, "ids": sorted(ids), **extra})
+
+
+def notificar_atribuicoes(acao: str, origem: str, pares: Iterable[Tuple[int, object]]):
+    """
+    Publica a mudanca de atribuicoes (ja commitada). pares sao (id, dono):
+    o usuario_idUsuario para origem "usuario" ou o email para origem "email".
+    Tambem descarta as leituras coalescidas dos quadros do dia.
+    """
+    leituras_tarefas_dia.invalidar()
+    por_dono = {}
+    for id, dono in pares:
+        por_dono.setdefault(dono, set()).add(id)
+    _publicar_por_dono("atribuicao", acao, origem, por_dono)
+
+
+def notificar_conclusoes(
+    db: Session,
+    acao: str,
+    dia: date,
+    tarefa_usuario_ids: Iterable[int] = (),
+    tarefa_email_ids: Iterable[int] = ()
+):
+    """
+    Publica conclusoes feitas ou desfeitas (ja commitadas). Os donos das
+    atribuicoes so sao consultados quando ha alguem conectado. Tambem
+    descarta as leituras coalescidas dos quadros do dia.
+    """
+    leituras_tarefas_dia.invalidar()
+    if not barramento.tem_assinantes():
+        return
+    for origem, modelo, coluna_dono, ids in (
+        ("usuario", TarefaUsuario, TarefaUsuario.usuario_idUsuario, list(tarefa_usuario_ids)),
+        ("email", TarefaEmail, TarefaEmail.email, list(tarefa_email_ids)),
+    ):
+        if not ids:
+            continue
+        por_dono = {}
+        for id, dono in db.execute(select(modelo.id, coluna_dono).where(modelo.id.in_(ids))):
+            por_dono.setdefault(dono, set()).add(id)
+        _publicar_por_dono("conclusao", acao, origem, por_dono, data=dia)
@@ -0,0 +1,129 @@
+"""
+Exportacao em streaming (NDJSON ou CSV) de consultas grandes.
+
+As linhas vem de um cursor do lado do servidor (Query.yield_per) e sao
+enviadas em blocos de TAMANHO_BLOCO, entao a memoria usada nao depende do
+tamanho do intervalo exportado.
+
+exportar() ocupa uma vaga do admissao_db antes de responder (503 se nao
+houver) e o gerador so a libera ao terminar ou ser fechado: a sessao dele
+vive alem da dependency. Os comandos do gerador contam no orcamento de SQL.
+"""
+import csv
+import io
+import json
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.database import admissao_db
+from app.orcamento_sql import ContagemSQL, contar_na_conexao
+
+# Linhas buscadas por vez no cursor e enviadas por bloco na resposta
+TAMANHO_BLOCO = 1000
+
+TIPOS_CONTEUDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def linhas_das_queries(
+    session_factory: Callable,
+    montar_queries: Callable,
+    campos: List[str],
+    liberar: Optional[Callable] = None,
+    contar: Optional[Callable] = None,
+) -> Iterator[dict]:
+    """
+    Abre uma sessao propria (a do Depends fecha antes de o corpo ser enviado)
+    e percorre as queries, uma depois da outra, com um cursor do lado do servidor.
+    contar(conexao) envolve a leitura e liberar() e chamada no fim, mesmo
+    se o gerador for fechado antes.
+    """
+    try:
+        with session_factory() as db:
+            with contar(db.connection()) if contar else nullcontext():
+                for query in montar_queries(db):
+                    for linha in query.yield_per(TAMANHO_BLOCO):
+                        registro = linha._mapping
+                        yield {campo: registro[campo] for campo in campos}
+    finally:
+        if liberar:
+            liberar()
+
+
+def _em_blocos(partes: Iterable[str]) -> Iterator[str]:
+    bloco = []
+    for parte in partes:
+        bloco.append(parte)
+        if len(bloco) >= TAMANHO_BLOCO:
+            yield "".join(bloco)
+            bloco = []
+    if bloco:
+        yield "".join(bloco)
+
+
+def _ndjson(linhas: Iterable[dict]) -> Iterator[str]:
+    for linha in linhas:
+        yield json.dumps(linha, default=str, ensure_ascii=False) + "\n"
+
+
+def _csv(linhas: Iterable[dict], campos: List[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=campos)
+    escritor.writeheader()
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for linha in linhas:
+        escritor.writerow(linha)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def resposta_exportacao(
+    linhas: Iterable[dict],
+    campos: List[str],
+    formato: str,
+    nome_arquivo: str,
+    background: Optional[BackgroundTask] = None,
+) -> StreamingResponse:
+    """StreamingResponse com as linhas no formato pedido (ndjson ou csv)"""
+    partes = _csv(linhas, campos) if formato == "csv" else _ndjson(linhas)
+    return StreamingResponse(
+        _em_blocos(partes),
+        media_type=TIPOS_CONTEUDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}.{formato}"'},
+        background=background,
+    )
+
+
+async def exportar(
+    request: Request,
+    session_factory: Callable,
+    montar_queries: Callable,
+    campos: List[str],
+    formato: str,
+    nome_arquivo: str,
+    maximo_sql: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Exportacao em streaming dentro do admissao_db e do orcamento de SQL
+    (maximo_sql comandos no corpo inteiro).
+    """
+    liberar = await admissao_db.ocupar_async()
+    contar = partial(
+        contar_na_conexao,
+        contagem=ContagemSQL(maximo_sql),
+        metodo=request.method,
+        rota=request.scope["route"].path,
+    )
+    linhas = linhas_das_queries(session_factory, montar_queries, campos, liberar, contar)
+    # Se o corpo nunca comecar (cliente desconectou), a tarefa devolve a vaga
+    return resposta_exportacao(linhas, campos, formato, nome_arquivo, BackgroundTask(liberar))
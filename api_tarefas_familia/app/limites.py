@@ -0,0 +1,366 @@
+"""
+Controle de admissao: limite de requisicoes por cliente (token bucket) e
+limite global de requisicoes usando o banco ao mesmo tempo.
+
+O middleware LimiteRequisicoesMiddleware aplica a regra da rota (ou a regra
+"*") com um balde por cliente: o cliente e o IP, ou o login/email da rota ou
+do corpo JSON. Sem fichas a resposta e 429 na hora, com Retry-After.
+
+LimiteConcorrencia limita as sessoes abertas pelas dependencies do banco: a
+requisicao espera no maximo DB_ADMISSAO_ESPERA segundos por uma vaga e
+depois recebe 503, em vez de ficar na fila do pool de conexoes.
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+
+# Regras padrao: "METODO /rota" (como declarada no router) ou "*" para as
+# demais. capacidade e a rajada permitida; por_minuto, a reposicao das fichas
+REGRAS_PADRAO = {
+    "POST /usuarios/login": {"capacidade": 5, "por_minuto": 10, "chave": "login"},
+    "POST /usuarios/login/gmail": {"capacidade": 5, "por_minuto": 10, "chave": "email"},
+    "GET /usuarios/": {"capacidade": 10, "por_minuto": 60, "chave": "ip"},
+    "*": {"capacidade": 120, "por_minuto": 1200, "chave": "ip"},
+}
+
+# Ajustes por rota, em JSON no mesmo formato de REGRAS_PADRAO
+LIMITES_ROTAS = os.getenv("LIMITES_ROTAS", "")
+LIMITES_ATIVOS = os.getenv("LIMITES_ATIVOS", "true").lower() in ("1", "true", "sim")
+
+# Baldes guardados (os menos usados saem primeiro)
+MAX_CLIENTES = int(os.getenv("LIMITES_MAX_CLIENTES", "10000"))
+
+# Maior corpo lido para achar o login/email do cliente
+MAX_CORPO_CHAVE = 64 * 1024
+
+
+class RegraLimite:
+    """Token bucket de uma rota: capacidade fichas, repostas a por_minuto por minuto"""
+
+    def __init__(self, rota, capacidade, por_minuto, chave="ip"):
+        self.rota = rota
+        self.capacidade = float(capacidade)
+        self.por_segundo = float(por_minuto) / 60
+        self.chave = chave
+        self.permitidas = 0
+        self.rejeitadas = 0
+
+
+class LimiteRequisicoes:
+    """Regras por rota e os baldes de cada (regra, cliente)"""
+
+    def __init__(self, regras, max_clientes=MAX_CLIENTES):
+        self.regras = {rota: RegraLimite(rota, **config) for rota, config in regras.items()}
+        self.max_clientes = max_clientes
+        self._baldes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def regra(self, metodo, rota):
+        return self.regras.get(f"{metodo} {rota}") or self.regras.get("*")
+
+    def consumir(self, regra, cliente, agora=None) -> float:
+        """Gasta uma ficha; retorna 0 se permitido, senao os segundos ate a proxima ficha"""
+        agora = time.monotonic() if agora is None else agora
+        chave = (regra.rota, cliente)
+        with self._lock:
+            fichas, atualizado = self._baldes.pop(chave, (regra.capacidade, agora))
+            fichas = min(regra.capacidade, fichas + (agora - atualizado) * regra.por_segundo)
+            if fichas >= 1:
+                fichas -= 1
+                espera = 0.0
+                regra.permitidas += 1
+            else:
+                espera = (1 - fichas) / regra.por_segundo if regra.por_segundo else math.inf
+                regra.rejeitadas += 1
+            self._baldes[chave] = (fichas, agora)
+            while len(self._baldes) > self.max_clientes:
+                self._baldes.popitem(last=False)
+        return espera
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "clientes": len(self._baldes),
+                "regras": {
+                    rota: {
+                        "capacidade": regra.capacidade,
+                        "por_minuto": round(regra.por_segundo * 60, 3),
+                        "chave": regra.chave,
+                        "permitidas": regra.permitidas,
+                        "rejeitadas": regra.rejeitadas,
+                    }
+                    for rota, regra in self.regras.items()
+                },
+            }
+
+
+def _regras_configuradas():
+    regras = dict(REGRAS_PADRAO)
+    if LIMITES_ROTAS:
+        regras.update(json.loads(LIMITES_ROTAS))
+    return regras
+
+
+limite_requisicoes = LimiteRequisicoes(_regras_configuradas())
+
+
+class LimiteRequisicoesMiddleware:
+    """Middleware ASGI que responde 429 quando o cliente esgota o balde da rota"""
+
+    def __init__(self, app, limites=None):
+        self.app = app
+        self.limites = limites or limite_requisicoes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not LIMITES_ATIVOS:
+            await self.app(scope, receive, send)
+            return
+
+        rota, parametros = _rota(scope)
+        regra = self.limites.regra(scope["method"], getattr(rota, "path", ""))
+        if regra is None:
+            await self.app(scope, receive, send)
+            return
+
+        cliente = None
+        if regra.chave != "ip":
+            cliente = parametros.get(regra.chave)
+            if cliente is None:
+                cliente, receive = await _chave_do_corpo(receive, regra.chave)
+        # Sem login/email na requisicao, o cliente e o IP
+        cliente = f"{regra.chave}:{str(cliente).strip().lower()}" if cliente else _ip(scope)
+
+        espera = self.limites.consumir(regra, cliente)
+        if espera:
+            # O 429 sai antes do roteamento; a telemetria le a rota do scope
+            if rota is not None:
+                scope["route"] = rota
+            resposta = JSONResponse(
+                {"detail": "Muitas requisicoes, tente novamente mais tarde"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(espera)))},
+            )
+            await resposta(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+def _rota(scope):
+    """(rota, parametros de caminho), ou (None, {}) se nenhuma rota bate"""
+    app = scope.get("app")
+    for rota in getattr(getattr(app, "router", None), "routes", ()):
+        correspondencia, filho = rota.matches(scope)
+        if correspondencia == Match.FULL:
+            return rota, filho.get("path_params", {})
+    return None, {}
+
+
+def _ip(scope):
+    cliente = scope.get("client")
+    return cliente[0] if cliente else "desconhecido"
+
+
+async def _chave_do_corpo(receive, campo):
+    """
+    Le o corpo (ate MAX_CORPO_CHAVE bytes) para achar o campo no JSON e
+    devolve um receive que entrega o mesmo corpo para a aplicacao.
+    """
+    mensagens = []
+    tamanho = 0
+    while True:
+        mensagem = await receive()
+        mensagens.append(mensagem)
+        if mensagem["type"] != "http.request":
+            break
+        tamanho += len(mensagem.get("body", b""))
+        if not mensagem.get("more_body") or tamanho > MAX_CORPO_CHAVE:
+            break
+
+    valor = None
+    if tamanho <= MAX_CORPO_CHAVE:
+        try:
+            dados = json.loads(b"".join(m.get("body", b"") for m in mensagens))
+        except ValueError:
+            dados = None
+        if isinstance(dados, dict) and isinstance(dados.get(campo), str):
+            valor = dados[campo]
+
+    async def reenviar():
+        if mensagens:
+            return mensagens.pop(0)
+        return await receive()
+
+    return valor, reenviar
+
+
+class _Espera:
+    """Quem espera uma vaga: uma thread (loop None) ou um future no event loop"""
+
+    __slots__ = ("loop", "vaga", "entregue")
+
+    def __init__(self, loop=None, vaga=None):
+        self.loop = loop
+        self.vaga = vaga
+        self.entregue = False
+
+
+class LimiteConcorrencia:
+    """Vagas para requisicoes usando o banco ao mesmo tempo, com espera maxima"""
+
+    def __init__(self, capacidade, espera):
+        self.capacidade = capacidade
+        self.espera = espera
+        self._cond = threading.Condition()
+        # Threads e event loops esperando, na ordem de chegada
+        self._fila = deque()
+        self.em_uso = 0
+        self.aguardando = 0
+        self.admitidas = 0
+        self.rejeitadas = 0
+        self.espera_total = 0.0
+
+    def _tentar(self):
+        # Com alguem na fila, quem chega entra atras
+        if not self._fila and self.em_uso < self.capacidade:
+            self.em_uso += 1
+            self.admitidas += 1
+            return True
+        return False
+
+    def entrar(self) -> bool:
+        """Ocupa uma vaga, esperando ate self.espera segundos (bloqueia a thread)"""
+        inicio = time.monotonic()
+        with self._cond:
+            if self._tentar():
+                return True
+            espera = _Espera()
+            self._fila.append(espera)
+            self.aguardando += 1
+            admitida = self._cond.wait_for(lambda: espera.entregue, timeout=self.espera)
+            if not admitida:
+                self._fila.remove(espera)
+                self.rejeitadas += 1
+            self.aguardando -= 1
+            self.espera_total += time.monotonic() - inicio
+            return admitida
+
+    async def entrar_async(self) -> bool:
+        """Como entrar(), mas espera no event loop sem ocupar uma thread"""
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._tentar():
+                return True
+            espera = _Espera(loop, loop.create_future())
+            self._fila.append(espera)
+            self.aguardando += 1
+        inicio = time.monotonic()
+        admitida = False
+        try:
+            admitida = await asyncio.wait_for(espera.vaga, timeout=self.espera)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                if espera in self._fila:
+                    self._fila.remove(espera)
+                self.aguardando -= 1
+                self.espera_total += time.monotonic() - inicio
+                if not admitida:
+                    self.rejeitadas += 1
+            # Cancelada depois de receber a vaga: devolve
+            if not admitida and espera.vaga.done() and not espera.vaga.cancelled():
+                self.sair()
+        return admitida
+
+    def _entregar(self, vaga):
+        """Roda no loop de quem espera; se ele ja desistiu, a vaga volta"""
+        if vaga.done():
+            self.sair()
+            return
+        with self._cond:
+            self.admitidas += 1
+        vaga.set_result(True)
+
+    def sair(self):
+        with self._cond:
+            self.em_uso -= 1
+            # A vaga passa direto para o primeiro da fila, thread ou event loop
+            while self._fila and self.em_uso < self.capacidade:
+                espera = self._fila.popleft()
+                if espera.loop is None:
+                    espera.entregue = True
+                    self.admitidas += 1
+                    self._cond.notify_all()
+                else:
+                    try:
+                        espera.loop.call_soon_threadsafe(self._entregar, espera.vaga)
+                    except RuntimeError:
+                        # Loop ja fechado
+                        continue
+                self.em_uso += 1
+                return
+
+    def _ocupado(self):
+        return HTTPException(
+            status_code=503,
+            detail="Servidor ocupado, tente novamente em instantes",
+            headers={"Retry-After": "1"},
+        )
+
+    @contextmanager
+    def reservar(self):
+        if not self.entrar():
+            raise self._ocupado()
+        try:
+            yield
+        finally:
+            self.sair()
+
+    async def ocupar_async(self):
+        """
+        Ocupa uma vaga (503 se nao houver) fora de um bloco with, para quem a
+        libera depois, ex.: no fim de um gerador. Retorna liberar(), que so
+        devolve a vaga na primeira chamada.
+        """
+        if not await self.entrar_async():
+            raise self._ocupado()
+        ocupada = [True]
+
+        def liberar():
+            try:
+                ocupada.pop()
+            except IndexError:
+                return
+            self.sair()
+
+        return liberar
+
+    @asynccontextmanager
+    async def reservar_async(self):
+        if not await self.entrar_async():
+            raise self._ocupado()
+        try:
+            yield
+        finally:
+            self.sair()
+
+    def estatisticas(self):
+        with self._cond:
+            return {
+                "capacidade": self.capacidade,
+                "espera_max_ms": round(self.espera * 1000, 3),
+                "em_uso": self.em_uso,
+                "aguardando": self.aguardando,
+                "admitidas": self.admitidas,
+                "rejeitadas": self.rejeitadas,
+                "espera_total_ms": round(self.espera_total * 1000, 3),
+            }
@@ -0,0 +1,139 @@
+"""
+Escrita em lote: um INSERT de varias linhas por bloco, tudo na mesma transacao.
+
+Os ids criados vem do RETURNING quando o banco suporta (SQLite, MariaDB).
+No MySQL os ids de um INSERT de varias linhas nao sao necessariamente
+consecutivos (innodb_autoinc_lock_mode = 2, padrao do MySQL 8): cada bloco
+grava um token em lote_insercao e os ids voltam de um SELECT pelo token, na
+mesma transacao.
+"""
+from typing import Dict, Iterable, List, Optional, Set
+from uuid import uuid4
+
+from sqlalchemy import String, insert, select
+from sqlalchemy.orm import Session
+
+from app.sincronizacao import registrar_alteracoes
+
+# Linhas por INSERT: mantem o comando abaixo do max_allowed_packet do MySQL.
+# O bloco tambem e limitado pelo numero de parametros por comando
+# (999 nos SQLite anteriores ao 3.32; 65535 placeholders no MySQL)
+TAMANHO_BLOCO = 1000
+MAX_PARAMETROS = {"sqlite": 999}
+MAX_PARAMETROS_PADRAO = 65535
+
+
+def tamanho_do_bloco(conexao, tabela) -> int:
+    """Linhas por INSERT sem passar do limite de parametros do banco"""
+    maximo = MAX_PARAMETROS.get(conexao.dialect.name, MAX_PARAMETROS_PADRAO)
+    return max(1, min(TAMANHO_BLOCO, maximo // len(tabela.columns)))
+
+
+def inserir_em_lote(db: Session, modelo, linhas: List[dict]) -> List[int]:
+    """
+    Insere as linhas sem commit e retorna os ids criados, na ordem das linhas.
+    Sem RETURNING, o modelo precisa da coluna lote_insercao.
+    """
+    tabela = modelo.__table__
+    coluna_id = list(tabela.primary_key.columns)[0]
+    conexao = db.connection()
+    ids = []
+    tamanho = tamanho_do_bloco(conexao, tabela)
+    for inicio in range(0, len(linhas), tamanho):
+        bloco = linhas[inicio:inicio + tamanho]
+        if conexao.dialect.insert_returning:
+            # A ordem das linhas do RETURNING nao e garantida; os auto-increments
+            # sao crescentes na ordem do VALUES
+            comando = insert(tabela).values(bloco).returning(coluna_id)
+            ids.extend(sorted(conexao.execute(comando).scalars()))
+        else:
+            token = uuid4().hex
+            conexao.execute(insert(tabela).values([{**linha, "lote_insercao": token} for linha in bloco]))
+            ids.extend(conexao.execute(
+                select(coluna_id).where(tabela.c.lote_insercao == token).order_by(coluna_id)
+            ).scalars())
+    return ids
+
+
+def inserir_ignorando_duplicados(db: Session, modelo, linhas: List[dict]) -> None:
+    """
+    Insere as linhas sem commit; as que violam uma chave unica sao ignoradas.
+    Usa ON DUPLICATE KEY UPDATE id = id no MySQL (o INSERT IGNORE tambem
+    engoliria outros erros) e ON CONFLICT DO NOTHING nos demais bancos.
+    """
+    tabela = modelo.__table__
+    conexao = db.connection()
+    nome_dialeto = conexao.dialect.name
+    tamanho = tamanho_do_bloco(conexao, tabela)
+    for inicio in range(0, len(linhas), tamanho):
+        bloco = linhas[inicio:inicio + tamanho]
+        if nome_dialeto in ("mysql", "mariadb"):
+            from sqlalchemy.dialects.mysql import insert as insert_mysql
+
+            coluna_id = list(tabela.primary_key.columns)[0]
+            comando = insert_mysql(tabela).values(bloco).on_duplicate_key_update({coluna_id.name: coluna_id})
+        elif nome_dialeto == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_sqlite
+
+            comando = insert_sqlite(tabela).values(bloco).on_conflict_do_nothing()
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_postgresql
+
+            comando = insert_postgresql(tabela).values(bloco).on_conflict_do_nothing()
+        conexao.execute(comando)
+
+
+def inserir_selecao_ou_atualizar(db: Session, modelo, colunas: List[str], selecao, atualizar: List[str]) -> None:
+    """
+    INSERT ... SELECT sem commit; linhas que ja existem (mesma chave primaria)
+    recebem os valores novos das colunas em atualizar. A selecao precisa ter
+    WHERE (no SQLite o ON CONFLICT logo apos um JOIN ... ON e ambiguo).
+    """
+    tabela = modelo.__table__
+    conexao = db.connection()
+    if conexao.dialect.name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as insert_mysql
+
+        comando = insert_mysql(tabela).from_select(colunas, selecao)
+        comando = comando.on_duplicate_key_update({c: comando.inserted[c] for c in atualizar})
+    else:
+        if conexao.dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+
+        comando = insert_dialeto(tabela).from_select(colunas, selecao)
+        comando = comando.on_conflict_do_update(
+            index_elements=list(tabela.primary_key.columns),
+            set_={c: comando.excluded[c] for c in atualizar}
+        )
+    conexao.execute(comando)
+
+
+def ids_existentes(db: Session, coluna, valores: Iterable) -> Set:
+    """Retorna, com uma unica consulta, quais dos valores existem na coluna"""
+    valores = set(valores)
+    if not valores:
+        return set()
+    return set(db.execute(select(coluna).where(coluna.in_(valores))).scalars())
+
+
+def campo_excedido(modelo, linha: dict) -> Optional[str]:
+    """Mensagem de erro se algum texto passa do tamanho da coluna, senao None"""
+    for coluna in modelo.__table__.columns:
+        valor = linha.get(coluna.key)
+        if isinstance(coluna.type, String) and coluna.type.length and valor is not None and len(valor) > coluna.type.length:
+            return f"{coluna.key} excede {coluna.type.length} caracteres"
+    return None
+
+
+def gravar_lote(db: Session, modelo, linhas: List[dict], erros: Dict[int, str]) -> dict:
+    """Insere as linhas sem erro em uma transacao e monta o resultado por item"""
+    indices = [i for i in range(len(linhas)) if i not in erros]
+    ids = inserir_em_lote(db, modelo, [linhas[i] for i in indices]) if indices else []
+    registrar_alteracoes(db, modelo, ids)
+    db.commit()
+    return {
+        "criados": [{"indice": i, "id": id} for i, id in zip(indices, ids)],
+        "erros": [{"indice": i, "detail": detail} for i, detail in sorted(erros.items())],
+    }
@@ -5,3 +5,6 @@ from .tarefa_usuario import TarefaUsuario
 from .category import Category
 from .tarefa_email import TarefaEmail
 from .tarefa_conclusao_diaria import TarefaConclusaoDiaria
+from .tarefa_conclusao_resumo import TarefaConclusaoResumo
+from .tarefa_conclusao_arquivo import TarefaConclusaoArquivo
+from .alteracao import Alteracao, AlteracaoTrava
@@ -0,0 +1,38 @@
+from sqlalchemy import DDL, BigInteger, Column, DateTime, Index, Integer, String, event
+from app.database import Base
+
+
+class Alteracao(Base):
+    """
+    Registro de alteracoes lido pelo /sync: uma linha por registro criado,
+    alterado ou removido (removido = 1) nas tabelas sincronizadas. O id
+    auto-incremento e a versao da alteracao.
+    """
+    __tablename__ = "alteracao"
+
+    versao = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    tabela = Column(String(45), nullable=False)
+    registro_id = Column(Integer, nullable=False)
+    removido = Column(Integer, nullable=False, default=0)
+    criado_em = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index('idx_alteracao_tabela_registro', 'tabela', 'registro_id'),
+    )
+
+
+class AlteracaoTrava(Base):
+    """
+    Linha unica travada (UPDATE) por toda transacao antes de gravar em
+    alteracao e mantida ate o commit: as versoes ficam visiveis na ordem.
+    """
+    __tablename__ = "alteracao_trava"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    escritas = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0)
+
+
+event.listen(
+    AlteracaoTrava.__table__, "after_create",
+    DDL("INSERT INTO alteracao_trava (id, escritas) VALUES (1, 0)"),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -11,6 +11,10 @@ class Tarefa(Base):
     Descricao = Column(String(100))
     Local_idLocal = Column(Integer, ForeignKey("Local.idLocal"))
 
+    __table_args__ = (
+        Index('idx_tarefa_local', 'Local_idLocal'),
+    )
+
     # Relacionamentos
     local = relationship("Local", back_populates="tarefas")
     usuarios = relationship("TarefaUsuario", back_populates="tarefa")
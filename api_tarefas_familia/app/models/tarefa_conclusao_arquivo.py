@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Date, String, Index
+from app.database import Base
+
+
+class TarefaConclusaoArquivo(Base):
+    """
+    Conclusoes antigas movidas de tarefa_conclusao_diaria pelo job de retencao
+    (arquivar_conclusoes.py). Mantem o id original.
+    """
+    __tablename__ = "tarefa_conclusao_arquivo"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    tarefa_email_id = Column(Integer, nullable=True)
+    tarefa_usuario_id = Column(Integer, nullable=True)
+    data = Column(Date, nullable=False)
+    data_hora_conclusao = Column(String(45), nullable=False)
+    status = Column(Integer, default=1)
+
+    __table_args__ = (
+        Index('idx_arquivo_email_data', 'tarefa_email_id', 'data'),
+        Index('idx_arquivo_usuario_data', 'tarefa_usuario_id', 'data'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, Date, String, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -16,6 +16,7 @@ class TarefaConclusaoDiaria(Base):
     __table_args__ = (
         UniqueConstraint('tarefa_email_id', 'data', name='uq_tarefa_email_data'),
         UniqueConstraint('tarefa_usuario_id', 'data', name='uq_tarefa_usuario_data'),
+        Index('idx_tarefa_conclusao_data', 'data'),
     )
 
     tarefa_email = relationship("TarefaEmail")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, Date, String
+from app.database import Base
+
+
+class TarefaConclusaoResumo(Base):
+    """
+    Conclusoes por (dia, dono, tarefa), mantido junto com tarefa_conclusao_diaria.
+    dono e o idUsuario (origem "usuario") ou o email (origem "email").
+    """
+    __tablename__ = "tarefa_conclusao_resumo"
+
+    data = Column(Date, primary_key=True)
+    origem = Column(String(10), primary_key=True)
+    dono = Column(String(100), primary_key=True)
+    Tarefa_idTarefa = Column(Integer, primary_key=True)
+    concluidas = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -13,6 +13,13 @@ class TarefaEmail(Base):
     Periodo = Column(String(45))
     Feito = Column(Integer, default=0)
     DataHoraConclusao = Column(String(45))
+    # Token do INSERT em lote que criou a linha (app/lote.py)
+    lote_insercao = Column(String(32), nullable=True)
+
+    __table_args__ = (
+        Index('idx_tarefa_email_lote_insercao', 'lote_insercao'),
+        Index('idx_tarefa_email_email', 'email'),
+    )
 
     # Relacionamento com Tarefa
     tarefa = relationship("Tarefa")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Computed, Integer, String, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -12,6 +12,14 @@ class Usuario(Base):
     senha = Column(String(255), nullable=True)
     email = Column(String(100), nullable=True)
     tipo_conta = Column(String(20), nullable=False, default="simples")
+    # Email das contas Gmail (NULL nas simples): so ele e unico, membros da
+    # familia com conta simples podem usar o email do responsavel
+    email_gmail = Column(String(100), Computed("CASE WHEN tipo_conta = 'gmail' THEN email END"))
+
+    __table_args__ = (
+        Index('idx_usuario_email', 'email'),
+        Index('uq_usuario_email_gmail', 'email_gmail', unique=True),
+    )
 
     # Relacionamento com TarefaUsuario
     tarefas = relationship("TarefaUsuario", back_populates="usuario")
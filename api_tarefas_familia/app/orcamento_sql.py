@@ -0,0 +1,156 @@
+"""
+Orcamento de consultas por requisicao e deteccao de N+1.
+
+Cada rota pode declarar quantos comandos SQL pode executar:
+
+    @router.get("/email/{email}", dependencies=[orcamento_sql(2)])
+
+A dependency abre a contagem da requisicao (ContextVar) e o evento
+before_cursor_execute conta cada comando e o formato dele (o SQL com os
+parametros e as listas do IN colapsados). Ao final da rota sao violacoes:
+passar do maximo declarado, ou o mesmo SELECT repetido mais de
+ORCAMENTO_SQL_REPETICOES vezes, o sinal de uma consulta por linha (N+1).
+
+ORCAMENTO_SQL define o que fazer com a violacao: "log" (padrao) registra
+um aviso, "erro" levanta OrcamentoSQLExcedido (usado pelos testes, para a
+suite falhar) e "desligado" nao conta nada. Com a dependency tambem no
+app (FastAPI(dependencies=[orcamento_sql()])), toda rota passa pela
+deteccao de N+1 mesmo sem maximo declarado.
+
+O corpo das respostas em streaming e gerado depois da dependency fechar a
+contagem; ele conta os comandos da propria conexao com contar_na_conexao.
+"""
+import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ORCAMENTO_SQL = os.getenv("ORCAMENTO_SQL", "log").lower()
+ORCAMENTO_SQL_REPETICOES = int(os.getenv("ORCAMENTO_SQL_REPETICOES", "3"))
+
+logger = logging.getLogger(__name__)
+
+_ESPACOS = re.compile(r"\s+")
+_LISTA_IN = re.compile(r"\bIN \((?:\?|%s|%\(\w+\)s|:\w+)(?:, (?:\?|%s|%\(\w+\)s|:\w+))*\)", re.IGNORECASE)
+
+
+class OrcamentoSQLExcedido(Exception):
+    """A rota executou mais comandos SQL que o declarado ou repetiu uma consulta (N+1)"""
+
+
+def formato_do_comando(statement: str) -> str:
+    """SQL sem diferencas de espaco nem do tamanho das listas do IN"""
+    return _LISTA_IN.sub("IN (?)", _ESPACOS.sub(" ", statement.strip()))
+
+
+class ContagemSQL:
+    """Comandos executados pela requisicao atual e os limites declarados pela rota"""
+
+    def __init__(self, maximo: Optional[int] = None, repeticoes: Optional[int] = None):
+        self.maximo = maximo
+        self.repeticoes = ORCAMENTO_SQL_REPETICOES if repeticoes is None else repeticoes
+        self.total = 0
+        self.formatos = Counter()
+
+    def declarar(self, maximo: Optional[int], repeticoes: Optional[int]):
+        if maximo is not None:
+            self.maximo = maximo
+        if repeticoes is not None:
+            self.repeticoes = repeticoes
+
+    def registrar(self, statement: str):
+        self.total += 1
+        if statement.lstrip()[:6].upper() == "SELECT":
+            self.formatos[formato_do_comando(statement)] += 1
+
+    def violacoes(self):
+        encontradas = []
+        if self.maximo is not None and self.total > self.maximo:
+            encontradas.append(("orcamento", f"{self.total} comandos SQL, orcamento de {self.maximo}"))
+        for formato, vezes in self.formatos.most_common():
+            if vezes <= self.repeticoes:
+                break
+            encontradas.append(("repeticao", f"mesmo SELECT {vezes} vezes (N+1?): {formato[:200]}"))
+        return encontradas
+
+
+contagem_atual: ContextVar = ContextVar("contagem_sql", default=None)
+
+# Violacoes por (metodo, rota, tipo), expostas em /metrics
+violacoes_por_rota = Counter()
+
+
+def verificar(contagem: ContagemSQL, metodo: str, rota: str, modo: str = None):
+    """Registra as violacoes da contagem; no modo "erro" levanta OrcamentoSQLExcedido"""
+    modo = modo or ORCAMENTO_SQL
+    violacoes = contagem.violacoes()
+    for tipo, _ in violacoes:
+        violacoes_por_rota[(metodo, rota, tipo)] += 1
+    if not violacoes:
+        return
+    mensagem = f"{metodo} {rota}: " + "; ".join(detalhe for _, detalhe in violacoes)
+    if modo == "erro":
+        raise OrcamentoSQLExcedido(mensagem)
+    logger.warning("Orcamento SQL excedido em %s", mensagem)
+
+
+def orcamento_sql(maximo: Optional[int] = None, repeticoes: Optional[int] = None):
+    """
+    Dependency que limita os comandos SQL da rota a maximo (None: sem
+    limite) e um mesmo SELECT a repeticoes execucoes (None: o padrao).
+    """
+    async def contar(request: Request):
+        if ORCAMENTO_SQL == "desligado":
+            yield None
+            return
+        atual = contagem_atual.get()
+        if atual is not None:
+            # Ja existe a contagem aberta pela dependency do app
+            atual.declarar(maximo, repeticoes)
+            yield atual
+            return
+
+        contagem = ContagemSQL(maximo, repeticoes)
+        token = contagem_atual.set(contagem)
+        try:
+            yield contagem
+        finally:
+            contagem_atual.reset(token)
+        verificar(contagem, request.method, request.scope["route"].path)
+
+    return Depends(contar)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _contar_comando(conn, cursor, statement, parameters, context, executemany):
+    contagem = contagem_atual.get()
+    if contagem is not None:
+        contagem.registrar(statement)
+
+
+@contextmanager
+def contar_na_conexao(conexao, contagem: ContagemSQL, metodo: str, rota: str):
+    """
+    Conta os comandos executados na conexao dentro do bloco e verifica a
+    contagem ao final; se o bloco for interrompido, nao verifica.
+    """
+    if ORCAMENTO_SQL == "desligado":
+        yield contagem
+        return
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        contagem.registrar(statement)
+
+    event.listen(conexao, "before_cursor_execute", registrar)
+    try:
+        yield contagem
+    finally:
+        event.remove(conexao, "before_cursor_execute", registrar)
+    verificar(contagem, metodo, rota)
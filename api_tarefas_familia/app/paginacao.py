@@ -0,0 +1,110 @@
+"""
+Paginacao por chave (keyset/cursor) para os endpoints de listagem.
+
+O cursor e opaco para o cliente: JSON com a chave do ultimo item da pagina,
+codificado em base64. A proxima pagina vem no cabecalho X-Next-Cursor e e
+pedida de volta com ?cursor=...; skip/limit continuam funcionando.
+"""
+import base64
+import binascii
+import heapq
+import json
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+CABECALHO_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(chave: dict) -> str:
+    """Codifica a chave do ultimo item em um cursor opaco"""
+    texto = json.dumps(chave, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> dict:
+    """Decodifica um cursor gerado por codificar_cursor"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        chave = json.loads(texto)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor invalido")
+    if not isinstance(chave, dict):
+        raise HTTPException(status_code=400, detail="Cursor invalido")
+    return chave
+
+
+def paginar_por_id(query, coluna_id, cursor, skip, limit):
+    """
+    Pagina a consulta pela chave primaria em ordem crescente.
+    Retorna (itens, next_cursor); next_cursor e None na ultima pagina.
+    """
+    query = query.order_by(coluna_id)
+    if cursor:
+        try:
+            ultimo_id = int(decodificar_cursor(cursor)["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor invalido")
+        query = query.filter(coluna_id > ultimo_id)
+    else:
+        query = query.offset(skip)
+
+    itens = query.limit(limit).all()
+    next_cursor = None
+    if limit and len(itens) == limit:
+        next_cursor = codificar_cursor({"id": getattr(itens[-1], coluna_id.key)})
+    return itens, next_cursor
+
+
+def paginar_por_data_id(query, coluna_data, coluna_id, cursor, limit):
+    """
+    Pagina a consulta por (data, id) em ordem decrescente, como o historico.
+    Sem cursor e sem limit retorna tudo. Retorna (itens, next_cursor).
+    """
+    query = query.order_by(coluna_data.desc(), coluna_id.desc())
+    if cursor:
+        chave = decodificar_cursor(cursor)
+        try:
+            ultima_data = date.fromisoformat(chave["data"])
+            ultimo_id = int(chave["id"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Cursor invalido")
+        query = query.filter(or_(
+            coluna_data < ultima_data,
+            and_(coluna_data == ultima_data, coluna_id < ultimo_id)
+        ))
+        limit = limit or 100
+
+    if limit:
+        query = query.limit(limit)
+    itens = query.all()
+    next_cursor = None
+    if limit and len(itens) == limit:
+        ultimo = itens[-1]
+        next_cursor = codificar_cursor({"data": ultimo.data.isoformat(), "id": ultimo.id})
+    return itens, next_cursor
+
+
+def paginar_por_data_id_em_tabelas(consultas, cursor, limit):
+    """
+    Pagina por (data, id) decrescente a uniao de varias consultas, como o
+    historico na tabela quente e no arquivo. Cada consulta recebe o mesmo
+    cursor e limit; os resultados sao intercalados. consultas e uma lista de
+    (query, coluna_data, coluna_id). Retorna (itens, next_cursor).
+    """
+    partes = [
+        paginar_por_data_id(query, coluna_data, coluna_id, cursor, limit)[0]
+        for query, coluna_data, coluna_id in consultas
+    ]
+    itens = list(heapq.merge(*partes, key=lambda item: (item.data, item.id), reverse=True))
+    if cursor:
+        limit = limit or 100
+
+    next_cursor = None
+    if limit:
+        itens = itens[:limit]
+        if len(itens) == limit:
+            ultimo = itens[-1]
+            next_cursor = codificar_cursor({"data": ultimo.data.isoformat(), "id": ultimo.id})
+    return itens, next_cursor
@@ -0,0 +1,88 @@
+"""
+Manutencao do resumo de conclusoes (tarefa_conclusao_resumo).
+
+Os handlers que gravam ou removem conclusoes chamam atualizar_resumo na
+mesma transacao: as chaves (dia, dono, tarefa) das atribuicoes afetadas sao
+recalculadas a partir de tarefa_conclusao_diaria com um INSERT ... SELECT
+por origem. O recalculo e idempotente, entao conclusoes ignoradas por
+duplicidade nao desalinham o resumo. reconstruir_resumo refaz o resumo de um
+intervalo a partir do historico (backfill), incluindo o arquivo.
+"""
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import String, and_, cast, delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.lote import inserir_selecao_ou_atualizar
+from app.models.tarefa_conclusao_arquivo import TarefaConclusaoArquivo
+from app.models.tarefa_conclusao_diaria import TarefaConclusaoDiaria
+from app.models.tarefa_conclusao_resumo import TarefaConclusaoResumo
+from app.models.tarefa_email import TarefaEmail
+from app.models.tarefa_usuario import TarefaUsuario
+
+COLUNAS = ["data", "origem", "dono", "Tarefa_idTarefa", "concluidas"]
+
+# (origem, modelo da atribuicao, coluna do dono, coluna da conclusao)
+ORIGENS = (
+    ("usuario", TarefaUsuario, TarefaUsuario.usuario_idUsuario, TarefaConclusaoDiaria.tarefa_usuario_id),
+    ("email", TarefaEmail, TarefaEmail.email, TarefaConclusaoDiaria.tarefa_email_id),
+)
+
+
+def atualizar_resumo(db: Session, dia: date, tarefa_usuario_ids: Iterable[int] = (), tarefa_email_ids: Iterable[int] = ()):
+    """Recalcula, sem commit, o resumo do dia para os donos e tarefas das atribuicoes"""
+    db.flush()
+    for (origem, modelo, coluna_dono, coluna_conclusao), ids in zip(ORIGENS, (tarefa_usuario_ids, tarefa_email_ids)):
+        ids = list(ids)
+        if not ids:
+            continue
+        afetadas = select(modelo.id).where(modelo.id.in_(ids))
+        selecao = select(
+            literal(dia),
+            literal(origem),
+            cast(coluna_dono, String(100)),
+            modelo.Tarefa_idTarefa,
+            func.count(TarefaConclusaoDiaria.id),
+        ).select_from(modelo).outerjoin(TarefaConclusaoDiaria, and_(
+            coluna_conclusao == modelo.id,
+            TarefaConclusaoDiaria.data == dia
+        )).where(
+            coluna_dono.in_(select(coluna_dono).where(modelo.id.in_(afetadas))),
+            modelo.Tarefa_idTarefa.in_(select(modelo.Tarefa_idTarefa).where(modelo.id.in_(afetadas))),
+        ).group_by(coluna_dono, modelo.Tarefa_idTarefa)
+        inserir_selecao_ou_atualizar(db, TarefaConclusaoResumo, COLUNAS, selecao, ["concluidas"])
+
+
+def reconstruir_resumo(db: Session, inicio: Optional[date] = None, fim: Optional[date] = None) -> int:
+    """Refaz, sem commit, o resumo do intervalo a partir do historico. Retorna as linhas gravadas"""
+    filtros = []
+    if inicio:
+        filtros.append(TarefaConclusaoResumo.data >= inicio)
+    if fim:
+        filtros.append(TarefaConclusaoResumo.data <= fim)
+    db.execute(delete(TarefaConclusaoResumo).where(*filtros))
+
+    total = 0
+    for origem, modelo, coluna_dono, _ in ORIGENS:
+        # Conclusoes da tabela quente e do arquivo; os dias nao se repetem entre as duas
+        coluna_id = "tarefa_usuario_id" if origem == "usuario" else "tarefa_email_id"
+        historico = union_all(*(
+            select(tabela.data, getattr(tabela, coluna_id).label("atribuicao_id"))
+            for tabela in (TarefaConclusaoDiaria, TarefaConclusaoArquivo)
+        )).subquery()
+        selecao = select(
+            historico.c.data,
+            literal(origem),
+            cast(coluna_dono, String(100)),
+            modelo.Tarefa_idTarefa,
+            func.count(),
+        ).join(modelo, historico.c.atribuicao_id == modelo.id).group_by(
+            historico.c.data, coluna_dono, modelo.Tarefa_idTarefa
+        )
+        if inicio:
+            selecao = selecao.where(historico.c.data >= inicio)
+        if fim:
+            selecao = selecao.where(historico.c.data <= fim)
+        total += db.execute(insert(TarefaConclusaoResumo).from_select(COLUNAS, selecao)).rowcount
+    return total
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.cache import cache_categorias
 from app.database import get_db
+from app.paginacao import CABECALHO_CURSOR, paginar_por_id
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
 
@@ -10,18 +12,35 @@ router = APIRouter(prefix="/categorias", tags=["Categorias"])
 
 
 @router.get("/", response_model=List[CategoryResponse])
-def listar_categorias(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista todas as categorias"""
-    categorias = db.query(Category).offset(skip).limit(limit).all()
+def listar_categorias(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista todas as categorias. Use o cabecalho X-Next-Cursor como ?cursor= para a proxima pagina"""
+    def carregar():
+        itens, next_cursor = paginar_por_id(db.query(Category), Category.category_id, cursor, skip, limit)
+        return [CategoryResponse.model_validate(i) for i in itens], next_cursor
+
+    categorias, next_cursor = cache_categorias.obter_ou_carregar(("listar", skip, limit, cursor), carregar)
+    if next_cursor:
+        response.headers[CABECALHO_CURSOR] = next_cursor
     return categorias
 
 
 @router.get("/{categoria_id}", response_model=CategoryResponse)
 def obter_categoria(categoria_id: int, db: Session = Depends(get_db)):
     """Obtém uma categoria pelo ID"""
-    categoria = db.query(Category).filter(Category.category_id == categoria_id).first()
-    if not categoria:
-        raise HTTPException(status_code=404, detail="Categoria não encontrada")
+    categoria = cache_categorias.obter(("obter", categoria_id))
+    if categoria is None:
+        geracao = cache_categorias.geracao
+        db_categoria = db.query(Category).filter(Category.category_id == categoria_id).first()
+        if not db_categoria:
+            raise HTTPException(status_code=404, detail="Categoria não encontrada")
+        categoria = CategoryResponse.model_validate(db_categoria)
+        cache_categorias.guardar(("obter", categoria_id), categoria, geracao)
     return categoria
 
 
@@ -31,6 +50,7 @@ def criar_categoria(categoria: CategoryCreate, db: Session = Depends(get_db)):
     db_categoria = Category(**categoria.model_dump())
     db.add(db_categoria)
     db.commit()
+    cache_categorias.invalidar()
     db.refresh(db_categoria)
     return db_categoria
 
@@ -47,6 +67,7 @@ def atualizar_categoria(categoria_id: int, categoria: CategoryUpdate, db: Sessio
         setattr(db_categoria, key, value)
 
     db.commit()
+    cache_categorias.invalidar()
     db.refresh(db_categoria)
     return db_categoria
 
@@ -60,4 +81,5 @@ def deletar_categoria(categoria_id: int, db: Session = Depends(get_db)):
 
     db.delete(db_categoria)
     db.commit()
+    cache_categorias.invalidar()
     return None
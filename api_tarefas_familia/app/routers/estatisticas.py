@@ -0,0 +1,217 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from datetime import date, timedelta
+
+from app.cache import tarefas_por_id
+from app.database import Executor, get_db_executor
+from app.orcamento_sql import orcamento_sql
+from app.models.tarefa_email import TarefaEmail
+from app.models.tarefa_usuario import TarefaUsuario
+from app.models.usuario import Usuario
+from app.models.tarefa_conclusao_resumo import TarefaConclusaoResumo
+from app.schemas.estatisticas import EstatisticasResponse
+
+router = APIRouter(prefix="/tarefas-dia", tags=["Estatisticas"])
+
+# Maior intervalo aceito, em dias
+MAX_DIAS = 366
+
+# Atribuicoes por usuario e por email
+ORIGENS = (
+    ("usuario", TarefaUsuario),
+    ("email", TarefaEmail),
+)
+
+
+@router.get("/estatisticas", response_model=EstatisticasResponse, dependencies=[orcamento_sql(3)])
+async def estatisticas_conclusoes(
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    agrupar: Literal["dia", "membro", "tarefa"] = "dia",
+    db: Executor = Depends(get_db_executor)
+):
+    """
+    Conclusoes, taxa de conclusao e sequencias de dias completos no intervalo
+    (padrao: ultimos 30 dias), agrupadas por dia, por membro ou por tarefa.
+    As contagens vem do resumo diario (tarefa_conclusao_resumo) com GROUP BY no
+    banco. Toda atribuicao atual conta como uma tarefa por dia; um dia e
+    completo quando todas foram concluidas.
+    """
+    fim = data_fim or date.today()
+    inicio = data_inicio or fim - timedelta(days=29)
+    if inicio > fim:
+        raise HTTPException(status_code=400, detail="data_inicio deve ser anterior a data_fim")
+    if (fim - inicio).days + 1 > MAX_DIAS:
+        raise HTTPException(status_code=400, detail=f"Intervalo maximo de {MAX_DIAS} dias")
+    return await db.run(_estatisticas_conclusoes, inicio, fim, agrupar)
+
+
+def _chave(agrupar: str, origem: str, modelo):
+    """Colunas (chave_id, chave_email) do grupo e as colunas do GROUP BY"""
+    if agrupar == "membro" and origem == "usuario":
+        return [modelo.usuario_idUsuario.label("chave_id"), null().label("chave_email")], [modelo.usuario_idUsuario]
+    if agrupar == "membro":
+        return [null().label("chave_id"), modelo.email.label("chave_email")], [modelo.email]
+    if agrupar == "tarefa":
+        return [modelo.Tarefa_idTarefa.label("chave_id"), null().label("chave_email")], [modelo.Tarefa_idTarefa]
+    return [null().label("chave_id"), null().label("chave_email")], []
+
+
+def _grupo(agrupar: str, linha):
+    if agrupar == "membro":
+        return (linha.origem, linha.chave_id if linha.origem == "usuario" else linha.chave_email)
+    if agrupar == "tarefa":
+        return ("tarefa", linha.chave_id)
+    return ("familia", None)
+
+
+def _atribuidas_por_grupo(db: Session, agrupar: str):
+    """Atribuicoes atuais (tarefas por dia) de cada grupo"""
+    consultas = []
+    for origem, modelo in ORIGENS:
+        colunas, agrupamento = _chave(agrupar, origem, modelo)
+        consultas.append(
+            select(literal(origem).label("origem"), *colunas, func.count(modelo.id).label("total"))
+            .group_by(*agrupamento)
+        )
+    atribuidas = {}
+    for linha in db.execute(union_all(*consultas)):
+        grupo = _grupo(agrupar, linha)
+        atribuidas[grupo] = atribuidas.get(grupo, 0) + linha.total
+    return atribuidas
+
+
+def _concluidas_por_grupo_e_dia(db: Session, agrupar: str, inicio: date, fim: date):
+    """Conclusoes no intervalo por (grupo, dia), lidas do resumo diario"""
+    resumo = TarefaConclusaoResumo
+    if agrupar == "membro":
+        colunas = [resumo.origem, resumo.dono]
+    elif agrupar == "tarefa":
+        colunas = [resumo.Tarefa_idTarefa]
+    else:
+        colunas = []
+    linhas = db.execute(
+        select(*colunas, resumo.data, func.sum(resumo.concluidas).label("total"))
+        .where(resumo.data.between(inicio, fim))
+        .group_by(*colunas, resumo.data)
+    )
+
+    concluidas = {}
+    for linha in linhas:
+        if agrupar == "membro":
+            grupo = (linha.origem, int(linha.dono) if linha.origem == "usuario" else linha.dono)
+        elif agrupar == "tarefa":
+            grupo = ("tarefa", linha.Tarefa_idTarefa)
+        else:
+            grupo = ("familia", None)
+        por_dia = concluidas.setdefault(grupo, {})
+        por_dia[linha.data] = por_dia.get(linha.data, 0) + int(linha.total)
+    return concluidas
+
+
+def _sequencias(por_dia: dict, atribuidas_dia: int, inicio: date, fim: date):
+    """(sequencia atual, maior sequencia) de dias com todas as tarefas concluidas"""
+    if not atribuidas_dia:
+        return 0, 0
+    completos = {dia for dia, total in por_dia.items() if total >= atribuidas_dia}
+
+    maior = corrente = 0
+    dia = inicio
+    while dia <= fim:
+        corrente = corrente + 1 if dia in completos else 0
+        maior = max(maior, corrente)
+        dia += timedelta(days=1)
+
+    # O dia de hoje ainda em andamento nao interrompe a sequencia
+    dia = fim - timedelta(days=1) if fim == date.today() and fim not in completos else fim
+    atual = 0
+    while dia >= inicio and dia in completos:
+        atual += 1
+        dia -= timedelta(days=1)
+    return atual, maior
+
+
+def _taxa(concluidas: int, atribuidas: int) -> float:
+    return round(concluidas / atribuidas, 4) if atribuidas else 0.0
+
+
+def _nomes_dos_membros(db: Session, grupos):
+    ids = [chave for origem, chave in grupos if origem == "usuario"]
+    emails = [chave for origem, chave in grupos if origem == "email"]
+    if not ids and not emails:
+        return {}
+    nomes = {}
+    for usuario in db.execute(
+        select(Usuario.idUsuario, Usuario.email, Usuario.Nome)
+        .where(or_(Usuario.idUsuario.in_(ids), Usuario.email.in_(emails)))
+    ):
+        nomes[("usuario", usuario.idUsuario)] = usuario.Nome
+        nomes.setdefault(("email", usuario.email), usuario.Nome)
+    return nomes
+
+
+def _estatisticas_conclusoes(db: Session, inicio: date, fim: date, agrupar: str):
+    dias = (fim - inicio).days + 1
+    atribuidas = _atribuidas_por_grupo(db, agrupar)
+    concluidas = _concluidas_por_grupo_e_dia(db, agrupar, inicio, fim)
+
+    # Totais e sequencias da familia inteira
+    por_dia_familia = {}
+    for por_dia in concluidas.values():
+        for dia, total in por_dia.items():
+            por_dia_familia[dia] = por_dia_familia.get(dia, 0) + total
+    atribuidas_dia_familia = sum(atribuidas.values())
+    total_concluidas = sum(por_dia_familia.values())
+    atual, maior = _sequencias(por_dia_familia, atribuidas_dia_familia, inicio, fim)
+
+    grupos = []
+    if agrupar == "dia":
+        for i in range(dias):
+            dia = inicio + timedelta(days=i)
+            total = por_dia_familia.get(dia, 0)
+            grupos.append({
+                "data": dia,
+                "concluidas": total,
+                "atribuidas": atribuidas_dia_familia,
+                "taxa_conclusao": _taxa(total, atribuidas_dia_familia),
+            })
+    else:
+        chaves = sorted(set(atribuidas) | set(concluidas), key=lambda g: (g[0], str(g[1])))
+        if agrupar == "membro":
+            nomes = _nomes_dos_membros(db, chaves)
+        else:
+            tarefas = tarefas_por_id(db, [chave for _, chave in chaves])
+        for grupo in chaves:
+            origem, chave = grupo
+            por_dia = concluidas.get(grupo, {})
+            atribuidas_dia = atribuidas.get(grupo, 0)
+            total = sum(por_dia.values())
+            atual_grupo, maior_grupo = _sequencias(por_dia, atribuidas_dia, inicio, fim)
+            item = {
+                "concluidas": total,
+                "atribuidas": atribuidas_dia * dias,
+                "taxa_conclusao": _taxa(total, atribuidas_dia * dias),
+                "sequencia_atual": atual_grupo,
+                "maior_sequencia": maior_grupo,
+            }
+            if agrupar == "membro":
+                item["usuario_idUsuario" if origem == "usuario" else "email"] = chave
+                item["Nome"] = nomes.get(grupo)
+            else:
+                item["Tarefa_idTarefa"] = chave
+                item["Tarefa_nome"] = tarefas[chave].Tarefa if chave in tarefas else None
+            grupos.append(item)
+
+    return {
+        "data_inicio": inicio,
+        "data_fim": fim,
+        "agrupar": agrupar,
+        "concluidas": total_concluidas,
+        "atribuidas": atribuidas_dia_familia * dias,
+        "taxa_conclusao": _taxa(total_concluidas, atribuidas_dia_familia * dias),
+        "sequencia_atual": atual,
+        "maior_sequencia": maior,
+        "grupos": grupos,
+    }
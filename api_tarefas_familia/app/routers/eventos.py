@@ -0,0 +1,51 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from app.eventos import barramento
+
+router = APIRouter(prefix="/tarefas-dia", tags=["Eventos"])
+
+# Segundos sem eventos ate enviar um comentario de keepalive (menor que o
+# timeout de leitura do proxy/ingress)
+INTERVALO_PING = 15
+
+# Espera sugerida ao cliente antes de reconectar, em milissegundos
+RECONEXAO_MS = 3000
+
+
+@router.get("/stream")
+async def stream_eventos(email: Optional[str] = None, usuario_id: Optional[int] = None):
+    """
+    Server-Sent Events com as mudancas das tarefas do dia, no lugar de
+    consultar /tarefas-dia/* periodicamente. Sem filtros recebe os eventos da
+    familia inteira; com email ou usuario_id, so os daquele membro.
+    Eventos: conclusao (acao concluida/desfeita) e atribuicao (acao
+    criada/atualizada/concluida/removida), com origem, dono e ids.
+    """
+    canais = []
+    if email is not None:
+        canais.append(f"email:{email}")
+    if usuario_id is not None:
+        canais.append(f"usuario:{usuario_id}")
+    return StreamingResponse(
+        gerar_eventos(canais or ["familia"]),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def gerar_eventos(canais: List[str]) -> AsyncIterator[str]:
+    """Mensagens SSE da assinatura; a assinatura e cancelada quando o cliente desconecta"""
+    assinatura = barramento.assinar(canais)
+    try:
+        yield f"retry: {RECONEXAO_MS}\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(assinatura.fila.get(), INTERVALO_PING)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+    finally:
+        barramento.cancelar(assinatura)
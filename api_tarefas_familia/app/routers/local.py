@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.cache import cache_locais, cache_tarefas
 from app.database import get_db
+from app.paginacao import CABECALHO_CURSOR, paginar_por_id
 from app.models.local import Local
 from app.schemas.local import LocalCreate, LocalUpdate, LocalResponse
 
@@ -10,18 +12,35 @@ router = APIRouter(prefix="/locais", tags=["Locais"])
 
 
 @router.get("/", response_model=List[LocalResponse])
-def listar_locais(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista todos os locais"""
-    locais = db.query(Local).offset(skip).limit(limit).all()
+def listar_locais(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista todos os locais. Use o cabecalho X-Next-Cursor como ?cursor= para a proxima pagina"""
+    def carregar():
+        itens, next_cursor = paginar_por_id(db.query(Local), Local.idLocal, cursor, skip, limit)
+        return [LocalResponse.model_validate(i) for i in itens], next_cursor
+
+    locais, next_cursor = cache_locais.obter_ou_carregar(("listar", skip, limit, cursor), carregar)
+    if next_cursor:
+        response.headers[CABECALHO_CURSOR] = next_cursor
     return locais
 
 
 @router.get("/{local_id}", response_model=LocalResponse)
 def obter_local(local_id: int, db: Session = Depends(get_db)):
     """Obtém um local pelo ID"""
-    local = db.query(Local).filter(Local.idLocal == local_id).first()
-    if not local:
-        raise HTTPException(status_code=404, detail="Local não encontrado")
+    local = cache_locais.obter(("obter", local_id))
+    if local is None:
+        geracao = cache_locais.geracao
+        db_local = db.query(Local).filter(Local.idLocal == local_id).first()
+        if not db_local:
+            raise HTTPException(status_code=404, detail="Local não encontrado")
+        local = LocalResponse.model_validate(db_local)
+        cache_locais.guardar(("obter", local_id), local, geracao)
     return local
 
 
@@ -31,6 +50,7 @@ def criar_local(local: LocalCreate, db: Session = Depends(get_db)):
     db_local = Local(**local.model_dump())
     db.add(db_local)
     db.commit()
+    cache_locais.invalidar()
     db.refresh(db_local)
     return db_local
 
@@ -47,6 +67,7 @@ def atualizar_local(local_id: int, local: LocalUpdate, db: Session = Depends(get
         setattr(db_local, key, value)
 
     db.commit()
+    cache_locais.invalidar()
     db.refresh(db_local)
     return db_local
 
@@ -60,4 +81,7 @@ def deletar_local(local_id: int, db: Session = Depends(get_db)):
 
     db.delete(db_local)
     db.commit()
+    cache_locais.invalidar()
+    # As tarefas do local ficam sem local (ON DELETE SET NULL)
+    cache_tarefas.invalidar()
     return None
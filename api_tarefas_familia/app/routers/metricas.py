@@ -0,0 +1,99 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import database
+from app.cache import CACHES
+from app.limites import limite_requisicoes
+from app.orcamento_sql import violacoes_por_rota
+from app.routers.tarefa_conclusao_diaria import conclusoes_em_grupo
+from app.singleflight import SINGLEFLIGHTS
+from app.telemetria import coletor
+
+router = APIRouter(prefix="/metrics", tags=["Metricas"])
+
+
+@router.get("", response_class=PlainTextResponse)
+def metricas_prometheus():
+    """
+    Metricas no formato de texto do Prometheus: requisicoes por rota e
+    status, histogramas de duracao e de comandos SQL por requisicao, tempo
+    de SQL, espera por conexao, o estado do pool e dos limites e as
+    violacoes do orcamento de SQL.
+    """
+    pools = [("sync", database.metricas_pool, database.engine.pool)]
+    if database.DB_ASYNC:
+        pools.append(("async", database.metricas_pool_async, database.get_async_engine().sync_engine.pool))
+    resumos = [({"engine": nome}, metricas.resumo(pool)) for nome, metricas, pool in pools]
+    regras = limite_requisicoes.estatisticas()["regras"]
+    admissao = database.admissao_db.estatisticas()
+    extras = [
+        ("api_pool_conexoes_em_uso", "gauge", "Conexoes do pool em uso",
+         [(rotulos, r["em_uso"]) for rotulos, r in resumos]),
+        ("api_pool_aguardando", "gauge", "Requisicoes esperando conexao do pool",
+         [(rotulos, r["aguardando"]) for rotulos, r in resumos]),
+        ("api_pool_checkouts_total", "counter", "Conexoes entregues pelo pool",
+         [(rotulos, r["checkouts"]) for rotulos, r in resumos]),
+        ("api_pool_timeouts_total", "counter", "Checkouts que estouraram o DB_POOL_TIMEOUT",
+         [(rotulos, r["timeouts"]) for rotulos, r in resumos]),
+        ("api_limite_rejeitadas_total", "counter", "Requisicoes rejeitadas com 429 por regra",
+         [({"regra": rota}, regra["rejeitadas"]) for rota, regra in sorted(regras.items())]),
+        ("api_admissao_db_em_uso", "gauge", "Vagas de acesso ao banco em uso", [({}, admissao["em_uso"])]),
+        ("api_admissao_db_rejeitadas_total", "counter", "Requisicoes rejeitadas com 503 sem vaga no banco",
+         [({}, admissao["rejeitadas"])]),
+        ("api_orcamento_sql_violacoes_total", "counter", "Requisicoes acima do orcamento de SQL ou com SELECT repetido (N+1)",
+         [({"metodo": metodo, "rota": rota, "tipo": tipo}, valor)
+          for (metodo, rota, tipo), valor in sorted(violacoes_por_rota.items())]),
+    ]
+    return PlainTextResponse(coletor.exportar(extras), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/pool")
+def metricas_pool():
+    """
+    Estado do pool de conexoes: conexoes em uso, overflow, requisicoes
+    aguardando conexao, tempo de espera no checkout e timeouts.
+    """
+    return {
+        "config": {
+            "pool_size": database.POOL_CONFIG["pool_size"],
+            "max_overflow": database.POOL_CONFIG["max_overflow"],
+            "pool_timeout": database.POOL_CONFIG["pool_timeout"],
+            "pool_recycle": database.POOL_CONFIG["pool_recycle"],
+            "pool_pre_ping": database.POOL_CONFIG["pool_pre_ping"],
+        },
+        "sync": database.metricas_pool.resumo(database.engine.pool),
+        "async": (
+            database.metricas_pool_async.resumo(database.get_async_engine().sync_engine.pool)
+            if database.DB_ASYNC else None
+        ),
+    }
+
+
+@router.get("/cache")
+def metricas_cache():
+    """Acertos, falhas e ocupacao dos caches de Local, Category e Tarefa"""
+    return {c.nome: c.estatisticas() for c in CACHES}
+
+
+@router.get("/singleflight")
+def metricas_singleflight():
+    """Leituras executadas e leituras coalescidas (que reaproveitaram uma carga em andamento)"""
+    return {s.nome: s.estatisticas() for s in SINGLEFLIGHTS}
+
+
+@router.get("/limites")
+def metricas_limites():
+    """
+    Requisicoes permitidas e rejeitadas (429) por regra de limite, e vagas
+    de acesso ao banco: em uso, aguardando, admitidas e rejeitadas (503).
+    """
+    return {
+        "requisicoes": limite_requisicoes.estatisticas(),
+        "db": database.admissao_db.estatisticas(),
+    }
+
+
+@router.get("/commit-grupo")
+def metricas_commit_grupo():
+    """Grupos gravados pelo commit em grupo das conclusoes e pedidos por grupo"""
+    return {conclusoes_em_grupo.nome: conclusoes_em_grupo.estatisticas()}
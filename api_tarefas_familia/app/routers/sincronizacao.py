@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import Executor, get_db_executor
+from app.orcamento_sql import orcamento_sql
+from app.sincronizacao import SINCRONIZADOS, ler_alteracoes
+from app.schemas.sincronizacao import MAX_ALTERACOES_SYNC, SyncResponse
+
+router = APIRouter(prefix="/sync", tags=["Sincronizacao"])
+
+
+# Uma leitura do registro e um SELECT ... IN por tabela sincronizada alterada
+@router.get("", response_model=SyncResponse, dependencies=[orcamento_sql(1 + len(SINCRONIZADOS))])
+async def sincronizar(
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=MAX_ALTERACOES_SYNC),
+    db: Executor = Depends(get_db_executor)
+):
+    """
+    Sincronizacao incremental: locais, categorias, tarefas, atribuicoes e
+    conclusoes criados, alterados ou removidos depois da versao since.
+    since=0 traz a base inteira. Guarde a versao da resposta e envie como
+    since na proxima chamada; enquanto mais for true, chame de novo em seguida.
+    """
+    return await db.run(_sincronizar, since, limit)
+
+
+def _sincronizar(db: Session, since: int, limit: int):
+    return ler_alteracoes(db, since, limit)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
+from app.cache import cache_tarefas
 from app.database import get_db
+from app.paginacao import CABECALHO_CURSOR, paginar_por_id
 from app.models.tarefa import Tarefa
 from app.schemas.tarefa import TarefaCreate, TarefaUpdate, TarefaResponse
 
@@ -10,26 +12,48 @@ router = APIRouter(prefix="/tarefas", tags=["Tarefas"])
 
 
 @router.get("/", response_model=List[TarefaResponse])
-def listar_tarefas(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista todas as tarefas"""
-    tarefas = db.query(Tarefa).offset(skip).limit(limit).all()
+def listar_tarefas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista todas as tarefas. Use o cabecalho X-Next-Cursor como ?cursor= para a proxima pagina"""
+    def carregar():
+        itens, next_cursor = paginar_por_id(db.query(Tarefa), Tarefa.idTarefa, cursor, skip, limit)
+        return [TarefaResponse.model_validate(i) for i in itens], next_cursor
+
+    tarefas, next_cursor = cache_tarefas.obter_ou_carregar(("listar", skip, limit, cursor), carregar)
+    if next_cursor:
+        response.headers[CABECALHO_CURSOR] = next_cursor
     return tarefas
 
 
 @router.get("/{tarefa_id}", response_model=TarefaResponse)
 def obter_tarefa(tarefa_id: int, db: Session = Depends(get_db)):
     """Obtém uma tarefa pelo ID"""
-    tarefa = db.query(Tarefa).filter(Tarefa.idTarefa == tarefa_id).first()
-    if not tarefa:
-        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    tarefa = cache_tarefas.obter(("obter", tarefa_id))
+    if tarefa is None:
+        geracao = cache_tarefas.geracao
+        db_tarefa = db.query(Tarefa).filter(Tarefa.idTarefa == tarefa_id).first()
+        if not db_tarefa:
+            raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+        tarefa = TarefaResponse.model_validate(db_tarefa)
+        cache_tarefas.guardar(("obter", tarefa_id), tarefa, geracao)
     return tarefa
 
 
 @router.get("/local/{local_id}", response_model=List[TarefaResponse])
 def listar_tarefas_por_local(local_id: int, db: Session = Depends(get_db)):
     """Lista todas as tarefas de um local específico"""
-    tarefas = db.query(Tarefa).filter(Tarefa.Local_idLocal == local_id).all()
-    return tarefas
+    return cache_tarefas.obter_ou_carregar(
+        ("local", local_id),
+        lambda: [
+            TarefaResponse.model_validate(t)
+            for t in db.query(Tarefa).filter(Tarefa.Local_idLocal == local_id).all()
+        ]
+    )
 
 
 @router.post("/", response_model=TarefaResponse, status_code=status.HTTP_201_CREATED)
@@ -38,6 +62,7 @@ def criar_tarefa(tarefa: TarefaCreate, db: Session = Depends(get_db)):
     db_tarefa = Tarefa(**tarefa.model_dump())
     db.add(db_tarefa)
     db.commit()
+    cache_tarefas.invalidar()
     db.refresh(db_tarefa)
     return db_tarefa
 
@@ -54,6 +79,7 @@ def atualizar_tarefa(tarefa_id: int, tarefa: TarefaUpdate, db: Session = Depends
         setattr(db_tarefa, key, value)
 
     db.commit()
+    cache_tarefas.invalidar()
     db.refresh(db_tarefa)
     return db_tarefa
 
@@ -67,4 +93,5 @@ def deletar_tarefa(tarefa_id: int, db: Session = Depends(get_db)):
 
     db.delete(db_tarefa)
     db.commit()
+    cache_tarefas.invalidar()
     return None
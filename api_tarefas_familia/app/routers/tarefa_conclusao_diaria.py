@@ -1,98 +1,180 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import and_, delete, insert, literal, null, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import date, datetime
 
-from app.database import get_db
+from app.cache import tarefas_por_id
+from app.commit_em_grupo import CommitEmGrupo
+from app.database import Executor, get_db_executor, get_session_factory
+from app.etag import etag_do_corpo, resposta_json_com_etag
+from app.eventos import notificar_conclusoes
+from app.exportacao import exportar
+from app.lote import ids_existentes, inserir_ignorando_duplicados
+from app.orcamento_sql import orcamento_sql
+from app.resumo import atualizar_resumo
+from app.serializacao import Serializador
+from app.sincronizacao import registrar_alteracoes, registrar_alteracoes_onde
+from app.singleflight import chave_da_requisicao, leituras_tarefas_dia
+from app.paginacao import CABECALHO_CURSOR, paginar_por_data_id_em_tabelas
+from app.models.tarefa import Tarefa
 from app.models.tarefa_email import TarefaEmail
 from app.models.tarefa_usuario import TarefaUsuario
-from app.models.tarefa import Tarefa
 from app.models.usuario import Usuario
 from app.models.tarefa_conclusao_diaria import TarefaConclusaoDiaria
+from app.models.tarefa_conclusao_arquivo import TarefaConclusaoArquivo
 from app.schemas.tarefa_conclusao_diaria import (
     TarefaDoDiaResponse,
     TarefaDoDiaUsuarioResponse,
     ConclusaoDiariaResponse,
     HistoricoConclusaoResponse,
+    FamiliaDoDiaResponse,
+    ConclusaoLoteRequest,
+    ConclusaoLoteResponse,
 )
 
 router = APIRouter(prefix="/tarefas-dia", tags=["Tarefas-Dia"])
 
+# Serializacao das leituras (sem a segunda validacao pelo response_model)
+TAREFAS_DO_DIA = Serializador(List[TarefaDoDiaResponse])
+TAREFAS_DO_DIA_USUARIO = Serializador(List[TarefaDoDiaUsuarioResponse])
+FAMILIA_DO_DIA = Serializador(FamiliaDoDiaResponse)
+HISTORICO = Serializador(List[HistoricoConclusaoResponse])
+
+
+def _inserir_conclusao(db: Session, modelo, coluna, tarefa_id: int):
+    """
+    Conclui a tarefa hoje com um unico INSERT ... SELECT: a linha so e criada
+    se a atribuicao existir, e a chave unica uq_tarefa_*_data barra a segunda
+    conclusao do dia. O resumo do dia e atualizado na mesma transacao.
+    Retorna None se a atribuicao nao existir.
+    """
+    hoje = date.today()
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    comando = insert(TarefaConclusaoDiaria).from_select(
+        [coluna.key, "data", "data_hora_conclusao", "status"],
+        select(modelo.id, literal(hoje), literal(agora), literal(1)).where(modelo.id == tarefa_id)
+    )
+    try:
+        resultado = db.execute(comando)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Tarefa ja foi concluida hoje")
+    if not resultado.rowcount:
+        db.rollback()
+        return None
+    conclusao_id = resultado.lastrowid
+    registrar_alteracoes(db, TarefaConclusaoDiaria, [conclusao_id])
+    if modelo is TarefaUsuario:
+        ids = {"tarefa_usuario_ids": [tarefa_id]}
+    else:
+        ids = {"tarefa_email_ids": [tarefa_id]}
+    atualizar_resumo(db, hoje, **ids)
+    db.commit()
+    notificar_conclusoes(db, "concluida", hoje, **ids)
+
+    return {
+        "id": conclusao_id,
+        "tarefa_email_id": None,
+        "tarefa_usuario_id": None,
+        coluna.key: tarefa_id,
+        "data": hoje,
+        "data_hora_conclusao": agora,
+        "status": 1,
+    }
+
+
+async def _leitura_coalescida(request: Request, db: Executor, serializador: Serializador, fn, *args):
+    """
+    Roda fn uma unica vez para as requisicoes identicas concorrentes
+    (single-flight) e responde com o JSON ja serializado e o ETag dele.
+    """
+    async def carregar():
+        corpo = serializador.corpo(await db.run(fn, *args))
+        return corpo, etag_do_corpo(corpo)
+
+    corpo, etag = await leituras_tarefas_dia.executar(chave_da_requisicao(request), carregar)
+    return resposta_json_com_etag(request, corpo, etag)
+
+
+# O historico le a tabela quente e o arquivo (conclusoes antigas movidas
+# pelo job de retencao); todas as linhas do arquivo sao anteriores as da
+# tabela quente
+TABELAS_HISTORICO = (TarefaConclusaoDiaria, TarefaConclusaoArquivo)
+
 
 # ========================
 # ENDPOINTS POR EMAIL
 # ========================
 
-@router.get("/email/{email}", response_model=List[TarefaDoDiaResponse])
-def listar_tarefas_do_dia_email(email: str, db: Session = Depends(get_db)):
-    """Lista todas as tarefas do dia para um email, com status de conclusao"""
+@router.get("/email/{email}", response_model=List[TarefaDoDiaResponse], dependencies=[orcamento_sql(2)])
+async def listar_tarefas_do_dia_email(email: str, request: Request, db: Executor = Depends(get_db_executor)):
+    """
+    Lista todas as tarefas do dia para um email, com status de conclusao.
+    Responde 304 quando o If-None-Match bate com o ETag atual.
+    """
+    return await _leitura_coalescida(request, db, TAREFAS_DO_DIA, _listar_tarefas_do_dia_email, email)
+
+
+def _listar_tarefas_do_dia_email(db: Session, email: str):
     hoje = date.today()
 
+    # Uma unica consulta: a conclusao de hoje vem do LEFT OUTER JOIN,
+    # sem uma consulta extra por tarefa; nome e descricao vem do cache
     tarefas_email = db.query(
         TarefaEmail.id.label('tarefa_email_id'),
         TarefaEmail.Tarefa_idTarefa,
-        Tarefa.Tarefa.label('Tarefa_nome'),
-        Tarefa.Descricao.label('Tarefa_descricao'),
         TarefaEmail.email,
         TarefaEmail.Periodo,
-    ).join(Tarefa, TarefaEmail.Tarefa_idTarefa == Tarefa.idTarefa).filter(
+        TarefaConclusaoDiaria.id.label('conclusao_id'),
+        TarefaConclusaoDiaria.data_hora_conclusao,
+    ).outerjoin(TarefaConclusaoDiaria, and_(
+        TarefaConclusaoDiaria.tarefa_email_id == TarefaEmail.id,
+        TarefaConclusaoDiaria.data == hoje
+    )).filter(
         TarefaEmail.email == email
     ).all()
+    tarefas = tarefas_por_id(db, [t.Tarefa_idTarefa for t in tarefas_email])
 
-    resultado = []
-    for t in tarefas_email:
-        conclusao = db.query(TarefaConclusaoDiaria).filter(
-            TarefaConclusaoDiaria.tarefa_email_id == t.tarefa_email_id,
-            TarefaConclusaoDiaria.data == hoje
-        ).first()
-
-        resultado.append(TarefaDoDiaResponse(
+    return [
+        dict(
             tarefa_email_id=t.tarefa_email_id,
             Tarefa_idTarefa=t.Tarefa_idTarefa,
-            Tarefa_nome=t.Tarefa_nome,
-            Tarefa_descricao=t.Tarefa_descricao,
+            Tarefa_nome=tarefas[t.Tarefa_idTarefa].Tarefa,
+            Tarefa_descricao=tarefas[t.Tarefa_idTarefa].Descricao,
             email=t.email,
             Periodo=t.Periodo,
             data_hoje=hoje,
-            concluida=conclusao is not None,
-            data_hora_conclusao=conclusao.data_hora_conclusao if conclusao else None
-        ))
-
-    return resultado
+            concluida=t.conclusao_id is not None,
+            data_hora_conclusao=t.data_hora_conclusao
+        ) for t in tarefas_email if t.Tarefa_idTarefa in tarefas
+    ]
 
 
 @router.post("/email/{tarefa_email_id}/concluir", response_model=ConclusaoDiariaResponse, status_code=status.HTTP_201_CREATED)
-def concluir_tarefa_dia_email(tarefa_email_id: int, db: Session = Depends(get_db)):
+async def concluir_tarefa_dia_email(tarefa_email_id: int, db: Executor = Depends(get_db_executor)):
     """Marca uma tarefa (por email) como concluida no dia de hoje"""
-    tarefa_email = db.query(TarefaEmail).filter(TarefaEmail.id == tarefa_email_id).first()
-    if not tarefa_email:
-        raise HTTPException(status_code=404, detail="Tarefa email nao encontrada")
-
-    hoje = date.today()
-
-    existente = db.query(TarefaConclusaoDiaria).filter(
-        TarefaConclusaoDiaria.tarefa_email_id == tarefa_email_id,
-        TarefaConclusaoDiaria.data == hoje
-    ).first()
+    if conclusoes_em_grupo.ativo:
+        resultado = await conclusoes_em_grupo.executar(db, ("tarefa_email_id", tarefa_email_id))
+        return _conclusao_do_grupo(resultado, "Tarefa email nao encontrada")
+    return await db.run(_concluir_tarefa_dia_email, tarefa_email_id)
 
-    if existente:
-        raise HTTPException(status_code=400, detail="Tarefa ja foi concluida hoje")
 
-    conclusao = TarefaConclusaoDiaria(
-        tarefa_email_id=tarefa_email_id,
-        data=hoje,
-        data_hora_conclusao=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        status=1
-    )
-    db.add(conclusao)
-    db.commit()
-    db.refresh(conclusao)
+def _concluir_tarefa_dia_email(db: Session, tarefa_email_id: int):
+    conclusao = _inserir_conclusao(db, TarefaEmail, TarefaConclusaoDiaria.tarefa_email_id, tarefa_email_id)
+    if conclusao is None:
+        raise HTTPException(status_code=404, detail="Tarefa email nao encontrada")
     return conclusao
 
 
 @router.delete("/email/{tarefa_email_id}/desfazer", status_code=status.HTTP_204_NO_CONTENT)
-def desfazer_conclusao_dia_email(tarefa_email_id: int, db: Session = Depends(get_db)):
+async def desfazer_conclusao_dia_email(tarefa_email_id: int, db: Executor = Depends(get_db_executor)):
     """Remove a conclusao do dia para tarefa por email"""
+    return await db.run(_desfazer_conclusao_dia_email, tarefa_email_id)
+
+
+def _desfazer_conclusao_dia_email(db: Session, tarefa_email_id: int):
     hoje = date.today()
 
     conclusao = db.query(TarefaConclusaoDiaria).filter(
@@ -104,132 +186,192 @@ def desfazer_conclusao_dia_email(tarefa_email_id: int, db: Session = Depends(get
         raise HTTPException(status_code=404, detail="Nenhuma conclusao encontrada para hoje")
 
     db.delete(conclusao)
+    atualizar_resumo(db, hoje, tarefa_email_ids=[tarefa_email_id])
     db.commit()
+    notificar_conclusoes(db, "desfeita", hoje, tarefa_email_ids=[tarefa_email_id])
     return None
 
 
-@router.get("/email/{email}/historico", response_model=List[HistoricoConclusaoResponse])
-def historico_conclusoes_email(
+@router.get("/email/{email}/historico", response_model=List[HistoricoConclusaoResponse], dependencies=[orcamento_sql(3)])
+async def historico_conclusoes_email(
     email: str,
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Executor = Depends(get_db_executor)
 ):
-    """Historico de conclusoes de tarefas por email"""
-    query = db.query(
-        TarefaConclusaoDiaria.id,
-        TarefaConclusaoDiaria.tarefa_email_id,
-        Tarefa.Tarefa.label('Tarefa_nome'),
-        Tarefa.Descricao.label('Tarefa_descricao'),
-        TarefaEmail.email,
-        TarefaConclusaoDiaria.data,
-        TarefaConclusaoDiaria.data_hora_conclusao,
-        TarefaConclusaoDiaria.status,
-    ).join(TarefaEmail, TarefaConclusaoDiaria.tarefa_email_id == TarefaEmail.id
-    ).join(Tarefa, TarefaEmail.Tarefa_idTarefa == Tarefa.idTarefa
-    ).filter(TarefaEmail.email == email)
-
-    if data_inicio:
-        query = query.filter(TarefaConclusaoDiaria.data >= data_inicio)
-    if data_fim:
-        query = query.filter(TarefaConclusaoDiaria.data <= data_fim)
+    """
+    Historico de conclusoes de tarefas por email, da mais recente para a mais antiga.
+    Com limit (ou cursor) pagina por (data, id): a proxima pagina vem no cabecalho X-Next-Cursor.
+    """
+    resultado, next_cursor = await db.run(_historico_conclusoes_email, email, data_inicio, data_fim, limit, cursor)
+    return HISTORICO.resposta(resultado, headers={CABECALHO_CURSOR: next_cursor} if next_cursor else None)
 
-    query = query.order_by(TarefaConclusaoDiaria.data.desc())
 
-    resultados = query.all()
+def _historico_conclusoes_email(
+    db: Session,
+    email: str,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    limit: Optional[int],
+    cursor: Optional[str]
+):
+    resultados, next_cursor = paginar_por_data_id_em_tabelas([
+        (_query_historico_email(db, email, data_inicio, data_fim, conclusoes), conclusoes.data, conclusoes.id)
+        for conclusoes in TABELAS_HISTORICO
+    ], cursor, limit)
+    tarefas = tarefas_por_id(db, [r.Tarefa_idTarefa for r in resultados])
 
     return [
-        HistoricoConclusaoResponse(
+        dict(
             id=r.id,
             tarefa_email_id=r.tarefa_email_id,
-            Tarefa_nome=r.Tarefa_nome,
-            Tarefa_descricao=r.Tarefa_descricao,
+            tarefa_usuario_id=None,
+            Tarefa_nome=tarefas[r.Tarefa_idTarefa].Tarefa,
+            Tarefa_descricao=tarefas[r.Tarefa_idTarefa].Descricao,
             email=r.email,
+            Nome_usuario=None,
             data=r.data,
             data_hora_conclusao=r.data_hora_conclusao,
             status=r.status
-        ) for r in resultados
-    ]
+        ) for r in resultados if r.Tarefa_idTarefa in tarefas
+    ], next_cursor
+
+
+def _query_historico_email(
+    db: Session,
+    email: str,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    conclusoes=TarefaConclusaoDiaria
+):
+    query = db.query(
+        conclusoes.id,
+        conclusoes.tarefa_email_id,
+        TarefaEmail.Tarefa_idTarefa,
+        TarefaEmail.email,
+        conclusoes.data,
+        conclusoes.data_hora_conclusao,
+        conclusoes.status,
+    ).join(TarefaEmail, conclusoes.tarefa_email_id == TarefaEmail.id
+    ).filter(TarefaEmail.email == email)
+
+    if data_inicio:
+        query = query.filter(conclusoes.data >= data_inicio)
+    if data_fim:
+        query = query.filter(conclusoes.data <= data_fim)
+    return query
+
+
+CAMPOS_EXPORTACAO_EMAIL = [
+    "id", "tarefa_email_id", "Tarefa_nome", "Tarefa_descricao",
+    "email", "data", "data_hora_conclusao", "status",
+]
+
+
+@router.get("/email/{email}/historico/export")
+async def exportar_historico_email(
+    email: str,
+    request: Request,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    formato: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Exporta o historico de conclusoes por email (ndjson ou csv), da mais recente
+    para a mais antiga. As linhas sao enviadas em streaming, sem limite de intervalo.
+    """
+    def montar_queries(db: Session):
+        return [
+            _query_historico_email(db, email, data_inicio, data_fim, conclusoes).join(
+                Tarefa, TarefaEmail.Tarefa_idTarefa == Tarefa.idTarefa
+            ).add_columns(
+                Tarefa.Tarefa.label("Tarefa_nome"),
+                Tarefa.Descricao.label("Tarefa_descricao"),
+            ).order_by(conclusoes.data.desc(), conclusoes.id.desc())
+            for conclusoes in TABELAS_HISTORICO
+        ]
+
+    return await exportar(
+        request, session_factory, montar_queries, CAMPOS_EXPORTACAO_EMAIL, formato, "historico",
+        maximo_sql=len(TABELAS_HISTORICO),
+    )
 
 
 # ========================
 # ENDPOINTS POR USUARIO
 # ========================
 
-@router.get("/usuario/{usuario_id}", response_model=List[TarefaDoDiaUsuarioResponse])
-def listar_tarefas_do_dia_usuario(usuario_id: int, db: Session = Depends(get_db)):
-    """Lista todas as tarefas do dia para um usuario, com status de conclusao"""
+@router.get("/usuario/{usuario_id}", response_model=List[TarefaDoDiaUsuarioResponse], dependencies=[orcamento_sql(2)])
+async def listar_tarefas_do_dia_usuario(usuario_id: int, request: Request, db: Executor = Depends(get_db_executor)):
+    """
+    Lista todas as tarefas do dia para um usuario, com status de conclusao.
+    Responde 304 quando o If-None-Match bate com o ETag atual.
+    """
+    return await _leitura_coalescida(request, db, TAREFAS_DO_DIA_USUARIO, _listar_tarefas_do_dia_usuario, usuario_id)
+
+
+def _listar_tarefas_do_dia_usuario(db: Session, usuario_id: int):
     hoje = date.today()
 
     tarefas_usuario = db.query(
         TarefaUsuario.id.label('tarefa_usuario_id'),
         TarefaUsuario.Tarefa_idTarefa,
-        Tarefa.Tarefa.label('Tarefa_nome'),
-        Tarefa.Descricao.label('Tarefa_descricao'),
         TarefaUsuario.usuario_idUsuario,
         Usuario.Nome.label('Nome_usuario'),
         TarefaUsuario.Periodo,
-    ).join(Tarefa, TarefaUsuario.Tarefa_idTarefa == Tarefa.idTarefa
+        TarefaConclusaoDiaria.id.label('conclusao_id'),
+        TarefaConclusaoDiaria.data_hora_conclusao,
     ).join(Usuario, TarefaUsuario.usuario_idUsuario == Usuario.idUsuario
-    ).filter(
+    ).outerjoin(TarefaConclusaoDiaria, and_(
+        TarefaConclusaoDiaria.tarefa_usuario_id == TarefaUsuario.id,
+        TarefaConclusaoDiaria.data == hoje
+    )).filter(
         TarefaUsuario.usuario_idUsuario == usuario_id
     ).all()
+    tarefas = tarefas_por_id(db, [t.Tarefa_idTarefa for t in tarefas_usuario])
 
-    resultado = []
-    for t in tarefas_usuario:
-        conclusao = db.query(TarefaConclusaoDiaria).filter(
-            TarefaConclusaoDiaria.tarefa_usuario_id == t.tarefa_usuario_id,
-            TarefaConclusaoDiaria.data == hoje
-        ).first()
-
-        resultado.append(TarefaDoDiaUsuarioResponse(
+    return [
+        dict(
             tarefa_usuario_id=t.tarefa_usuario_id,
             Tarefa_idTarefa=t.Tarefa_idTarefa,
-            Tarefa_nome=t.Tarefa_nome,
-            Tarefa_descricao=t.Tarefa_descricao,
+            Tarefa_nome=tarefas[t.Tarefa_idTarefa].Tarefa,
+            Tarefa_descricao=tarefas[t.Tarefa_idTarefa].Descricao,
             usuario_idUsuario=t.usuario_idUsuario,
             Nome_usuario=t.Nome_usuario,
             Periodo=t.Periodo,
             data_hoje=hoje,
-            concluida=conclusao is not None,
-            data_hora_conclusao=conclusao.data_hora_conclusao if conclusao else None
-        ))
-
-    return resultado
+            concluida=t.conclusao_id is not None,
+            data_hora_conclusao=t.data_hora_conclusao
+        ) for t in tarefas_usuario if t.Tarefa_idTarefa in tarefas
+    ]
 
 
 @router.post("/usuario/{tarefa_usuario_id}/concluir", response_model=ConclusaoDiariaResponse, status_code=status.HTTP_201_CREATED)
-def concluir_tarefa_dia_usuario(tarefa_usuario_id: int, db: Session = Depends(get_db)):
+async def concluir_tarefa_dia_usuario(tarefa_usuario_id: int, db: Executor = Depends(get_db_executor)):
     """Marca uma tarefa (por usuario) como concluida no dia de hoje"""
-    tarefa_usr = db.query(TarefaUsuario).filter(TarefaUsuario.id == tarefa_usuario_id).first()
-    if not tarefa_usr:
-        raise HTTPException(status_code=404, detail="Tarefa usuario nao encontrada")
+    if conclusoes_em_grupo.ativo:
+        resultado = await conclusoes_em_grupo.executar(db, ("tarefa_usuario_id", tarefa_usuario_id))
+        return _conclusao_do_grupo(resultado, "Tarefa usuario nao encontrada")
+    return await db.run(_concluir_tarefa_dia_usuario, tarefa_usuario_id)
 
-    hoje = date.today()
-
-    existente = db.query(TarefaConclusaoDiaria).filter(
-        TarefaConclusaoDiaria.tarefa_usuario_id == tarefa_usuario_id,
-        TarefaConclusaoDiaria.data == hoje
-    ).first()
 
-    if existente:
-        raise HTTPException(status_code=400, detail="Tarefa ja foi concluida hoje")
-
-    conclusao = TarefaConclusaoDiaria(
-        tarefa_usuario_id=tarefa_usuario_id,
-        data=hoje,
-        data_hora_conclusao=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        status=1
-    )
-    db.add(conclusao)
-    db.commit()
-    db.refresh(conclusao)
+def _concluir_tarefa_dia_usuario(db: Session, tarefa_usuario_id: int):
+    conclusao = _inserir_conclusao(db, TarefaUsuario, TarefaConclusaoDiaria.tarefa_usuario_id, tarefa_usuario_id)
+    if conclusao is None:
+        raise HTTPException(status_code=404, detail="Tarefa usuario nao encontrada")
     return conclusao
 
 
 @router.delete("/usuario/{tarefa_usuario_id}/desfazer", status_code=status.HTTP_204_NO_CONTENT)
-def desfazer_conclusao_dia_usuario(tarefa_usuario_id: int, db: Session = Depends(get_db)):
+async def desfazer_conclusao_dia_usuario(tarefa_usuario_id: int, db: Executor = Depends(get_db_executor)):
     """Remove a conclusao do dia para tarefa por usuario"""
+    return await db.run(_desfazer_conclusao_dia_usuario, tarefa_usuario_id)
+
+
+def _desfazer_conclusao_dia_usuario(db: Session, tarefa_usuario_id: int):
     hoje = date.today()
 
     conclusao = db.query(TarefaConclusaoDiaria).filter(
@@ -241,50 +383,410 @@ def desfazer_conclusao_dia_usuario(tarefa_usuario_id: int, db: Session = Depends
         raise HTTPException(status_code=404, detail="Nenhuma conclusao encontrada para hoje")
 
     db.delete(conclusao)
+    atualizar_resumo(db, hoje, tarefa_usuario_ids=[tarefa_usuario_id])
     db.commit()
+    notificar_conclusoes(db, "desfeita", hoje, tarefa_usuario_ids=[tarefa_usuario_id])
     return None
 
 
-@router.get("/usuario/{usuario_id}/historico", response_model=List[HistoricoConclusaoResponse])
-def historico_conclusoes_usuario(
+@router.get("/usuario/{usuario_id}/historico", response_model=List[HistoricoConclusaoResponse], dependencies=[orcamento_sql(3)])
+async def historico_conclusoes_usuario(
     usuario_id: int,
     data_inicio: Optional[date] = None,
     data_fim: Optional[date] = None,
-    db: Session = Depends(get_db)
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Executor = Depends(get_db_executor)
 ):
-    """Historico de conclusoes de tarefas por usuario"""
-    query = db.query(
-        TarefaConclusaoDiaria.id,
-        TarefaConclusaoDiaria.tarefa_usuario_id,
-        Tarefa.Tarefa.label('Tarefa_nome'),
-        Tarefa.Descricao.label('Tarefa_descricao'),
-        Usuario.Nome.label('Nome_usuario'),
-        TarefaConclusaoDiaria.data,
-        TarefaConclusaoDiaria.data_hora_conclusao,
-        TarefaConclusaoDiaria.status,
-    ).join(TarefaUsuario, TarefaConclusaoDiaria.tarefa_usuario_id == TarefaUsuario.id
-    ).join(Tarefa, TarefaUsuario.Tarefa_idTarefa == Tarefa.idTarefa
-    ).join(Usuario, TarefaUsuario.usuario_idUsuario == Usuario.idUsuario
-    ).filter(TarefaUsuario.usuario_idUsuario == usuario_id)
-
-    if data_inicio:
-        query = query.filter(TarefaConclusaoDiaria.data >= data_inicio)
-    if data_fim:
-        query = query.filter(TarefaConclusaoDiaria.data <= data_fim)
+    """
+    Historico de conclusoes de tarefas por usuario, da mais recente para a mais antiga.
+    Com limit (ou cursor) pagina por (data, id): a proxima pagina vem no cabecalho X-Next-Cursor.
+    """
+    resultado, next_cursor = await db.run(_historico_conclusoes_usuario, usuario_id, data_inicio, data_fim, limit, cursor)
+    return HISTORICO.resposta(resultado, headers={CABECALHO_CURSOR: next_cursor} if next_cursor else None)
 
-    query = query.order_by(TarefaConclusaoDiaria.data.desc())
 
-    resultados = query.all()
+def _historico_conclusoes_usuario(
+    db: Session,
+    usuario_id: int,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    limit: Optional[int],
+    cursor: Optional[str]
+):
+    resultados, next_cursor = paginar_por_data_id_em_tabelas([
+        (_query_historico_usuario(db, usuario_id, data_inicio, data_fim, conclusoes), conclusoes.data, conclusoes.id)
+        for conclusoes in TABELAS_HISTORICO
+    ], cursor, limit)
+    tarefas = tarefas_por_id(db, [r.Tarefa_idTarefa for r in resultados])
 
     return [
-        HistoricoConclusaoResponse(
+        dict(
             id=r.id,
+            tarefa_email_id=None,
             tarefa_usuario_id=r.tarefa_usuario_id,
-            Tarefa_nome=r.Tarefa_nome,
-            Tarefa_descricao=r.Tarefa_descricao,
+            Tarefa_nome=tarefas[r.Tarefa_idTarefa].Tarefa,
+            Tarefa_descricao=tarefas[r.Tarefa_idTarefa].Descricao,
+            email=None,
             Nome_usuario=r.Nome_usuario,
             data=r.data,
             data_hora_conclusao=r.data_hora_conclusao,
             status=r.status
-        ) for r in resultados
-    ]
+        ) for r in resultados if r.Tarefa_idTarefa in tarefas
+    ], next_cursor
+
+
+def _query_historico_usuario(
+    db: Session,
+    usuario_id: int,
+    data_inicio: Optional[date],
+    data_fim: Optional[date],
+    conclusoes=TarefaConclusaoDiaria
+):
+    query = db.query(
+        conclusoes.id,
+        conclusoes.tarefa_usuario_id,
+        TarefaUsuario.Tarefa_idTarefa,
+        Usuario.Nome.label('Nome_usuario'),
+        conclusoes.data,
+        conclusoes.data_hora_conclusao,
+        conclusoes.status,
+    ).join(TarefaUsuario, conclusoes.tarefa_usuario_id == TarefaUsuario.id
+    ).join(Usuario, TarefaUsuario.usuario_idUsuario == Usuario.idUsuario
+    ).filter(TarefaUsuario.usuario_idUsuario == usuario_id)
+
+    if data_inicio:
+        query = query.filter(conclusoes.data >= data_inicio)
+    if data_fim:
+        query = query.filter(conclusoes.data <= data_fim)
+    return query
+
+
+CAMPOS_EXPORTACAO_USUARIO = [
+    "id", "tarefa_usuario_id", "Tarefa_nome", "Tarefa_descricao",
+    "Nome_usuario", "data", "data_hora_conclusao", "status",
+]
+
+
+@router.get("/usuario/{usuario_id}/historico/export")
+async def exportar_historico_usuario(
+    usuario_id: int,
+    request: Request,
+    data_inicio: Optional[date] = None,
+    data_fim: Optional[date] = None,
+    formato: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Exporta o historico de conclusoes por usuario (ndjson ou csv), da mais recente
+    para a mais antiga. As linhas sao enviadas em streaming, sem limite de intervalo.
+    """
+    def montar_queries(db: Session):
+        return [
+            _query_historico_usuario(db, usuario_id, data_inicio, data_fim, conclusoes).join(
+                Tarefa, TarefaUsuario.Tarefa_idTarefa == Tarefa.idTarefa
+            ).add_columns(
+                Tarefa.Tarefa.label("Tarefa_nome"),
+                Tarefa.Descricao.label("Tarefa_descricao"),
+            ).order_by(conclusoes.data.desc(), conclusoes.id.desc())
+            for conclusoes in TABELAS_HISTORICO
+        ]
+
+    return await exportar(
+        request, session_factory, montar_queries, CAMPOS_EXPORTACAO_USUARIO, formato, "historico",
+        maximo_sql=len(TABELAS_HISTORICO),
+    )
+
+
+# ========================
+# ENDPOINTS DA FAMILIA
+# ========================
+
+@router.get("/familia", response_model=FamiliaDoDiaResponse, dependencies=[orcamento_sql(2)])
+async def listar_tarefas_do_dia_familia(
+    request: Request,
+    data: Optional[date] = None,
+    db: Executor = Depends(get_db_executor)
+):
+    """
+    Lista as tarefas do dia de todos os membros da familia, agrupadas por
+    membro e por periodo. Junta as atribuicoes por usuario e por email em
+    uma unica consulta (UNION ALL), com a conclusao do dia via LEFT OUTER JOIN;
+    as por email de um usuario cadastrado entram no membro dele;
+    nome e descricao das tarefas vem do cache de Tarefa.
+    Responde 304 quando o If-None-Match bate com o ETag atual.
+    """
+    return await _leitura_coalescida(request, db, FAMILIA_DO_DIA, _listar_tarefas_do_dia_familia, data)
+
+
+def _listar_tarefas_do_dia_familia(db: Session, data: Optional[date]):
+    dia = data or date.today()
+
+    por_usuario = select(
+        literal("usuario").label("origem"),
+        TarefaUsuario.id.label("tarefa_usuario_id"),
+        null().label("tarefa_email_id"),
+        TarefaUsuario.usuario_idUsuario.label("usuario_idUsuario"),
+        Usuario.email.label("email"),
+        Usuario.Nome.label("Nome"),
+        TarefaUsuario.Periodo.label("Periodo"),
+        TarefaUsuario.Tarefa_idTarefa.label("Tarefa_idTarefa"),
+        TarefaConclusaoDiaria.id.label("conclusao_id"),
+        TarefaConclusaoDiaria.data_hora_conclusao.label("data_hora_conclusao"),
+    ).join(Usuario, TarefaUsuario.usuario_idUsuario == Usuario.idUsuario
+    ).outerjoin(TarefaConclusaoDiaria, and_(
+        TarefaConclusaoDiaria.tarefa_usuario_id == TarefaUsuario.id,
+        TarefaConclusaoDiaria.data == dia
+    ))
+
+    # O usuario dono do email (a conta Gmail antes das simples que repetem o
+    # email), para juntar as duas origens no mesmo membro
+    def usuario_por_email(coluna):
+        return select(coluna).where(
+            Usuario.email == TarefaEmail.email
+        ).order_by((Usuario.tipo_conta == "gmail").desc(), Usuario.idUsuario).limit(1).scalar_subquery()
+
+    por_email = select(
+        literal("email").label("origem"),
+        null().label("tarefa_usuario_id"),
+        TarefaEmail.id.label("tarefa_email_id"),
+        usuario_por_email(Usuario.idUsuario).label("usuario_idUsuario"),
+        TarefaEmail.email.label("email"),
+        usuario_por_email(Usuario.Nome).label("Nome"),
+        TarefaEmail.Periodo.label("Periodo"),
+        TarefaEmail.Tarefa_idTarefa.label("Tarefa_idTarefa"),
+        TarefaConclusaoDiaria.id.label("conclusao_id"),
+        TarefaConclusaoDiaria.data_hora_conclusao.label("data_hora_conclusao"),
+    ).outerjoin(TarefaConclusaoDiaria, and_(
+        TarefaConclusaoDiaria.tarefa_email_id == TarefaEmail.id,
+        TarefaConclusaoDiaria.data == dia
+    ))
+
+    tarefas = union_all(por_usuario, por_email).subquery()
+    linhas = db.execute(
+        select(tarefas).order_by(
+            tarefas.c.usuario_idUsuario.is_(None),
+            tarefas.c.usuario_idUsuario,
+            tarefas.c.email,
+            tarefas.c.Periodo,
+            tarefas.c.origem.desc(),
+            tarefas.c.Tarefa_idTarefa,
+        )
+    ).all()
+    tarefas = tarefas_por_id(db, [r.Tarefa_idTarefa for r in linhas])
+
+    membros = {}
+    for r in linhas:
+        tarefa = tarefas.get(r.Tarefa_idTarefa)
+        if tarefa is None:
+            continue
+        # Membro com usuario: atribuicoes por id e pelo email dele juntas
+        chave = r.usuario_idUsuario if r.usuario_idUsuario is not None else r.email
+        membro = membros.get(chave)
+        if membro is None:
+            membro = membros[chave] = {
+                "usuario_idUsuario": r.usuario_idUsuario,
+                "email": r.email,
+                "Nome": r.Nome,
+                "periodos": {},
+            }
+        membro["periodos"].setdefault(r.Periodo, []).append({
+            "tarefa_usuario_id": r.tarefa_usuario_id,
+            "tarefa_email_id": r.tarefa_email_id,
+            "Tarefa_idTarefa": r.Tarefa_idTarefa,
+            "Tarefa_nome": tarefa.Tarefa,
+            "Tarefa_descricao": tarefa.Descricao,
+            "concluida": r.conclusao_id is not None,
+            "data_hora_conclusao": r.data_hora_conclusao,
+        })
+
+    return FamiliaDoDiaResponse(
+        data=dia,
+        membros=[
+            {
+                **membro,
+                "periodos": [
+                    {"Periodo": periodo, "tarefas": itens}
+                    for periodo, itens in membro["periodos"].items()
+                ],
+            }
+            for membro in membros.values()
+        ],
+    )
+
+
+# ========================
+# ENDPOINTS EM LOTE
+# ========================
+
+@router.post("/concluir-lote", response_model=ConclusaoLoteResponse)
+async def concluir_tarefas_dia_lote(lote: ConclusaoLoteRequest, db: Executor = Depends(get_db_executor)):
+    """
+    Marca varias tarefas (por usuario e por email) como concluidas hoje, em uma transacao.
+    Resultado por id: concluida, ja_concluida ou nao_encontrada.
+    """
+    return await db.run(_concluir_tarefas_dia_lote, lote)
+
+
+def _concluidas_hoje(db: Session, coluna, ids: List[int], hoje: date):
+    if not ids:
+        return set()
+    return set(db.execute(
+        select(coluna).where(coluna.in_(ids), TarefaConclusaoDiaria.data == hoje)
+    ).scalars())
+
+
+def _concluir_tarefas_dia_lote(db: Session, lote: ConclusaoLoteRequest):
+    resposta, ids = _gravar_conclusoes_lote(db, lote)
+    db.commit()
+    notificar_conclusoes(db, "concluida", resposta["data"], **ids)
+    return resposta
+
+
+def _gravar_conclusoes_lote(db: Session, lote: ConclusaoLoteRequest):
+    """Insere as conclusoes do lote sem commit; retorna a resposta e os ids concluidos"""
+    hoje = date.today()
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    resposta = {"data": hoje}
+    linhas = []
+
+    for chave, ids, modelo, coluna in (
+        ("tarefas_usuario", lote.tarefa_usuario_ids, TarefaUsuario, TarefaConclusaoDiaria.tarefa_usuario_id),
+        ("tarefas_email", lote.tarefa_email_ids, TarefaEmail, TarefaConclusaoDiaria.tarefa_email_id),
+    ):
+        ids = list(dict.fromkeys(ids))
+        existentes = ids_existentes(db, modelo.id, ids)
+        concluidas = _concluidas_hoje(db, coluna, ids, hoje)
+        resultados = []
+        for id in ids:
+            if id not in existentes:
+                resultados.append({"id": id, "resultado": "nao_encontrada"})
+            elif id in concluidas:
+                resultados.append({"id": id, "resultado": "ja_concluida"})
+            else:
+                resultados.append({"id": id, "resultado": "concluida"})
+                linhas.append({
+                    "tarefa_usuario_id": None,
+                    "tarefa_email_id": None,
+                    coluna.key: id,
+                    "data": hoje,
+                    "data_hora_conclusao": agora,
+                    "status": 1,
+                })
+        resposta[chave] = resultados
+
+    # Uma conclusao feita em paralelo entre a leitura e o INSERT e ignorada
+    # pelas chaves unicas uq_tarefa_*_data
+    ids = {
+        "tarefa_usuario_ids": [l["tarefa_usuario_id"] for l in linhas if l["tarefa_usuario_id"]],
+        "tarefa_email_ids": [l["tarefa_email_id"] for l in linhas if l["tarefa_email_id"]],
+    }
+    if linhas:
+        inserir_ignorando_duplicados(db, TarefaConclusaoDiaria, linhas)
+        registrar_alteracoes_onde(
+            db, TarefaConclusaoDiaria,
+            TarefaConclusaoDiaria.data == hoje,
+            or_(
+                TarefaConclusaoDiaria.tarefa_usuario_id.in_(ids["tarefa_usuario_ids"]),
+                TarefaConclusaoDiaria.tarefa_email_id.in_(ids["tarefa_email_ids"]),
+            )
+        )
+        atualizar_resumo(db, hoje, **ids)
+    return resposta, ids
+
+
+def _concluir_grupo(db: Session, pedidos):
+    """
+    Grava um grupo de conclusoes avulsas (pedidos (coluna, id)) com o mesmo
+    caminho do concluir-lote e retorna, por pedido, a conclusao criada ou
+    "nao_encontrada"/"ja_concluida". O mesmo id repetido no grupo so e
+    concluido no primeiro pedido, como aconteceria em requisicoes separadas.
+    """
+    lote = ConclusaoLoteRequest(
+        tarefa_usuario_ids=[id for coluna, id in pedidos if coluna == "tarefa_usuario_id"],
+        tarefa_email_ids=[id for coluna, id in pedidos if coluna == "tarefa_email_id"],
+    )
+    resposta, ids = _gravar_conclusoes_lote(db, lote)
+    estados = {
+        ("tarefa_usuario_id", r["id"]): r["resultado"] for r in resposta["tarefas_usuario"]
+    }
+    estados.update({("tarefa_email_id", r["id"]): r["resultado"] for r in resposta["tarefas_email"]})
+
+    conclusoes = {}
+    concluidas = [p for p in estados if estados[p] == "concluida"]
+    if concluidas:
+        for c in db.execute(select(TarefaConclusaoDiaria).where(
+            TarefaConclusaoDiaria.data == resposta["data"],
+            or_(
+                TarefaConclusaoDiaria.tarefa_usuario_id.in_([id for coluna, id in concluidas if coluna == "tarefa_usuario_id"]),
+                TarefaConclusaoDiaria.tarefa_email_id.in_([id for coluna, id in concluidas if coluna == "tarefa_email_id"]),
+            )
+        )).scalars():
+            chave = ("tarefa_usuario_id", c.tarefa_usuario_id) if c.tarefa_usuario_id else ("tarefa_email_id", c.tarefa_email_id)
+            conclusoes[chave] = ConclusaoDiariaResponse.model_validate(c).model_dump()
+    db.commit()
+    notificar_conclusoes(db, "concluida", resposta["data"], **ids)
+
+    resultados = []
+    for pedido in pedidos:
+        if pedido in conclusoes:
+            resultados.append(conclusoes.pop(pedido))
+        else:
+            # Ja concluida antes, ou em paralelo por outra transacao (o INSERT a ignorou)
+            resultados.append("nao_encontrada" if estados[pedido] == "nao_encontrada" else "ja_concluida")
+    return resultados
+
+
+def _conclusao_do_grupo(resultado, nao_encontrada: str):
+    if resultado == "nao_encontrada":
+        raise HTTPException(status_code=404, detail=nao_encontrada)
+    if resultado == "ja_concluida":
+        raise HTTPException(status_code=400, detail="Tarefa ja foi concluida hoje")
+    return resultado
+
+
+# Conclusoes avulsas gravadas em grupo (COMMIT_EM_GRUPO=true)
+conclusoes_em_grupo = CommitEmGrupo("conclusoes", _concluir_grupo)
+
+
+@router.delete("/desfazer-lote", response_model=ConclusaoLoteResponse)
+async def desfazer_conclusoes_dia_lote(lote: ConclusaoLoteRequest, db: Executor = Depends(get_db_executor)):
+    """
+    Remove as conclusoes de hoje de varias tarefas (por usuario e por email), em uma transacao.
+    Resultado por id: desfeita ou nao_concluida.
+    """
+    return await db.run(_desfazer_conclusoes_dia_lote, lote)
+
+
+def _desfazer_conclusoes_dia_lote(db: Session, lote: ConclusaoLoteRequest):
+    hoje = date.today()
+    resposta = {"data": hoje}
+    filtros = []
+
+    for chave, ids, coluna in (
+        ("tarefas_usuario", lote.tarefa_usuario_ids, TarefaConclusaoDiaria.tarefa_usuario_id),
+        ("tarefas_email", lote.tarefa_email_ids, TarefaConclusaoDiaria.tarefa_email_id),
+    ):
+        ids = list(dict.fromkeys(ids))
+        concluidas = _concluidas_hoje(db, coluna, ids, hoje)
+        resposta[chave] = [
+            {"id": id, "resultado": "desfeita" if id in concluidas else "nao_concluida"}
+            for id in ids
+        ]
+        if concluidas:
+            filtros.append(coluna.in_(concluidas))
+
+    ids = {
+        "tarefa_usuario_ids": [r["id"] for r in resposta["tarefas_usuario"] if r["resultado"] == "desfeita"],
+        "tarefa_email_ids": [r["id"] for r in resposta["tarefas_email"] if r["resultado"] == "desfeita"],
+    }
+    if filtros:
+        registrar_alteracoes_onde(db, TarefaConclusaoDiaria, TarefaConclusaoDiaria.data == hoje, or_(*filtros), removido=True)
+        db.execute(delete(TarefaConclusaoDiaria).where(
+            TarefaConclusaoDiaria.data == hoje,
+            or_(*filtros)
+        ))
+        atualizar_resumo(db, hoje, **ids)
+    db.commit()
+    notificar_conclusoes(db, "desfeita", hoje, **ids)
+    return resposta
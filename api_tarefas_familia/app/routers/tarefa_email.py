@@ -1,67 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-from app.database import get_db
-from app.models.tarefa_email import TarefaEmail
+from app.cache import tarefas_por_id
+from app.database import Executor, get_db_executor
+from app.etag import etag_do_corpo, resposta_json_com_etag
+from app.eventos import notificar_atribuicoes
+from app.lote import campo_excedido, gravar_lote, ids_existentes
+from app.orcamento_sql import orcamento_sql
+from app.paginacao import CABECALHO_CURSOR, paginar_por_id
+from app.serializacao import Serializador
 from app.models.tarefa import Tarefa
-from app.schemas.tarefa_email import TarefaEmailCreate, TarefaEmailUpdate, TarefaEmailResponse, TarefaEmailDetalhadaResponse
+from app.models.tarefa_email import TarefaEmail
+from app.schemas.lote import LoteCriadoResponse
+from app.schemas.tarefa_email import TarefaEmailCreate, TarefaEmailLoteCreate, TarefaEmailUpdate, TarefaEmailResponse, TarefaEmailDetalhadaResponse
 
 router = APIRouter(prefix="/tarefas-email", tags=["Tarefas-Email"])
 
+TAREFAS_DETALHADAS = Serializador(List[TarefaEmailDetalhadaResponse])
+
 
 @router.get("/", response_model=List[TarefaEmailResponse])
-def listar_tarefas_email(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista todas as tarefas vinculadas a emails"""
-    tarefas = db.query(TarefaEmail).offset(skip).limit(limit).all()
+async def listar_tarefas_email(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Executor = Depends(get_db_executor)
+):
+    """Lista todas as tarefas vinculadas a emails. Use o cabecalho X-Next-Cursor como ?cursor= para a proxima pagina"""
+    tarefas, next_cursor = await db.run(_listar_tarefas_email, skip, limit, cursor)
+    if next_cursor:
+        response.headers[CABECALHO_CURSOR] = next_cursor
     return tarefas
 
 
+def _listar_tarefas_email(db: Session, skip: int, limit: int, cursor: Optional[str]):
+    return paginar_por_id(db.query(TarefaEmail), TarefaEmail.id, cursor, skip, limit)
+
+
 @router.get("/{id}", response_model=TarefaEmailResponse)
-def obter_tarefa_email(id: int, db: Session = Depends(get_db)):
+async def obter_tarefa_email(id: int, db: Executor = Depends(get_db_executor)):
     """Obtem uma tarefa-email pelo ID"""
+    return await db.run(_obter_tarefa_email, id)
+
+
+def _obter_tarefa_email(db: Session, id: int):
     tarefa = db.query(TarefaEmail).filter(TarefaEmail.id == id).first()
     if not tarefa:
         raise HTTPException(status_code=404, detail="Registro nao encontrado")
     return tarefa
 
 
-@router.get("/email/{email}", response_model=List[TarefaEmailDetalhadaResponse])
-def listar_tarefas_por_email(email: str, db: Session = Depends(get_db)):
-    """Lista todas as tarefas de um email especifico com nome e descricao da tarefa"""
+@router.get("/email/{email}", response_model=List[TarefaEmailDetalhadaResponse], dependencies=[orcamento_sql(2)])
+async def listar_tarefas_por_email(email: str, request: Request, db: Executor = Depends(get_db_executor)):
+    """
+    Lista todas as tarefas de um email especifico com nome e descricao da tarefa.
+    Responde 304 quando o If-None-Match bate com o ETag atual.
+    """
+    return await _responder_tarefas_por_email(request, db, email)
+
+
+async def _responder_tarefas_por_email(request: Request, db: Executor, email: str):
+    """JSON das tarefas detalhadas do email, com o ETag do corpo serializado"""
+    corpo = TAREFAS_DETALHADAS.corpo(await db.run(_listar_tarefas_por_email, email))
+    return resposta_json_com_etag(request, corpo, etag_do_corpo(corpo))
+
+
+def _listar_tarefas_por_email(db: Session, email: str):
     resultados = db.query(
         TarefaEmail.id,
         TarefaEmail.Tarefa_idTarefa,
-        Tarefa.Tarefa.label('Tarefa_nome'),
-        Tarefa.Descricao.label('Tarefa_descricao'),
         TarefaEmail.email,
         TarefaEmail.Data,
         TarefaEmail.Periodo,
         TarefaEmail.Feito,
         TarefaEmail.DataHoraConclusao
-    ).join(Tarefa, TarefaEmail.Tarefa_idTarefa == Tarefa.idTarefa).filter(
+    ).filter(
         TarefaEmail.email == email
     ).all()
+    tarefas = tarefas_por_id(db, [r.Tarefa_idTarefa for r in resultados])
 
     return [
-        TarefaEmailDetalhadaResponse(
+        dict(
             id=r.id,
             Tarefa_idTarefa=r.Tarefa_idTarefa,
-            Tarefa_nome=r.Tarefa_nome,
-            Tarefa_descricao=r.Tarefa_descricao,
+            Tarefa_nome=tarefas[r.Tarefa_idTarefa].Tarefa,
+            Tarefa_descricao=tarefas[r.Tarefa_idTarefa].Descricao,
             email=r.email,
             Data=r.Data,
             Periodo=r.Periodo,
             Feito=r.Feito,
             DataHoraConclusao=r.DataHoraConclusao
-        ) for r in resultados
+        ) for r in resultados if r.Tarefa_idTarefa in tarefas
     ]
 
 
 @router.get("/email/{email}/pendentes", response_model=List[TarefaEmailResponse])
-def listar_tarefas_pendentes_email(email: str, db: Session = Depends(get_db)):
+async def listar_tarefas_pendentes_email(email: str, db: Executor = Depends(get_db_executor)):
     """Lista todas as tarefas pendentes de um email"""
+    return await db.run(_listar_tarefas_pendentes_email, email)
+
+
+def _listar_tarefas_pendentes_email(db: Session, email: str):
     tarefas = db.query(TarefaEmail).filter(
         TarefaEmail.email == email,
         TarefaEmail.Feito == 0
@@ -69,54 +111,68 @@ def listar_tarefas_pendentes_email(email: str, db: Session = Depends(get_db)):
     return tarefas
 
 
-@router.get("/email/{email}/detalhado", response_model=List[TarefaEmailDetalhadaResponse])
-def listar_tarefas_detalhadas_por_email(email: str, db: Session = Depends(get_db)):
-    """Lista todas as tarefas de um email com informacoes detalhadas da tarefa"""
-    resultados = db.query(
-        TarefaEmail.id,
-        TarefaEmail.Tarefa_idTarefa,
-        Tarefa.Tarefa.label('Tarefa_nome'),
-        Tarefa.Descricao.label('Tarefa_descricao'),
-        TarefaEmail.email,
-        TarefaEmail.Data,
-        TarefaEmail.Periodo,
-        TarefaEmail.Feito,
-        TarefaEmail.DataHoraConclusao
-    ).join(Tarefa, TarefaEmail.Tarefa_idTarefa == Tarefa.idTarefa).filter(
-        TarefaEmail.email == email
-    ).all()
-
-    return [
-        TarefaEmailDetalhadaResponse(
-            id=r.id,
-            Tarefa_idTarefa=r.Tarefa_idTarefa,
-            Tarefa_nome=r.Tarefa_nome,
-            Tarefa_descricao=r.Tarefa_descricao,
-            email=r.email,
-            Data=r.Data,
-            Periodo=r.Periodo,
-            Feito=r.Feito,
-            DataHoraConclusao=r.DataHoraConclusao
-        ) for r in resultados
-    ]
+@router.get("/email/{email}/detalhado", response_model=List[TarefaEmailDetalhadaResponse], dependencies=[orcamento_sql(2)])
+async def listar_tarefas_detalhadas_por_email(email: str, request: Request, db: Executor = Depends(get_db_executor)):
+    """
+    Lista todas as tarefas de um email com informacoes detalhadas da tarefa
+    (mesma resposta de /tarefas-email/email/{email}).
+    """
+    return await _responder_tarefas_por_email(request, db, email)
 
 
 @router.post("/", response_model=TarefaEmailResponse, status_code=status.HTTP_201_CREATED)
-def criar_tarefa_email(tarefa: TarefaEmailCreate, db: Session = Depends(get_db)):
+async def criar_tarefa_email(tarefa: TarefaEmailCreate, db: Executor = Depends(get_db_executor)):
     """Vincula uma tarefa a um email"""
+    return await db.run(_criar_tarefa_email, tarefa)
+
+
+def _criar_tarefa_email(db: Session, tarefa: TarefaEmailCreate):
     db_tarefa = TarefaEmail(**tarefa.model_dump())
     db.add(db_tarefa)
     db.commit()
     db.refresh(db_tarefa)
+    notificar_atribuicoes("criada", "email", [(db_tarefa.id, db_tarefa.email)])
     return db_tarefa
 
 
+@router.post("/bulk", response_model=LoteCriadoResponse, status_code=status.HTTP_201_CREATED)
+async def criar_tarefas_email_lote(lote: TarefaEmailLoteCreate, db: Executor = Depends(get_db_executor)):
+    """
+    Vincula varias tarefas a emails em uma transacao.
+    Itens invalidos voltam em erros (pelo indice) e nao impedem os demais.
+    """
+    return await db.run(_criar_tarefas_email_lote, lote)
+
+
+def _criar_tarefas_email_lote(db: Session, lote: TarefaEmailLoteCreate):
+    linhas = [item.model_dump() for item in lote.itens]
+    tarefas = ids_existentes(db, Tarefa.idTarefa, (linha["Tarefa_idTarefa"] for linha in linhas))
+
+    erros = {}
+    for indice, linha in enumerate(linhas):
+        if linha["Tarefa_idTarefa"] not in tarefas:
+            erros[indice] = "Tarefa nao encontrada"
+        else:
+            erro = campo_excedido(TarefaEmail, linha)
+            if erro:
+                erros[indice] = erro
+
+    resultado = gravar_lote(db, TarefaEmail, linhas, erros)
+    notificar_atribuicoes("criada", "email", [(c["id"], linhas[c["indice"]]["email"]) for c in resultado["criados"]])
+    return resultado
+
+
 @router.put("/{id}", response_model=TarefaEmailResponse)
-def atualizar_tarefa_email(id: int, tarefa: TarefaEmailUpdate, db: Session = Depends(get_db)):
+async def atualizar_tarefa_email(id: int, tarefa: TarefaEmailUpdate, db: Executor = Depends(get_db_executor)):
     """Atualiza uma tarefa-email"""
+    return await db.run(_atualizar_tarefa_email, id, tarefa)
+
+
+def _atualizar_tarefa_email(db: Session, id: int, tarefa: TarefaEmailUpdate):
     db_tarefa = db.query(TarefaEmail).filter(TarefaEmail.id == id).first()
     if not db_tarefa:
         raise HTTPException(status_code=404, detail="Registro nao encontrado")
+    email_anterior = db_tarefa.email
 
     update_data = tarefa.model_dump(exclude_unset=True)
     for key, value in update_data.items():
@@ -124,12 +180,17 @@ def atualizar_tarefa_email(id: int, tarefa: TarefaEmailUpdate, db: Session = Dep
 
     db.commit()
     db.refresh(db_tarefa)
+    notificar_atribuicoes("atualizada", "email", {(id, email_anterior), (id, db_tarefa.email)})
     return db_tarefa
 
 
 @router.patch("/{id}/concluir", response_model=TarefaEmailResponse)
-def concluir_tarefa_email(id: int, db: Session = Depends(get_db)):
+async def concluir_tarefa_email(id: int, db: Executor = Depends(get_db_executor)):
     """Marca uma tarefa como concluida"""
+    return await db.run(_concluir_tarefa_email, id)
+
+
+def _concluir_tarefa_email(db: Session, id: int):
     db_tarefa = db.query(TarefaEmail).filter(TarefaEmail.id == id).first()
     if not db_tarefa:
         raise HTTPException(status_code=404, detail="Registro nao encontrado")
@@ -139,16 +200,23 @@ def concluir_tarefa_email(id: int, db: Session = Depends(get_db)):
 
     db.commit()
     db.refresh(db_tarefa)
+    notificar_atribuicoes("concluida", "email", [(id, db_tarefa.email)])
     return db_tarefa
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
-def deletar_tarefa_email(id: int, db: Session = Depends(get_db)):
+async def deletar_tarefa_email(id: int, db: Executor = Depends(get_db_executor)):
     """Deleta uma tarefa-email"""
+    return await db.run(_deletar_tarefa_email, id)
+
+
+def _deletar_tarefa_email(db: Session, id: int):
     db_tarefa = db.query(TarefaEmail).filter(TarefaEmail.id == id).first()
     if not db_tarefa:
         raise HTTPException(status_code=404, detail="Registro nao encontrado")
+    email = db_tarefa.email
 
     db.delete(db_tarefa)
     db.commit()
+    notificar_atribuicoes("removida", "email", [(id, email)])
     return None
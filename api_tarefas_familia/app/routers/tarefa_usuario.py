@@ -1,19 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
+from app.eventos import notificar_atribuicoes
+from app.lote import campo_excedido, gravar_lote, ids_existentes
+from app.paginacao import CABECALHO_CURSOR, paginar_por_id
+from app.models.tarefa import Tarefa
 from app.models.tarefa_usuario import TarefaUsuario
-from app.schemas.tarefa_usuario import TarefaUsuarioCreate, TarefaUsuarioUpdate, TarefaUsuarioResponse
+from app.models.usuario import Usuario
+from app.schemas.lote import LoteCriadoResponse
+from app.schemas.tarefa_usuario import TarefaUsuarioCreate, TarefaUsuarioLoteCreate, TarefaUsuarioUpdate, TarefaUsuarioResponse
 
 router = APIRouter(prefix="/tarefas-usuarios", tags=["Tarefas-Usuários"])
 
 
 @router.get("/", response_model=List[TarefaUsuarioResponse])
-def listar_atribuicoes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista todas as atribuições de tarefas a usuários"""
-    atribuicoes = db.query(TarefaUsuario).offset(skip).limit(limit).all()
+def listar_atribuicoes(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista todas as atribuições de tarefas a usuários. Use o cabecalho X-Next-Cursor como ?cursor= para a proxima pagina"""
+    atribuicoes, next_cursor = paginar_por_id(db.query(TarefaUsuario), TarefaUsuario.id, cursor, skip, limit)
+    if next_cursor:
+        response.headers[CABECALHO_CURSOR] = next_cursor
     return atribuicoes
 
 
@@ -61,15 +75,46 @@ def criar_atribuicao(atribuicao: TarefaUsuarioCreate, db: Session = Depends(get_
     db.add(db_atribuicao)
     db.commit()
     db.refresh(db_atribuicao)
+    notificar_atribuicoes("criada", "usuario", [(db_atribuicao.id, db_atribuicao.usuario_idUsuario)])
     return db_atribuicao
 
 
+@router.post("/bulk", response_model=LoteCriadoResponse, status_code=status.HTTP_201_CREATED)
+def criar_atribuicoes_lote(lote: TarefaUsuarioLoteCreate, db: Session = Depends(get_db)):
+    """
+    Cria várias atribuições de tarefas a usuários em uma transação.
+    Itens inválidos voltam em erros (pelo índice) e não impedem os demais.
+    """
+    linhas = [item.model_dump() for item in lote.itens]
+    usuarios = ids_existentes(db, Usuario.idUsuario, (linha["usuario_idUsuario"] for linha in linhas))
+    tarefas = ids_existentes(db, Tarefa.idTarefa, (linha["Tarefa_idTarefa"] for linha in linhas))
+
+    erros = {}
+    for indice, linha in enumerate(linhas):
+        if linha["usuario_idUsuario"] not in usuarios:
+            erros[indice] = "Usuário não encontrado"
+        elif linha["Tarefa_idTarefa"] not in tarefas:
+            erros[indice] = "Tarefa não encontrada"
+        else:
+            erro = campo_excedido(TarefaUsuario, linha)
+            if erro:
+                erros[indice] = erro
+
+    resultado = gravar_lote(db, TarefaUsuario, linhas, erros)
+    notificar_atribuicoes(
+        "criada", "usuario",
+        [(c["id"], linhas[c["indice"]]["usuario_idUsuario"]) for c in resultado["criados"]]
+    )
+    return resultado
+
+
 @router.put("/{atribuicao_id}", response_model=TarefaUsuarioResponse)
 def atualizar_atribuicao(atribuicao_id: int, atribuicao: TarefaUsuarioUpdate, db: Session = Depends(get_db)):
     """Atualiza uma atribuição existente"""
     db_atribuicao = db.query(TarefaUsuario).filter(TarefaUsuario.id == atribuicao_id).first()
     if not db_atribuicao:
         raise HTTPException(status_code=404, detail="Atribuição não encontrada")
+    usuario_anterior = db_atribuicao.usuario_idUsuario
 
     update_data = atribuicao.model_dump(exclude_unset=True)
     for key, value in update_data.items():
@@ -77,6 +122,10 @@ def atualizar_atribuicao(atribuicao_id: int, atribuicao: TarefaUsuarioUpdate, db
 
     db.commit()
     db.refresh(db_atribuicao)
+    notificar_atribuicoes(
+        "atualizada", "usuario",
+        {(atribuicao_id, usuario_anterior), (atribuicao_id, db_atribuicao.usuario_idUsuario)}
+    )
     return db_atribuicao
 
 
@@ -92,6 +141,7 @@ def concluir_tarefa(atribuicao_id: int, db: Session = Depends(get_db)):
 
     db.commit()
     db.refresh(db_atribuicao)
+    notificar_atribuicoes("concluida", "usuario", [(atribuicao_id, db_atribuicao.usuario_idUsuario)])
     return db_atribuicao
 
 
@@ -101,7 +151,9 @@ def deletar_atribuicao(atribuicao_id: int, db: Session = Depends(get_db)):
     db_atribuicao = db.query(TarefaUsuario).filter(TarefaUsuario.id == atribuicao_id).first()
     if not db_atribuicao:
         raise HTTPException(status_code=404, detail="Atribuição não encontrada")
+    usuario_id = db_atribuicao.usuario_idUsuario
 
     db.delete(db_atribuicao)
     db.commit()
+    notificar_atribuicoes("removida", "usuario", [(atribuicao_id, usuario_id)])
     return None
@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import hashlib
 
-from app.database import get_db
+from app.database import Executor, get_db, get_db_executor
+from app.orcamento_sql import orcamento_sql
+from app.paginacao import CABECALHO_CURSOR, paginar_por_id
 from app.models.usuario import Usuario
 from app.schemas.usuario import (
     UsuarioCreate, UsuarioGmailCreate, UsuarioUpdate, UsuarioResponse,
@@ -13,11 +16,15 @@ from app.schemas.usuario import (
 router = APIRouter(prefix="/usuarios", tags=["Usuarios"])
 
 
-@router.post("/login", response_model=LoginResponse)
-def login(dados: LoginRequest, db: Session = Depends(get_db)):
+@router.post("/login", response_model=LoginResponse, dependencies=[orcamento_sql(1)])
+async def login(dados: LoginRequest, db: Executor = Depends(get_db_executor)):
     """
     Login simples com login e senha.
     """
+    return await db.run(_login, dados)
+
+
+def _login(db: Session, dados: LoginRequest):
     usuario = db.query(Usuario).filter(Usuario.login == dados.login).first()
 
     if not usuario:
@@ -49,13 +56,20 @@ def login(dados: LoginRequest, db: Session = Depends(get_db)):
     )
 
 
-@router.post("/login/gmail", response_model=LoginResponse)
-def login_gmail(dados: LoginGmailRequest, db: Session = Depends(get_db)):
+@router.post("/login/gmail", response_model=LoginResponse, dependencies=[orcamento_sql(3)])
+async def login_gmail(dados: LoginGmailRequest, db: Executor = Depends(get_db_executor)):
     """
     Login via conta Gmail. Busca pelo email.
     Se o usuario nao existir, cria automaticamente.
     """
-    usuario = db.query(Usuario).filter(Usuario.email == dados.email).first()
+    return await db.run(_login_gmail, dados)
+
+
+def _login_gmail(db: Session, dados: LoginGmailRequest):
+    # A conta Gmail do email, se existir, antes de uma conta simples com o mesmo email
+    usuario = db.query(Usuario).filter(Usuario.email == dados.email).order_by(
+        (Usuario.tipo_conta == "gmail").desc()
+    ).first()
 
     if not usuario:
         # Cria usuario automaticamente com dados do Gmail
@@ -66,15 +80,20 @@ def login_gmail(dados: LoginGmailRequest, db: Session = Depends(get_db)):
             email=dados.email,
             tipo_conta="gmail"
         )
-        db.add(usuario)
-        db.commit()
-        db.refresh(usuario)
-
-        return LoginResponse(
-            sucesso=True,
-            mensagem="Usuario criado e login realizado com sucesso",
-            usuario=UsuarioResponse.model_validate(usuario)
-        )
+        try:
+            resposta = _inserir_usuario(db, usuario)
+        except IntegrityError:
+            # Outro login com o mesmo email criou o usuario primeiro
+            db.rollback()
+            usuario = db.query(Usuario).filter(Usuario.email_gmail == dados.email).first()
+            if not usuario:
+                raise
+        else:
+            return LoginResponse(
+                sucesso=True,
+                mensagem="Usuario criado e login realizado com sucesso",
+                usuario=resposta
+            )
 
     if usuario.tipo_conta != "gmail":
         return LoginResponse(
@@ -95,10 +114,36 @@ def hash_senha(senha: str) -> str:
     return hashlib.sha256(senha.encode()).hexdigest()
 
 
+def _inserir_usuario(db: Session, usuario: Usuario) -> UsuarioResponse:
+    """
+    Insere e confirma o usuario. A resposta e montada antes do commit, com o id
+    vindo do proprio INSERT, para nao reler a linha. Login ou email repetido
+    levanta IntegrityError.
+    """
+    db.add(usuario)
+    db.flush()
+    resposta = UsuarioResponse.model_validate(usuario)
+    db.commit()
+    return resposta
+
+
+def _email_duplicado(erro: IntegrityError) -> bool:
+    """Indica se a chave unica violada foi a do email das contas Gmail (e nao a do login)"""
+    return "email_gmail" in str(erro.orig)
+
+
 @router.get("/", response_model=List[UsuarioResponse])
-def listar_usuarios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Lista todos os usuarios"""
-    usuarios = db.query(Usuario).offset(skip).limit(limit).all()
+def listar_usuarios(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Lista todos os usuarios. Use o cabecalho X-Next-Cursor como ?cursor= para a proxima pagina"""
+    usuarios, next_cursor = paginar_por_id(db.query(Usuario), Usuario.idUsuario, cursor, skip, limit)
+    if next_cursor:
+        response.headers[CABECALHO_CURSOR] = next_cursor
     return usuarios
 
 
@@ -114,26 +159,23 @@ def obter_usuario(usuario_id: int, db: Session = Depends(get_db)):
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
 def criar_usuario(usuario: UsuarioCreate, db: Session = Depends(get_db)):
     """Cadastro simples com login e senha"""
-    existing = db.query(Usuario).filter(Usuario.login == usuario.login).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Login ja cadastrado")
-
     usuario_data = usuario.model_dump()
     usuario_data["senha"] = hash_senha(usuario_data["senha"])
     usuario_data["tipo_conta"] = "simples"
 
-    db_usuario = Usuario(**usuario_data)
-    db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
-    return db_usuario
+    try:
+        return _inserir_usuario(db, Usuario(**usuario_data))
+    except IntegrityError:
+        # Contas simples podem repetir o email; so o login e unico
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Login ja cadastrado")
 
 
 @router.post("/gmail", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
 def criar_usuario_gmail(usuario: UsuarioGmailCreate, db: Session = Depends(get_db)):
     """Cadastro via conta Gmail (sem senha)"""
-    existing = db.query(Usuario).filter(Usuario.email == usuario.email).first()
-    if existing:
+    # Email de uma conta simples: a unicidade do banco so cobre as contas Gmail
+    if db.query(Usuario.idUsuario).filter(Usuario.email == usuario.email).first():
         raise HTTPException(status_code=400, detail="Email ja cadastrado")
 
     db_usuario = Usuario(
@@ -142,10 +184,12 @@ def criar_usuario_gmail(usuario: UsuarioGmailCreate, db: Session = Depends(get_d
         email=usuario.email,
         tipo_conta="gmail"
     )
-    db.add(db_usuario)
-    db.commit()
-    db.refresh(db_usuario)
-    return db_usuario
+    try:
+        return _inserir_usuario(db, db_usuario)
+    except IntegrityError:
+        # O email tambem e o login, entao qualquer das chaves unicas indica email repetido
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email ja cadastrado")
 
 
 @router.put("/{usuario_id}", response_model=UsuarioResponse)
@@ -163,7 +207,13 @@ def atualizar_usuario(usuario_id: int, usuario: UsuarioUpdate, db: Session = Dep
     for key, value in update_data.items():
         setattr(db_usuario, key, value)
 
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as erro:
+        db.rollback()
+        if _email_duplicado(erro):
+            raise HTTPException(status_code=400, detail="Email ja cadastrado")
+        raise HTTPException(status_code=400, detail="Login ja cadastrado")
     db.refresh(db_usuario)
     return db_usuario
 
@@ -1,7 +1,10 @@
 from .local import LocalCreate, LocalUpdate, LocalResponse
 from .tarefa import TarefaCreate, TarefaUpdate, TarefaResponse
 from .usuario import UsuarioCreate, UsuarioGmailCreate, UsuarioUpdate, UsuarioResponse, LoginRequest, LoginGmailRequest, LoginResponse
-from .tarefa_usuario import TarefaUsuarioCreate, TarefaUsuarioUpdate, TarefaUsuarioResponse
+from .tarefa_usuario import TarefaUsuarioCreate, TarefaUsuarioLoteCreate, TarefaUsuarioUpdate, TarefaUsuarioResponse
 from .category import CategoryCreate, CategoryUpdate, CategoryResponse
-from .tarefa_email import TarefaEmailCreate, TarefaEmailUpdate, TarefaEmailResponse
-from .tarefa_conclusao_diaria import TarefaDoDiaResponse, TarefaDoDiaUsuarioResponse, ConclusaoDiariaResponse, HistoricoConclusaoResponse
+from .tarefa_email import TarefaEmailCreate, TarefaEmailLoteCreate, TarefaEmailUpdate, TarefaEmailResponse
+from .tarefa_conclusao_diaria import TarefaDoDiaResponse, TarefaDoDiaUsuarioResponse, ConclusaoDiariaResponse, HistoricoConclusaoResponse, FamiliaDoDiaResponse, ConclusaoLoteRequest, ConclusaoLoteResponse
+from .lote import ItemCriadoLote, ErroItemLote, LoteCriadoResponse
+from .estatisticas import EstatisticaGrupo, EstatisticasResponse
+from .sincronizacao import AlteracoesTabela, SyncResponse
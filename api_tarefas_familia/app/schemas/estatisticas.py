@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date
+
+
+class EstatisticaGrupo(BaseModel):
+    data: Optional[date] = None
+    usuario_idUsuario: Optional[int] = None
+    email: Optional[str] = None
+    Nome: Optional[str] = None
+    Tarefa_idTarefa: Optional[int] = None
+    Tarefa_nome: Optional[str] = None
+    concluidas: int
+    atribuidas: int
+    taxa_conclusao: float
+    sequencia_atual: Optional[int] = None
+    maior_sequencia: Optional[int] = None
+
+
+class EstatisticasResponse(BaseModel):
+    data_inicio: date
+    data_fim: date
+    agrupar: str
+    concluidas: int
+    atribuidas: int
+    taxa_conclusao: float
+    sequencia_atual: int
+    maior_sequencia: int
+    grupos: List[EstatisticaGrupo]
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List
+
+# Itens aceitos por requisicao nos endpoints de lote
+MAX_ITENS_LOTE = 5000
+
+
+class ItemCriadoLote(BaseModel):
+    indice: int
+    id: int
+
+
+class ErroItemLote(BaseModel):
+    indice: int
+    detail: str
+
+
+class LoteCriadoResponse(BaseModel):
+    criados: List[ItemCriadoLote]
+    erros: List[ErroItemLote]
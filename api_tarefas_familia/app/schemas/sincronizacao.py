@@ -0,0 +1,30 @@
+from pydantic import BaseModel
+from typing import Generic, List, TypeVar
+
+from .category import CategoryResponse
+from .local import LocalResponse
+from .tarefa import TarefaResponse
+from .tarefa_conclusao_diaria import ConclusaoDiariaResponse
+from .tarefa_email import TarefaEmailResponse
+from .tarefa_usuario import TarefaUsuarioResponse
+
+# Linhas devolvidas por chamada (do registro de alteracoes)
+MAX_ALTERACOES_SYNC = 5000
+
+T = TypeVar("T")
+
+
+class AlteracoesTabela(BaseModel, Generic[T]):
+    alterados: List[T]
+    removidos: List[int]
+
+
+class SyncResponse(BaseModel):
+    versao: int
+    mais: bool
+    locais: AlteracoesTabela[LocalResponse]
+    categorias: AlteracoesTabela[CategoryResponse]
+    tarefas: AlteracoesTabela[TarefaResponse]
+    tarefas_email: AlteracoesTabela[TarefaEmailResponse]
+    tarefas_usuario: AlteracoesTabela[TarefaUsuarioResponse]
+    conclusoes: AlteracoesTabela[ConclusaoDiariaResponse]
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date
 
+from .lote import MAX_ITENS_LOTE
+
 
 class TarefaDoDiaResponse(BaseModel):
     tarefa_email_id: int
@@ -60,3 +62,46 @@ class HistoricoConclusaoResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TarefaDoDiaFamiliaItem(BaseModel):
+    tarefa_usuario_id: Optional[int] = None
+    tarefa_email_id: Optional[int] = None
+    Tarefa_idTarefa: int
+    Tarefa_nome: str
+    Tarefa_descricao: Optional[str] = None
+    concluida: bool
+    data_hora_conclusao: Optional[str] = None
+
+
+class PeriodoDoDiaResponse(BaseModel):
+    Periodo: Optional[str] = None
+    tarefas: List[TarefaDoDiaFamiliaItem]
+
+
+class MembroDoDiaResponse(BaseModel):
+    usuario_idUsuario: Optional[int] = None
+    email: Optional[str] = None
+    Nome: Optional[str] = None
+    periodos: List[PeriodoDoDiaResponse]
+
+
+class FamiliaDoDiaResponse(BaseModel):
+    data: date
+    membros: List[MembroDoDiaResponse]
+
+
+class ConclusaoLoteRequest(BaseModel):
+    tarefa_usuario_ids: List[int] = Field(default=[], max_length=MAX_ITENS_LOTE)
+    tarefa_email_ids: List[int] = Field(default=[], max_length=MAX_ITENS_LOTE)
+
+
+class ResultadoConclusaoLote(BaseModel):
+    id: int
+    resultado: str
+
+
+class ConclusaoLoteResponse(BaseModel):
+    data: date
+    tarefas_usuario: List[ResultadoConclusaoLote]
+    tarefas_email: List[ResultadoConclusaoLote]
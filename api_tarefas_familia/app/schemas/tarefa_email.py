@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date
 
+from .lote import MAX_ITENS_LOTE
+
 
 class TarefaEmailBase(BaseModel):
     Tarefa_idTarefa: int
@@ -16,6 +18,10 @@ class TarefaEmailCreate(TarefaEmailBase):
     pass
 
 
+class TarefaEmailLoteCreate(BaseModel):
+    itens: List[TarefaEmailCreate] = Field(..., min_length=1, max_length=MAX_ITENS_LOTE)
+
+
 class TarefaEmailUpdate(BaseModel):
     Tarefa_idTarefa: Optional[int] = None
     email: Optional[str] = None
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import date
 
+from .lote import MAX_ITENS_LOTE
+
 
 class TarefaUsuarioBase(BaseModel):
     usuario_idUsuario: int
@@ -16,6 +18,10 @@ class TarefaUsuarioCreate(TarefaUsuarioBase):
     pass
 
 
+class TarefaUsuarioLoteCreate(BaseModel):
+    itens: List[TarefaUsuarioCreate] = Field(..., min_length=1, max_length=MAX_ITENS_LOTE)
+
+
 class TarefaUsuarioUpdate(BaseModel):
     usuario_idUsuario: Optional[int] = None
     Tarefa_idTarefa: Optional[int] = None
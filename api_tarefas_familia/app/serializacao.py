@@ -0,0 +1,43 @@
+"""
+Serializacao rapida das respostas de leitura.
+
+Com response_model, o FastAPI valida de novo o que o endpoint retorna,
+passa tudo pelo jsonable_encoder e so entao gera o JSON. Para as linhas que
+vem do banco (confiaveis) o endpoint monta dicts com os campos do schema e
+responde com Serializador.resposta: o corpo sai de um TypeAdapter
+pre-compilado (uma validacao e a serializacao no pydantic-core) ou, com
+SERIALIZACAO_ORJSON=true e o orjson instalado, direto dos dicts pelo orjson,
+sem validacao. O response_model continua no decorator para o OpenAPI.
+"""
+import os
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele fica o TypeAdapter
+    orjson = None
+
+SERIALIZACAO_ORJSON = os.getenv("SERIALIZACAO_ORJSON", "false").lower() in ("1", "true", "sim")
+
+
+class Serializador:
+    """Gera o JSON de um tipo de resposta (ex.: List[Schema]) sem passar pelo response_model"""
+
+    def __init__(self, tipo, usar_orjson=None):
+        self.adaptador = TypeAdapter(tipo)
+        self.usar_orjson = SERIALIZACAO_ORJSON if usar_orjson is None else usar_orjson
+
+    def corpo(self, dados) -> bytes:
+        """
+        JSON dos dados. Listas de dicts com exatamente os campos do schema, na
+        ordem do schema, podem ir direto para o orjson; o resto passa pelo
+        TypeAdapter.
+        """
+        if self.usar_orjson and orjson is not None and isinstance(dados, list):
+            return orjson.dumps(dados)
+        return self.adaptador.dump_json(self.adaptador.validate_python(dados))
+
+    def resposta(self, dados, headers=None) -> Response:
+        return Response(content=self.corpo(dados), media_type="application/json", headers=headers)
@@ -0,0 +1,160 @@
+"""
+Registro de alteracoes para a sincronizacao incremental (/sync?since=N).
+
+Cada escrita nas tabelas sincronizadas grava, na mesma transacao, uma linha
+em alteracao com (tabela, registro_id, removido); o id auto-incremento dessa
+linha e a versao. As escritas pelo ORM sao registradas no after_flush da
+Session; as escritas em Core (INSERT ... SELECT, INSERT em lote, DELETE com
+WHERE) chamam registrar_alteracoes / registrar_alteracoes_onde.
+
+Antes da primeira linha em alteracao, a transacao trava a linha unica de
+alteracao_trava ate o commit ou rollback. As transacoes que gravam no
+registro ficam em fila, entao uma versao visivel garante que as menores ja
+foram commitadas ou descartadas: um buraco na sequencia e um rollback e a
+leitura passa por ele sem esperar.
+
+A leitura percorre o indice da chave primaria a partir de N, entao o custo
+depende do numero de alteracoes, nao do tamanho das tabelas.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import event, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from app.models.alteracao import Alteracao, AlteracaoTrava
+from app.models.category import Category
+from app.models.local import Local
+from app.models.tarefa import Tarefa
+from app.models.tarefa_conclusao_diaria import TarefaConclusaoDiaria
+from app.models.tarefa_email import TarefaEmail
+from app.models.tarefa_usuario import TarefaUsuario
+
+# Modelo sincronizado -> chave da resposta do /sync
+SINCRONIZADOS = {
+    Local: "locais",
+    Category: "categorias",
+    Tarefa: "tarefas",
+    TarefaEmail: "tarefas_email",
+    TarefaUsuario: "tarefas_usuario",
+    TarefaConclusaoDiaria: "conclusoes",
+}
+POR_TABELA = {modelo.__tablename__: modelo for modelo in SINCRONIZADOS}
+
+
+
+def _chave(modelo):
+    return list(modelo.__table__.primary_key.columns)[0]
+
+
+def _travar(session: Session):
+    """Trava alteracao_trava uma vez por transacao, antes de gravar em alteracao"""
+    conexao = session.connection()
+    transacao = session.get_transaction()
+    if session.info.get("alteracao_trava") is transacao:
+        return
+    resultado = conexao.execute(
+        update(AlteracaoTrava.__table__)
+        .where(AlteracaoTrava.id == 1)
+        .values(escritas=AlteracaoTrava.escritas + 1)
+    )
+    if resultado.rowcount != 1:
+        # Sem a linha o UPDATE nao trava nada e o /sync pode pular versoes
+        raise RuntimeError("Linha 1 de alteracao_trava ausente: aplique a migracao 0007")
+    session.info["alteracao_trava"] = transacao
+
+
+def registrar_alteracoes(db: Session, modelo, ids: Iterable[int], removido: bool = False):
+    """Registra, sem commit, alteracoes feitas fora do ORM nos ids informados"""
+    agora = datetime.now()
+    linhas = [
+        {"tabela": modelo.__tablename__, "registro_id": id, "removido": int(removido), "criado_em": agora}
+        for id in ids
+    ]
+    if linhas:
+        _travar(db)
+        db.connection().execute(insert(Alteracao.__table__), linhas)
+
+
+def registrar_alteracoes_onde(db: Session, modelo, *filtros, removido: bool = False):
+    """
+    Registra, sem commit, as linhas de modelo que atendem aos filtros, com um
+    INSERT ... SELECT. Para remocoes, chame antes do DELETE.
+    """
+    chave = _chave(modelo)
+    _travar(db)
+    db.execute(insert(Alteracao).from_select(
+        ["tabela", "registro_id", "removido", "criado_em"],
+        select(literal(modelo.__tablename__), chave, literal(int(removido)), literal(datetime.now()))
+        .where(*filtros)
+        .order_by(chave)
+    ))
+
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session, contexto):
+    """Registra o que o flush do ORM criou, alterou ou removeu nas tabelas sincronizadas"""
+    agora = datetime.now()
+    linhas = []
+    for objetos, removido in (
+        (session.new, 0),
+        ((o for o in session.dirty if session.is_modified(o, include_collections=False)), 0),
+        (session.deleted, 1),
+    ):
+        for objeto in objetos:
+            modelo = type(objeto)
+            if modelo in SINCRONIZADOS:
+                linhas.append({
+                    "tabela": modelo.__tablename__,
+                    "registro_id": getattr(objeto, _chave(modelo).key),
+                    "removido": removido,
+                    "criado_em": agora,
+                })
+    if linhas:
+        _travar(session)
+        session.connection().execute(insert(Alteracao.__table__), linhas)
+
+
+def ler_alteracoes(db: Session, since: int, limit: int) -> dict:
+    """
+    Alteracoes depois da versao since, no maximo limit linhas do registro.
+    Cada registro aparece uma vez, com o estado atual: em alterados (linha
+    completa) ou em removidos (id).
+    """
+    registros = db.execute(
+        select(Alteracao.versao, Alteracao.tabela, Alteracao.registro_id, Alteracao.removido)
+        .where(Alteracao.versao > since)
+        .order_by(Alteracao.versao)
+        .limit(limit + 1)
+    ).all()
+    mais = len(registros) > limit
+    registros = registros[:limit]
+
+    versao = registros[-1].versao if registros else since
+    ultimos: Dict[tuple, bool] = {}
+    for registro in registros:
+        ultimos[(registro.tabela, registro.registro_id)] = bool(registro.removido)
+
+    resposta = {"versao": versao, "mais": mais}
+    for modelo, nome in SINCRONIZADOS.items():
+        resposta[nome] = {"alterados": [], "removidos": []}
+    por_modelo: Dict[type, List[int]] = {}
+    for (tabela, registro_id), removido in ultimos.items():
+        modelo = POR_TABELA[tabela]
+        if removido:
+            resposta[SINCRONIZADOS[modelo]]["removidos"].append(registro_id)
+        else:
+            por_modelo.setdefault(modelo, []).append(registro_id)
+
+    for modelo, ids in por_modelo.items():
+        chave = _chave(modelo)
+        linhas = db.query(modelo).filter(chave.in_(ids)).order_by(chave).all()
+        secao = resposta[SINCRONIZADOS[modelo]]
+        secao["alterados"] = linhas
+        # Removido depois por um caminho sem registro (ex.: cascata no banco)
+        encontrados = {getattr(linha, chave.key) for linha in linhas}
+        secao["removidos"].extend(id for id in ids if id not in encontrados)
+
+    for nome in SINCRONIZADOS.values():
+        resposta[nome]["removidos"].sort()
+    return resposta
@@ -0,0 +1,111 @@
+"""
+Coalescencia (single-flight) de leituras identicas concorrentes.
+
+Requisicoes com a mesma chave (rota e parametros) que chegam enquanto a
+primeira ainda esta sendo calculada esperam o mesmo resultado, em vez de
+repetir as consultas. O resultado fica disponivel por mais SINGLEFLIGHT_JANELA_MS
+depois de pronto, para cobrir rajadas que chegam logo em seguida. Qualquer
+escrita que muda essas leituras chama invalidar(): quem chegar depois
+dela recalcula (quem ja esperava recebe o resultado em andamento).
+"""
+import asyncio
+import os
+import threading
+import time
+
+from fastapi import Request
+
+SINGLEFLIGHT_JANELA = float(os.getenv("SINGLEFLIGHT_JANELA_MS", "50")) / 1000
+
+
+class _Voo:
+    def __init__(self, tarefa: asyncio.Task, loop: asyncio.AbstractEventLoop):
+        self.tarefa = tarefa
+        self.loop = loop
+        self.terminou_em = None
+
+
+class SingleFlight:
+    """Compartilha o resultado de uma carga assincrona entre chamadas com a mesma chave"""
+
+    def __init__(self, nome, janela=SINGLEFLIGHT_JANELA):
+        self.nome = nome
+        self.janela = janela
+        self._voos = {}
+        self._lock = threading.Lock()
+        self.executadas = 0
+        self.compartilhadas = 0
+
+    def _aproveitavel(self, voo, loop):
+        if voo is None or voo.loop is not loop:
+            return False
+        if voo.terminou_em is None:
+            return True
+        return time.monotonic() - voo.terminou_em <= self.janela
+
+    async def executar(self, chave, carregar):
+        """
+        Retorna o resultado de carregar() (funcao async sem argumentos),
+        compartilhado com as chamadas concorrentes de mesma chave.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            voo = self._voos.get(chave)
+            lider = not self._aproveitavel(voo, loop)
+            if lider:
+                voo = _Voo(loop.create_task(carregar()), loop)
+                self._voos[chave] = voo
+                self.executadas += 1
+                voo.tarefa.add_done_callback(lambda tarefa: self._terminou(chave, voo))
+            else:
+                self.compartilhadas += 1
+        try:
+            return await asyncio.shield(voo.tarefa)
+        except asyncio.CancelledError:
+            # A carga usa a sessao do lider: ela so pode ser fechada depois
+            # que a carga termina
+            if lider and not voo.tarefa.done():
+                await asyncio.wait([voo.tarefa])
+            raise
+
+    def _terminou(self, chave, voo):
+        voo.terminou_em = time.monotonic()
+        if voo.tarefa.cancelled() or voo.tarefa.exception() is not None or self.janela <= 0:
+            self._descartar(chave, voo)
+        else:
+            voo.loop.call_later(self.janela, self._descartar, chave, voo)
+
+    def _descartar(self, chave, voo):
+        with self._lock:
+            if self._voos.get(chave) is voo:
+                del self._voos[chave]
+
+    def invalidar(self):
+        """Faz as proximas chamadas recalcularem (pode ser chamado de qualquer thread)"""
+        with self._lock:
+            self._voos.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "em_andamento": sum(1 for v in self._voos.values() if v.terminou_em is None),
+                "janela_ms": round(self.janela * 1000, 3),
+                "executadas": self.executadas,
+                "compartilhadas": self.compartilhadas,
+            }
+
+
+def chave_da_requisicao(request: Request):
+    """Rota, parametros de caminho e query string da requisicao"""
+    rota = request.scope.get("route")
+    return (
+        rota.path if rota is not None else request.url.path,
+        tuple(sorted(request.path_params.items())),
+        tuple(sorted(request.query_params.multi_items())),
+    )
+
+
+# Quadros do dia consultados por todos os aparelhos ao mesmo tempo
+leituras_tarefas_dia = SingleFlight("tarefas_dia")
+
+SINGLEFLIGHTS = (leituras_tarefas_dia,)
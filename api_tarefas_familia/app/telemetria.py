@@ -0,0 +1,201 @@
+"""
+Metricas por rota no formato de texto do Prometheus (GET /metrics).
+
+TelemetriaMiddleware mede cada requisicao pelo template da rota (ex.:
+/tarefas-dia/email/{email}, nunca o caminho com o email) e o status. Os
+eventos before/after_cursor_execute do SQLAlchemy e o checkout do pool
+somam, na medicao da requisicao atual (ContextVar), os comandos SQL, o
+tempo de SQL e a espera por conexao. A ContextVar chega ao threadpool e ao
+run_sync da AsyncSession, entao os dois modos de acesso ao banco contam.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICAS_ATIVAS = os.getenv("METRICAS_ATIVAS", "true").lower() in ("1", "true", "sim")
+
+BUCKETS_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_COMANDOS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Rota usada quando nenhuma rota bate, para nao criar uma serie por caminho
+ROTA_DESCONHECIDA = "desconhecida"
+
+
+class MedicaoRequisicao:
+    """O que a requisicao atual gastou no banco"""
+
+    __slots__ = ("comandos", "segundos_sql", "espera_pool")
+
+    def __init__(self):
+        self.comandos = 0
+        self.segundos_sql = 0.0
+        self.espera_pool = 0.0
+
+
+medicao_atual: ContextVar = ContextVar("medicao_requisicao", default=None)
+
+
+class Histograma:
+    """Contagem cumulativa por bucket, soma e total, como o histogram do Prometheus"""
+
+    __slots__ = ("buckets", "contagens", "soma", "total")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.contagens = [0] * len(buckets)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        indice = bisect_left(self.buckets, valor)
+        if indice < len(self.contagens):
+            self.contagens[indice] += 1
+        self.soma += valor
+        self.total += 1
+
+    def cumulativas(self):
+        acumulado = 0
+        for limite, contagem in zip(self.buckets, self.contagens):
+            acumulado += contagem
+            yield limite, acumulado
+
+
+class Coletor:
+    """Series por (metodo, rota) e (metodo, rota, status)"""
+
+    def __init__(self, ativo=METRICAS_ATIVAS):
+        self.ativo = ativo
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        with self._lock:
+            self.requisicoes = {}
+            self.duracao = {}
+            self.comandos = {}
+            self.segundos_sql = {}
+            self.espera_pool = {}
+
+    def registrar(self, metodo, rota, status, duracao, medicao: MedicaoRequisicao):
+        chave = (metodo, rota)
+        with self._lock:
+            self.requisicoes[chave + (status,)] = self.requisicoes.get(chave + (status,), 0) + 1
+            if chave not in self.duracao:
+                self.duracao[chave] = Histograma(BUCKETS_DURACAO)
+                self.comandos[chave] = Histograma(BUCKETS_COMANDOS)
+                self.segundos_sql[chave] = 0.0
+                self.espera_pool[chave] = 0.0
+            self.duracao[chave].observar(duracao)
+            self.comandos[chave].observar(medicao.comandos)
+            self.segundos_sql[chave] += medicao.segundos_sql
+            self.espera_pool[chave] += medicao.espera_pool
+
+    def exportar(self, extras=()):
+        """Texto no formato de exposicao do Prometheus (version 0.0.4)"""
+        linhas = []
+        with self._lock:
+            linhas += _cabecalho("api_requisicoes_total", "counter", "Requisicoes por rota e status")
+            for (metodo, rota, status), valor in sorted(self.requisicoes.items()):
+                linhas.append(f"api_requisicoes_total{_rotulos(metodo=metodo, rota=rota, status=status)} {valor}")
+            _histogramas(linhas, "api_requisicao_duracao_segundos", "Duracao das requisicoes", self.duracao)
+            _histogramas(linhas, "api_sql_comandos_por_requisicao", "Comandos SQL por requisicao", self.comandos)
+            linhas += _cabecalho("api_sql_segundos_total", "counter", "Tempo executando SQL")
+            for (metodo, rota), valor in sorted(self.segundos_sql.items()):
+                linhas.append(f"api_sql_segundos_total{_rotulos(metodo=metodo, rota=rota)} {valor!r}")
+            linhas += _cabecalho("api_pool_espera_segundos_total", "counter", "Tempo esperando conexao do pool")
+            for (metodo, rota), valor in sorted(self.espera_pool.items()):
+                linhas.append(f"api_pool_espera_segundos_total{_rotulos(metodo=metodo, rota=rota)} {valor!r}")
+        for nome, tipo, ajuda, series in extras:
+            linhas += _cabecalho(nome, tipo, ajuda)
+            for rotulos, valor in series:
+                linhas.append(f"{nome}{_rotulos(**rotulos)} {valor}")
+        return "\n".join(linhas) + "\n"
+
+
+def _cabecalho(nome, tipo, ajuda):
+    return [f"# HELP {nome} {ajuda}", f"# TYPE {nome} {tipo}"]
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(**rotulos):
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + "}"
+
+
+def _histogramas(linhas, nome, ajuda, series):
+    linhas += _cabecalho(nome, "histogram", ajuda)
+    for (metodo, rota), histograma in sorted(series.items()):
+        for limite, acumulado in histograma.cumulativas():
+            linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le=limite)} {acumulado}")
+        linhas.append(f"{nome}_bucket{_rotulos(metodo=metodo, rota=rota, le='+Inf')} {histograma.total}")
+        linhas.append(f"{nome}_sum{_rotulos(metodo=metodo, rota=rota)} {histograma.soma!r}")
+        linhas.append(f"{nome}_count{_rotulos(metodo=metodo, rota=rota)} {histograma.total}")
+
+
+coletor = Coletor()
+
+
+class TelemetriaMiddleware:
+    """Middleware ASGI que registra duracao, status e custo no banco de cada requisicao"""
+
+    def __init__(self, app, coletor_metricas=None):
+        self.app = app
+        self.coletor = coletor_metricas or coletor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.coletor.ativo:
+            await self.app(scope, receive, send)
+            return
+
+        medicao = MedicaoRequisicao()
+        token = medicao_atual.set(medicao)
+        status = 500
+        inicio = time.perf_counter()
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            medicao_atual.reset(token)
+            rota = scope.get("route")
+            self.coletor.registrar(
+                scope["method"], getattr(rota, "path", ROTA_DESCONHECIDA), str(status), duracao, medicao
+            )
+
+
+def registrar_espera_pool(espera):
+    """Soma a espera por conexao (checkout do pool) na requisicao atual"""
+    medicao = medicao_atual.get()
+    if medicao is not None:
+        medicao.espera_pool += espera
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_do_comando(conn, cursor, statement, parameters, context, executemany):
+    if medicao_atual.get() is not None:
+        conn.info["telemetria_inicio"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_do_comando(conn, cursor, statement, parameters, context, executemany):
+    medicao = medicao_atual.get()
+    inicio = conn.info.pop("telemetria_inicio", None)
+    if medicao is None or inicio is None:
+        return
+    medicao.comandos += 1
+    medicao.segundos_sql += time.perf_counter() - inicio
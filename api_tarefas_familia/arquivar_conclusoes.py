@@ -0,0 +1,30 @@
+"""
+Move as conclusoes antigas de tarefa_conclusao_diaria para tarefa_conclusao_arquivo
+
+    python arquivar_conclusoes.py              # mantem ARQUIVO_DIAS dias (padrao: 90)
+    python arquivar_conclusoes.py --dias 30 --lote 500
+"""
+import argparse
+
+from app.arquivo import ARQUIVO_DIAS, ARQUIVO_LOTE, arquivar_conclusoes, data_de_corte
+from app.database import SessionLocal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retencao das conclusoes diarias")
+    parser.add_argument("--dias", type=int, default=ARQUIVO_DIAS, help="dias mantidos na tabela quente")
+    parser.add_argument("--lote", type=int, default=ARQUIVO_LOTE, help="linhas movidas por transacao")
+    args = parser.parse_args()
+
+    corte = data_de_corte(args.dias)
+    with SessionLocal() as db:
+        total = arquivar_conclusoes(db, corte, args.lote)
+    print(f"Conclusoes anteriores a {corte} arquivadas: {total}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Erro: {e}")
+        raise SystemExit(1)
@@ -0,0 +1,32 @@
+"""
+Reconstroi o resumo diario de conclusoes (tarefa_conclusao_resumo) a partir
+do historico em tarefa_conclusao_diaria
+
+    python backfill_resumo.py                                  # todo o historico
+    python backfill_resumo.py --inicio 2026-01-01 --fim 2026-03-31
+"""
+import argparse
+from datetime import date
+
+from app.database import SessionLocal
+from app.resumo import reconstruir_resumo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill do resumo diario de conclusoes")
+    parser.add_argument("--inicio", type=date.fromisoformat, default=None, help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--fim", type=date.fromisoformat, default=None, help="ultimo dia (AAAA-MM-DD)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        linhas = reconstruir_resumo(db, args.inicio, args.fim)
+        db.commit()
+    print(f"Resumo reconstruido: {linhas} linhas gravadas")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Erro: {e}")
+        raise SystemExit(1)
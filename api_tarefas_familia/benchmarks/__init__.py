@@ -0,0 +1,8 @@
+"""
+Benchmarks da API. Rodam a partir da pasta api_tarefas_familia:
+
+    python -m benchmarks.commit_em_grupo
+
+Sem DATABASE_URL definida usam um SQLite temporario; para numeros proximos
+da producao aponte DATABASE_URL para um MySQL de teste (nunca o de producao).
+"""
@@ -0,0 +1,22 @@
+"""
+Preparacao comum dos benchmarks: precisa ser importado antes de app.*,
+porque a configuracao do banco e lida das variaveis de ambiente no import
+"""
+import os
+import statistics
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='bench_tarefas_')}/bench.db"
+# O benchmark dispara tudo de um mesmo IP e mede a aplicacao, nao a admissao
+os.environ.setdefault("LIMITES_ATIVOS", "false")
+os.environ.setdefault("DB_MAX_CONCORRENCIA", "1000")
+
+
+def percentil(valores, p):
+    """Percentil p (0-100) de uma lista de valores"""
+    if not valores:
+        return 0.0
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
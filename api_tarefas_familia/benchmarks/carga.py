@@ -0,0 +1,395 @@
+"""
+Teste de carga: latencia e vazao por endpoint com um banco populado em
+varias escalas
+
+    python -m benchmarks.carga
+    python -m benchmarks.carga --escalas pequena,media,grande --clientes 64 --duracao 30
+    python -m benchmarks.carga --escalas 50x20x60 --mix concluir=40,historico=0
+    python -m benchmarks.carga --comparar benchmarks/resultados/carga-20261001-101500.json
+
+Cada escala (familias x tarefas por familia x dias de historico) e
+populada do zero: por familia um responsavel com login e senha e
+MEMBROS_GMAIL membros Gmail, as tarefas divididas entre eles e as
+conclusoes dos dias anteriores (com o arquivo e o resumo como em producao).
+Depois --clientes clientes assincronos disparam contra a aplicacao real
+(ASGI, sem rede) a mistura de trafego abaixo durante --duracao segundos:
+os quadros do dia com If-None-Match (polling), os dois logins, conclusoes
+do dia (desfeitas quando todas ja foram concluidas) e a primeira pagina do
+historico. Os primeiros --aquecimento segundos nao entram na conta.
+
+Mostra por endpoint requisicoes, req/s e p50/p95/p99 e grava tudo em JSON
+(--saida) para comparar execucoes com --comparar. O banco e APAGADO a cada
+escala: com DATABASE_URL apontando para um banco que ja tem dados e
+preciso --limpar (nunca aponte para o banco de producao).
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from benchmarks import ambiente  # noqa: F401 (configura o ambiente antes do app)
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.arquivo import arquivar_conclusoes, data_de_corte
+from app.cache import CACHES
+from app.database import Base, SessionLocal, engine
+from app.models import AlteracaoTrava, Tarefa, TarefaConclusaoDiaria, TarefaEmail, TarefaUsuario, Usuario
+from app.resumo import reconstruir_resumo
+from app.routers.usuario import hash_senha
+from app.singleflight import SINGLEFLIGHTS
+from migrations import migrar
+
+# (familias, tarefas por familia, dias de historico)
+ESCALAS = {
+    "pequena": (10, 10, 30),
+    "media": (100, 20, 90),
+    "grande": (300, 25, 365),
+}
+
+# Peso de cada tipo de trafego na mistura (--mix altera)
+MIX = {
+    "quadro_email": 30,
+    "quadro_usuario": 25,
+    "quadro_familia": 5,
+    "login": 5,
+    "login_gmail": 5,
+    "concluir": 15,
+    "historico": 15,
+}
+
+MEMBROS_GMAIL = 2
+SENHA = "bench"
+PERIODOS = ("Manha", "Tarde", "Noite")
+# Fracao das atribuicoes concluidas em cada dia do historico
+TAXA_CONCLUSAO = 0.7
+PAGINA_HISTORICO = 100
+LOTE_INSERT = 10000
+
+RESULTADOS = Path(__file__).parent / "resultados"
+
+
+def escala_de(texto):
+    """Nome de ESCALAS ou FAMILIASxTAREFASxDIAS"""
+    if texto in ESCALAS:
+        return texto, ESCALAS[texto]
+    try:
+        familias, tarefas, dias = (int(parte) for parte in texto.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"escala invalida: {texto} (use {', '.join(ESCALAS)} ou 50x20x60)")
+    return texto, (familias, tarefas, dias)
+
+
+def mix_de(texto):
+    """nome=peso,nome=peso sobre o MIX padrao"""
+    mix = dict(MIX)
+    for item in filter(None, texto.split(",")):
+        nome, _, peso = item.partition("=")
+        if nome not in MIX or not peso.isdigit():
+            raise argparse.ArgumentTypeError(f"mix invalido: {item} (tipos: {', '.join(MIX)})")
+        mix[nome] = int(peso)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix sem nenhum peso")
+    return mix
+
+
+def limpar_banco():
+    with engine.begin() as conn:
+        for tabela in reversed(Base.metadata.sorted_tables):
+            # A linha de alteracao_trava fica: sem ela as escritas nao travam o /sync
+            if tabela is not AlteracaoTrava.__table__:
+                conn.execute(tabela.delete())
+    for cache in CACHES:
+        cache.invalidar()
+    for singleflight in SINGLEFLIGHTS:
+        singleflight.invalidar()
+
+
+def _em_lotes(db, modelo, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) == LOTE_INSERT:
+            db.execute(insert(modelo), lote)
+            lote = []
+    if lote:
+        db.execute(insert(modelo), lote)
+
+
+def popular(familias, tarefas, dias, semente):
+    """Popula o banco vazio e retorna os donos e atribuicoes usados pela carga"""
+    rnd = random.Random(semente)
+    hoje = date.today()
+    with SessionLocal() as db:
+        senha = hash_senha(SENHA)
+        usuarios = []
+        for f in range(familias):
+            usuarios.append({"Nome": f"Responsavel {f}", "login": f"resp{f}", "senha": senha, "tipo_conta": "simples"})
+            for m in range(MEMBROS_GMAIL):
+                email = f"membro{m}.familia{f}@bench.local"
+                usuarios.append({"Nome": f"Membro {m} {f}", "login": email, "email": email, "tipo_conta": "gmail"})
+        _em_lotes(db, Usuario, usuarios)
+        id_por_login = dict(db.execute(select(Usuario.login, Usuario.idUsuario)).all())
+
+        _em_lotes(db, Tarefa, (
+            {"Tarefa": f"Tarefa {t} da familia {f}", "Descricao": f"Descricao da tarefa {t}"}
+            for f in range(familias) for t in range(tarefas)
+        ))
+        tarefa_ids = db.execute(select(Tarefa.idTarefa).order_by(Tarefa.idTarefa)).scalars().all()
+
+        # A tarefa t fica com o responsavel (t % donos == 0) ou com um membro Gmail
+        donos = 1 + MEMBROS_GMAIL
+        por_usuario, por_email = [], []
+        for f in range(familias):
+            for t in range(tarefas):
+                linha = {"Tarefa_idTarefa": tarefa_ids[f * tarefas + t], "Periodo": PERIODOS[t % len(PERIODOS)]}
+                if t % donos == 0:
+                    por_usuario.append(dict(linha, usuario_idUsuario=id_por_login[f"resp{f}"]))
+                else:
+                    por_email.append(dict(linha, email=f"membro{t % donos - 1}.familia{f}@bench.local"))
+        _em_lotes(db, TarefaUsuario, por_usuario)
+        _em_lotes(db, TarefaEmail, por_email)
+        atribuicoes_usuario = db.execute(select(TarefaUsuario.id)).scalars().all()
+        atribuicoes_email = db.execute(select(TarefaEmail.id)).scalars().all()
+
+        def conclusoes():
+            for coluna, ids in (("tarefa_usuario_id", atribuicoes_usuario), ("tarefa_email_id", atribuicoes_email)):
+                for id in ids:
+                    for d in range(1, dias + 1):
+                        if rnd.random() < TAXA_CONCLUSAO:
+                            dia = hoje - timedelta(days=d)
+                            yield {"tarefa_usuario_id": None, "tarefa_email_id": None, coluna: id, "data": dia,
+                                   "data_hora_conclusao": f"{dia} 0{rnd.randint(6, 9)}:00:00", "status": 1}
+
+        _em_lotes(db, TarefaConclusaoDiaria, conclusoes())
+        db.commit()
+
+        # Historico como em producao: o que passou do horizonte vai para o arquivo
+        arquivadas = arquivar_conclusoes(db, data_de_corte(), tamanho_lote=LOTE_INSERT, log=lambda *_: None)
+        reconstruir_resumo(db)
+        db.commit()
+        linhas = {
+            "usuarios": len(usuarios),
+            "atribuicoes": len(atribuicoes_usuario) + len(atribuicoes_email),
+            "conclusoes": db.execute(select(func.count()).select_from(TarefaConclusaoDiaria)).scalar(),
+            "arquivadas": arquivadas,
+        }
+
+    return {
+        "responsaveis": [(f"resp{f}", id_por_login[f"resp{f}"]) for f in range(familias)],
+        "emails": [f"membro{m}.familia{f}@bench.local" for f in range(familias) for m in range(MEMBROS_GMAIL)],
+        "atribuicoes": [("usuario", id) for id in atribuicoes_usuario] + [("email", id) for id in atribuicoes_email],
+        "linhas": linhas,
+    }
+
+
+class Carga:
+    """Estado compartilhado pelos clientes de uma escala e as latencias por rota"""
+
+    def __init__(self, cliente, dados, mix, semente):
+        self.cliente = cliente
+        self.responsaveis = dados["responsaveis"]
+        self.emails = dados["emails"]
+        self.pendentes = list(dados["atribuicoes"])
+        self.concluidas = []
+        self.etags = {}
+        self.rnd = random.Random(semente)
+        self.operacoes = [getattr(self, nome) for nome in mix]
+        self.pesos = list(mix.values())
+        self.medir_a_partir = 0.0
+        self.medicoes = defaultdict(list)
+
+    async def pedir(self, rota, metodo, url, **kwargs):
+        inicio = time.perf_counter()
+        response = await self.cliente.request(metodo, url, **kwargs)
+        if inicio >= self.medir_a_partir:
+            self.medicoes[rota].append(((time.perf_counter() - inicio) * 1000, response.status_code))
+        return response
+
+    async def _quadro(self, rota, url):
+        etag = self.etags.get(url)
+        response = await self.pedir(rota, "GET", url, headers={"If-None-Match": etag} if etag else None)
+        if response.status_code == 200 and "etag" in response.headers:
+            self.etags[url] = response.headers["etag"]
+
+    async def quadro_email(self):
+        email = self.rnd.choice(self.emails)
+        await self._quadro("GET /tarefas-dia/email/{email}", f"/tarefas-dia/email/{email}")
+
+    async def quadro_usuario(self):
+        _, id = self.rnd.choice(self.responsaveis)
+        await self._quadro("GET /tarefas-dia/usuario/{usuario_id}", f"/tarefas-dia/usuario/{id}")
+
+    async def quadro_familia(self):
+        await self._quadro("GET /tarefas-dia/familia", "/tarefas-dia/familia")
+
+    async def login(self):
+        login, _ = self.rnd.choice(self.responsaveis)
+        await self.pedir("POST /usuarios/login", "POST", "/usuarios/login", json={"login": login, "senha": SENHA})
+
+    async def login_gmail(self):
+        email = self.rnd.choice(self.emails)
+        await self.pedir("POST /usuarios/login/gmail", "POST", "/usuarios/login/gmail", json={"email": email})
+
+    async def concluir(self):
+        """Conclui uma atribuicao pendente hoje; sem pendentes, desfaz uma concluida"""
+        fila, destino, acao = self.pendentes, self.concluidas, "concluir"
+        if not fila:
+            fila, destino, acao = self.concluidas, self.pendentes, "desfazer"
+            if not fila:
+                return
+        indice = self.rnd.randrange(len(fila))
+        fila[indice], fila[-1] = fila[-1], fila[indice]
+        origem, id = fila.pop()
+        coluna = "tarefa_usuario_id" if origem == "usuario" else "tarefa_email_id"
+        metodo = "POST" if acao == "concluir" else "DELETE"
+        await self.pedir(f"{metodo} /tarefas-dia/{origem}/{{{coluna}}}/{acao}", metodo, f"/tarefas-dia/{origem}/{id}/{acao}")
+        destino.append((origem, id))
+
+    async def historico(self):
+        if self.rnd.random() < 0.5:
+            email = self.rnd.choice(self.emails)
+            rota, url = "GET /tarefas-dia/email/{email}/historico", f"/tarefas-dia/email/{email}/historico"
+        else:
+            _, id = self.rnd.choice(self.responsaveis)
+            rota, url = "GET /tarefas-dia/usuario/{usuario_id}/historico", f"/tarefas-dia/usuario/{id}/historico"
+        await self.pedir(rota, "GET", url, params={"limit": PAGINA_HISTORICO})
+
+    async def cliente_virtual(self, fim):
+        while time.perf_counter() < fim:
+            operacao = self.rnd.choices(self.operacoes, self.pesos)[0]
+            await operacao()
+
+
+async def disparar(app, dados, mix, clientes, duracao, aquecimento, semente):
+    """Roda a carga e retorna as medicoes por rota e os segundos medidos"""
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        carga = Carga(cliente, dados, mix, semente)
+        inicio = time.perf_counter()
+        carga.medir_a_partir = inicio + aquecimento
+        fim = carga.medir_a_partir + duracao
+        await asyncio.gather(*(carga.cliente_virtual(fim) for _ in range(clientes)))
+        medido = time.perf_counter() - carga.medir_a_partir
+    return carga.medicoes, medido
+
+
+def resumir(medicoes, segundos):
+    latencias = sorted(latencia for latencia, _ in medicoes)
+    status = defaultdict(int)
+    for _, codigo in medicoes:
+        status[str(codigo)] += 1
+    return {
+        "requisicoes": len(medicoes),
+        "req_s": len(medicoes) / segundos,
+        "p50_ms": ambiente.percentil(latencias, 50),
+        "p95_ms": ambiente.percentil(latencias, 95),
+        "p99_ms": ambiente.percentil(latencias, 99),
+        "erros": sum(n for codigo, n in status.items() if int(codigo) >= 500),
+        "status": dict(sorted(status.items())),
+    }
+
+
+def imprimir(rotas, total):
+    print(f"  {'rota':<58} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status")
+    for rota, r in sorted(rotas.items()) + [("total", total)]:
+        print(f"  {rota:<58} {r['requisicoes']:>7} {r['req_s']:>8.1f} {r['p50_ms']:>8.1f} "
+              f"{r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f}  {r['status']}")
+
+
+def comparar(anterior, atual):
+    """req/s e p95 da execucao atual contra uma anterior, por escala e rota"""
+    print(f"\ncomparacao com {anterior['data']} (commit {anterior.get('commit') or '?'})")
+    escalas_anteriores = {e["nome"]: e for e in anterior["escalas"]}
+    for escala in atual["escalas"]:
+        antes = escalas_anteriores.get(escala["nome"])
+        if not antes:
+            print(f"\n{escala['nome']}: nao existe na execucao anterior")
+            continue
+        print(f"\n{escala['nome']}")
+        print(f"  {'rota':<58} {'req/s antes':>11} {'agora':>8} {'dif':>7} {'p95 antes':>10} {'agora':>8} {'dif':>7}")
+        rotas_antes = dict(antes["rotas"], total=antes["total"])
+        for rota, r in sorted(escala["rotas"].items()) + [("total", escala["total"])]:
+            a = rotas_antes.get(rota)
+            if not a or not a["req_s"] or not a["p95_ms"]:
+                continue
+            print(f"  {rota:<58} {a['req_s']:>11.1f} {r['req_s']:>8.1f} {(r['req_s'] / a['req_s'] - 1) * 100:>+6.0f}% "
+                  f"{a['p95_ms']:>10.1f} {r['p95_ms']:>8.1f} {(r['p95_ms'] / a['p95_ms'] - 1) * 100:>+6.0f}%")
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga por endpoint com banco populado")
+    parser.add_argument("--escalas", default="pequena,media",
+                        type=lambda texto: [escala_de(e) for e in texto.split(",")],
+                        help=f"{', '.join(ESCALAS)} ou FAMILIASxTAREFASxDIAS, separadas por virgula")
+    parser.add_argument("--clientes", type=int, default=32)
+    parser.add_argument("--duracao", type=float, default=10.0, help="segundos medidos por escala")
+    parser.add_argument("--aquecimento", type=float, default=2.0, help="segundos iniciais descartados")
+    parser.add_argument("--mix", type=mix_de, default=dict(MIX), help="pesos, ex.: concluir=40,historico=0")
+    parser.add_argument("--semente", type=int, default=1)
+    parser.add_argument("--saida", type=Path, default=None, help="arquivo JSON (padrao: benchmarks/resultados/)")
+    parser.add_argument("--comparar", type=Path, default=None, help="JSON de uma execucao anterior")
+    parser.add_argument("--limpar", action="store_true", help="apaga os dados de um banco que nao esta vazio")
+    args = parser.parse_args()
+    mix = {nome: peso for nome, peso in args.mix.items() if peso}
+
+    migrar(engine, log=lambda *_: None)
+    with SessionLocal() as db:
+        if db.execute(select(func.count()).select_from(Usuario)).scalar() and not args.limpar:
+            parser.error(f"o banco {engine.url.render_as_string()} ja tem dados; use --limpar para apaga-los")
+    from main import app
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "banco": engine.url.get_backend_name(),
+        "parametros": {"clientes": args.clientes, "duracao": args.duracao, "aquecimento": args.aquecimento,
+                       "mix": mix, "semente": args.semente},
+        "escalas": [],
+    }
+    print(f"banco {resultado['banco']}, {args.clientes} clientes, {args.duracao:g} s por escala, mix {mix}")
+    for nome, (familias, tarefas, dias) in args.escalas:
+        limpar_banco()
+        inicio = time.perf_counter()
+        dados = popular(familias, tarefas, dias, args.semente)
+        populado = time.perf_counter() - inicio
+        print(f"\n{nome}: {familias} familias x {tarefas} tarefas x {dias} dias, {dados['linhas']} "
+              f"(populado em {populado:.1f} s)")
+
+        medicoes, segundos = asyncio.run(disparar(
+            app, dados, mix, args.clientes, args.duracao, args.aquecimento, args.semente
+        ))
+        rotas = {rota: resumir(valores, segundos) for rota, valores in medicoes.items()}
+        total = resumir([m for valores in medicoes.values() for m in valores], segundos)
+        imprimir(rotas, total)
+        resultado["escalas"].append({
+            "nome": nome, "familias": familias, "tarefas": tarefas, "dias": dias,
+            "linhas": dados["linhas"], "segundos_populando": populado, "segundos_medidos": segundos,
+            "rotas": rotas, "total": total,
+        })
+
+    saida = args.saida or RESULTADOS / f"carga-{datetime.now():%Y%m%d-%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False))
+    print(f"\nresultados gravados em {saida}")
+    if args.comparar:
+        comparar(json.loads(args.comparar.read_text()), resultado)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Conclusoes por segundo e commits com e sem o commit em grupo
+
+    python -m benchmarks.commit_em_grupo
+    python -m benchmarks.commit_em_grupo --requisicoes 5000 --concorrencia 128 --latencia-commit-ms 10
+
+Dispara POST /tarefas-dia/usuario/{id}/concluir em paralelo contra a
+aplicacao (ASGI, sem rede) nos dois modos. --latencia-commit-ms soma uma
+espera a cada COMMIT para simular o round trip ate o MySQL remoto; com
+DATABASE_URL apontando para um MySQL de teste use --latencia-commit-ms 0.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks import ambiente  # noqa: F401 (configura o ambiente antes do app)
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.database import SessionLocal, engine
+from app.models import Tarefa, TarefaUsuario, Usuario
+from migrations import migrar
+
+
+def popular(quantidade):
+    """Cria um usuario com quantidade atribuicoes e retorna os ids delas"""
+    with SessionLocal() as db:
+        usuario = Usuario(Nome="Bench", login=f"bench{time.time_ns()}", senha="x")
+        db.add(usuario)
+        db.flush()
+        tarefa = Tarefa(Tarefa="Bench")
+        db.add(tarefa)
+        db.flush()
+        db.execute(insert(TarefaUsuario), [
+            {"usuario_idUsuario": usuario.idUsuario, "Tarefa_idTarefa": tarefa.idTarefa, "Periodo": "Manha"}
+            for _ in range(quantidade)
+        ])
+        ids = [a.id for a in db.query(TarefaUsuario.id).filter(TarefaUsuario.usuario_idUsuario == usuario.idUsuario)]
+        db.commit()
+    return ids
+
+
+async def disparar(app, ids, concorrencia):
+    """Conclui os ids com no maximo concorrencia requisicoes em andamento"""
+    fila = asyncio.Queue()
+    for id in ids:
+        fila.put_nowait(id)
+    latencias, status = [], {}
+
+    async def trabalhador(cliente):
+        while not fila.empty():
+            id = fila.get_nowait()
+            inicio = time.perf_counter()
+            response = await cliente.post(f"/tarefas-dia/usuario/{id}/concluir")
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            status[response.status_code] = status.get(response.status_code, 0) + 1
+
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        await asyncio.gather(*(trabalhador(cliente) for _ in range(concorrencia)))
+    return latencias, status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do commit em grupo das conclusoes")
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--concorrencia", type=int, default=64)
+    parser.add_argument("--latencia-commit-ms", type=float, default=5.0)
+    parser.add_argument("--janela-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    migrar(engine, log=lambda *_: None)
+    from main import app
+    from app.routers.tarefa_conclusao_diaria import conclusoes_em_grupo
+
+    commits = 0
+
+    @event.listens_for(engine, "commit")
+    def ao_commit(conexao):
+        nonlocal commits
+        commits += 1
+        if args.latencia_commit_ms:
+            time.sleep(args.latencia_commit_ms / 1000)
+
+    print(f"{args.requisicoes} conclusoes, concorrencia {args.concorrencia}, "
+          f"latencia de commit {args.latencia_commit_ms} ms, banco {engine.url.get_backend_name()}")
+    print(f"{'modo':<10} {'concl/s':>9} {'commits':>8} {'commits/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  status")
+    for modo, ativo in (("avulso", False), ("grupo", True)):
+        ids = popular(args.requisicoes)
+        conclusoes_em_grupo.ativo = ativo
+        conclusoes_em_grupo.janela = args.janela_ms / 1000
+        commits = 0
+        inicio = time.perf_counter()
+        latencias, status = asyncio.run(disparar(app, ids, args.concorrencia))
+        duracao = time.perf_counter() - inicio
+        print(
+            f"{modo:<10} {len(latencias) / duracao:>9.0f} {commits:>8} {commits / duracao:>10.0f} "
+            f"{ambiente.percentil(latencias, 50):>8.1f} {ambiente.percentil(latencias, 95):>8.1f} "
+            f"{ambiente.percentil(latencias, 99):>8.1f}  {status}"
+        )
+
+
+if __name__ == "__main__":
+    main()
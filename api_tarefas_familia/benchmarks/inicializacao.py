@@ -0,0 +1,113 @@
+"""
+Tempo de inicializacao: do inicio do processo ate a primeira resposta
+
+    python -m benchmarks.inicializacao
+    python -m benchmarks.inicializacao --vezes 10 --uvicorn
+
+Cada rodada e um processo Python novo, que mede o import de main, o tempo
+ate a primeira resposta de /health (ASGI, sem rede) e quantas conexoes com
+o banco foram abertas. Com --uvicorn tambem sobe o servidor de verdade e
+mede do spawn ate o primeiro 200 em /health, como a readinessProbe ve.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FILHO = """
+import json, time
+inicio = time.perf_counter()
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+conexoes = []
+event.listen(Pool, "connect", lambda *args: conexoes.append(args))
+
+import main
+importado = time.perf_counter()
+
+import asyncio, httpx
+
+async def primeira():
+    transporte = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        return (await cliente.get("/health")).status_code
+
+status = asyncio.run(primeira())
+fim = time.perf_counter()
+print(json.dumps({
+    "import_ms": (importado - inicio) * 1000,
+    "primeira_resposta_ms": (fim - inicio) * 1000,
+    "status": status,
+    "conexoes": len(conexoes),
+}))
+"""
+
+
+def rodada_asgi(ambiente):
+    inicio = time.perf_counter()
+    saida = subprocess.run(
+        [sys.executable, "-c", FILHO], cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    ).stdout
+    medida = json.loads(saida.strip().splitlines()[-1])
+    medida["processo_ms"] = (time.perf_counter() - inicio) * 1000
+    return medida
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rodada_uvicorn(ambiente, timeout=60):
+    porta = porta_livre()
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(porta), "--log-level", "warning"],
+        cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - inicio < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{porta}/health", timeout=1) as resposta:
+                    if resposta.status == 200:
+                        return (time.perf_counter() - inicio) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("uvicorn nao respondeu /health")
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de inicializacao da API")
+    parser.add_argument("--vezes", type=int, default=5)
+    parser.add_argument("--uvicorn", action="store_true", help="mede tambem o servidor uvicorn")
+    args = parser.parse_args()
+
+    ambiente = dict(os.environ)
+    # Sem DATABASE_URL, um banco que nem existe: a inicializacao nao pode depender dele
+    ambiente.setdefault("DATABASE_URL", "sqlite:////nao/existe/tarefas.db")
+
+    medidas = [rodada_asgi(ambiente) for _ in range(args.vezes)]
+    print(f"{args.vezes} rodadas, banco {ambiente['DATABASE_URL'].split(':')[0]}")
+    for chave in ("import_ms", "primeira_resposta_ms", "processo_ms"):
+        valores = [m[chave] for m in medidas]
+        print(f"{chave:<22} mediana {statistics.median(valores):8.1f}  min {min(valores):8.1f}  max {max(valores):8.1f}")
+    print(f"{'conexoes abertas':<22} {max(m['conexoes'] for m in medidas)}")
+
+    if args.uvicorn:
+        valores = [rodada_uvicorn(ambiente) for _ in range(args.vezes)]
+        print(f"{'uvicorn ate /health':<22} mediana {statistics.median(valores):8.1f}  min {min(valores):8.1f}  max {max(valores):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
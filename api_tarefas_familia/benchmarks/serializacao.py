@@ -0,0 +1,121 @@
+"""
+Respostas por segundo em listas grandes: caminho padrao do FastAPI x
+Serializador (TypeAdapter) x orjson
+
+    python -m benchmarks.serializacao
+    python -m benchmarks.serializacao --linhas 10000 --vezes 20
+
+Mede so a serializacao (as mesmas linhas em memoria) e a requisicao inteira
+em GET /tarefas-dia/email/{email}/historico com um historico de --linhas
+conclusoes. O caminho padrao e o de antes: um modelo Pydantic por linha e o
+response_model validando e codificando de novo.
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import List
+
+from benchmarks import ambiente  # noqa: F401 (configura o ambiente antes do app)
+
+import httpx
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import insert
+
+from app.database import Executor, SessionLocal, engine, get_db_executor
+from app.models import Tarefa, TarefaConclusaoDiaria, TarefaEmail
+from app.schemas.tarefa_conclusao_diaria import HistoricoConclusaoResponse
+from app.serializacao import Serializador, orjson
+from migrations import migrar
+
+EMAIL = "bench@gmail.com"
+
+
+def popular(linhas):
+    """Uma atribuicao por email com uma conclusao por dia, linhas dias para tras"""
+    with SessionLocal() as db:
+        tarefa = Tarefa(Tarefa="Bench", Descricao="Tarefa do benchmark")
+        db.add(tarefa)
+        db.flush()
+        atribuicao = TarefaEmail(Tarefa_idTarefa=tarefa.idTarefa, email=EMAIL, Periodo="Manha")
+        db.add(atribuicao)
+        db.flush()
+        hoje = date.today()
+        db.execute(insert(TarefaConclusaoDiaria), [
+            {"tarefa_email_id": atribuicao.id, "data": hoje - timedelta(days=i),
+             "data_hora_conclusao": f"{hoje - timedelta(days=i)} 08:00:00", "status": 1}
+            for i in range(linhas)
+        ])
+        db.commit()
+
+
+def medir(nome, fn, vezes):
+    fn()
+    inicio = time.perf_counter()
+    for _ in range(vezes):
+        fn()
+    duracao = (time.perf_counter() - inicio) / vezes
+    print(f"{nome:<34} {duracao * 1000:>9.1f} ms {1 / duracao:>9.1f} /s")
+    return duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da serializacao de listas grandes")
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--vezes", type=int, default=10)
+    args = parser.parse_args()
+
+    migrar(engine, log=lambda *_: None)
+    popular(args.linhas)
+    from main import app
+    from app.routers import tarefa_conclusao_diaria as rotas
+
+    with SessionLocal() as db:
+        linhas, _ = rotas._historico_conclusoes_email(db, EMAIL, None, None, None, None)
+    print(f"{len(linhas)} linhas, banco {engine.url.get_backend_name()}, orjson {'sim' if orjson else 'nao instalado'}")
+
+    print("\nso a serializacao")
+    campo = create_response_field(name="Response", type_=List[HistoricoConclusaoResponse], mode="serialization")
+
+    def padrao():
+        modelos = [HistoricoConclusaoResponse(**linha) for linha in linhas]
+        conteudo = asyncio.run(serialize_response(field=campo, response_content=modelos))
+        return JSONResponse(conteudo).body
+
+    base = medir("padrao (modelos + response_model)", padrao, args.vezes)
+    adaptador = Serializador(List[HistoricoConclusaoResponse], usar_orjson=False)
+    tempo = medir("TypeAdapter", lambda: adaptador.corpo(linhas), args.vezes)
+    print(f"{'':<34} {base / tempo:>9.1f}x")
+    if orjson:
+        rapido = Serializador(List[HistoricoConclusaoResponse], usar_orjson=True)
+        tempo = medir("orjson", lambda: rapido.corpo(linhas), args.vezes)
+        print(f"{'':<34} {base / tempo:>9.1f}x")
+
+    # O endpoint como era antes, para comparar a requisicao inteira
+    @app.get("/bench/historico-padrao", response_model=List[HistoricoConclusaoResponse])
+    async def historico_padrao(db: Executor = Depends(get_db_executor)):
+        resultado, _ = await db.run(rotas._historico_conclusoes_email, EMAIL, None, None, None, None)
+        return [HistoricoConclusaoResponse(**linha) for linha in resultado]
+
+    async def requisicao(url):
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+            response = await cliente.get(url)
+            assert response.status_code == 200
+            return response.content
+
+    print("\nrequisicao inteira (consulta + serializacao)")
+    url = f"/tarefas-dia/email/{EMAIL}/historico"
+    base = medir("padrao (modelos + response_model)", lambda: asyncio.run(requisicao("/bench/historico-padrao")), args.vezes)
+    modos = [("TypeAdapter", False)] + ([("orjson", True)] if orjson else [])
+    for nome, usar_orjson in modos:
+        rotas.HISTORICO.usar_orjson = usar_orjson
+        tempo = medir(nome, lambda: asyncio.run(requisicao(url)), args.vezes)
+        print(f"{'':<34} {base / tempo:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Custo das metricas por rota (TelemetriaMiddleware e eventos do SQLAlchemy)
+
+    python -m benchmarks.telemetria
+    python -m benchmarks.telemetria --requisicoes 5000 --rodadas 5
+
+Faz as mesmas requisicoes em sequencia (ASGI, sem rede) com as metricas
+ligadas e desligadas, alternando os modos a cada rodada, e mostra o tempo
+medio por requisicao e a diferenca. /health mede o middleware sozinho; o
+quadro do dia inclui os eventos de cada comando SQL.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks import ambiente  # noqa: F401 (configura o ambiente antes do app)
+
+import httpx
+
+from app.database import SessionLocal, engine
+from app.models import Tarefa, TarefaEmail
+from app.telemetria import coletor
+from migrations import migrar
+
+EMAIL = "bench@gmail.com"
+
+
+def popular(tarefas):
+    with SessionLocal() as db:
+        for i in range(tarefas):
+            tarefa = Tarefa(Tarefa=f"Tarefa {i}")
+            db.add(tarefa)
+            db.flush()
+            db.add(TarefaEmail(Tarefa_idTarefa=tarefa.idTarefa, email=EMAIL, Periodo="Manha"))
+        db.commit()
+
+
+async def rodada(app, url, requisicoes):
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        inicio = time.perf_counter()
+        for _ in range(requisicoes):
+            await cliente.get(url)
+        return (time.perf_counter() - inicio) / requisicoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do custo das metricas por rota")
+    parser.add_argument("--requisicoes", type=int, default=2000)
+    parser.add_argument("--rodadas", type=int, default=3)
+    args = parser.parse_args()
+
+    migrar(engine, log=lambda *_: None)
+    popular(10)
+    from main import app
+    from app.singleflight import leituras_tarefas_dia
+
+    # Cada requisicao faz as consultas, sem reaproveitar a anterior
+    leituras_tarefas_dia.janela = 0
+
+    print(f"{args.requisicoes} requisicoes x {args.rodadas} rodadas por modo, banco {engine.url.get_backend_name()}")
+    print(f"{'rota':<36} {'sem (us)':>10} {'com (us)':>10} {'custo (us)':>11} {'custo %':>8}")
+    for url in ("/health", f"/tarefas-dia/email/{EMAIL}"):
+        tempos = {False: [], True: []}
+        for _ in range(args.rodadas):
+            for ativo in (False, True):
+                coletor.ativo = ativo
+                tempos[ativo].append(asyncio.run(rodada(app, url, args.requisicoes)))
+        sem = statistics.median(tempos[False]) * 1e6
+        com = statistics.median(tempos[True]) * 1e6
+        print(f"{url:<36} {sem:>10.1f} {com:>10.1f} {com - sem:>11.1f} {(com - sem) / sem * 100:>7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,11 +6,13 @@ import os
 # Adiciona o diretório raiz ao path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.database import engine, Base
-from app.routers import local, tarefa, usuario, tarefa_usuario, category, tarefa_email, tarefa_conclusao_diaria
+from app.limites import LimiteRequisicoesMiddleware
+from app.orcamento_sql import orcamento_sql
+from app.telemetria import TelemetriaMiddleware
+from app.routers import local, tarefa, usuario, tarefa_usuario, category, tarefa_email, tarefa_conclusao_diaria, estatisticas, eventos, sincronizacao, metricas
 
-# Cria as tabelas no banco de dados
-Base.metadata.create_all(bind=engine)
+# O schema e criado e alterado somente pelas migracoes (python migrate.py):
+# importar a aplicacao nao abre conexao com o banco
 
 # Root path para servidor (vazio para local)
 ROOT_PATH = os.getenv("ROOT_PATH", "")
@@ -38,9 +40,16 @@ Esta API permite gerenciar:
     root_path=ROOT_PATH,
     docs_url="/swagger",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    # Conta os comandos SQL de toda requisicao e avisa sobre N+1; as rotas
+    # mais usadas declaram tambem o proprio orcamento
+    dependencies=[orcamento_sql()],
 )
 
+# Limite de requisicoes por cliente (429). Adicionado antes do CORS para
+# ficar por dentro dele: a resposta 429 tambem leva os cabecalhos de CORS
+app.add_middleware(LimiteRequisicoesMiddleware)
+
 # Configuração de CORS
 app.add_middleware(
     CORSMiddleware,
@@ -48,8 +57,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
+# Metricas por rota (GET /metrics). Por ultimo para ficar por fora dos
+# demais e medir tambem o tempo deles
+app.add_middleware(TelemetriaMiddleware)
+
 # Inclusão dos routers
 app.include_router(local.router)
 app.include_router(tarefa.router)
@@ -58,6 +72,10 @@ app.include_router(tarefa_usuario.router)
 app.include_router(category.router)
 app.include_router(tarefa_email.router)
 app.include_router(tarefa_conclusao_diaria.router)
+app.include_router(estatisticas.router)
+app.include_router(eventos.router)
+app.include_router(sincronizacao.router)
+app.include_router(metricas.router)
 
 
 @app.get("/", tags=["Root"])
@@ -0,0 +1,44 @@
+"""
+Aplica as migracoes versionadas do schema no banco configurado
+
+    python migrate.py            # aplica todas as migracoes pendentes
+    python migrate.py --status   # lista as migracoes e se ja foram aplicadas
+    python migrate.py --ate 2    # aplica ate a versao 2
+    python migrate.py --criar-banco  # cria o database se nao existir e migra
+
+E a unica forma de criar ou alterar o schema: a API nao cria tabelas ao
+iniciar (no k8s o initContainer do Deployment roda este script antes).
+"""
+import argparse
+
+from app.database import engine
+from migrations import criar_banco, listar_migracoes, migrar, versoes_aplicadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migracoes do banco dbApiTarefasFamilia")
+    parser.add_argument("--status", action="store_true", help="lista as migracoes e seu estado")
+    parser.add_argument("--ate", type=int, default=None, help="versao alvo")
+    parser.add_argument("--criar-banco", action="store_true", help="cria o database antes de migrar")
+    args = parser.parse_args()
+
+    if args.criar_banco:
+        criar_banco(engine)
+
+    if args.status:
+        aplicadas = versoes_aplicadas(engine)
+        for versao, nome, _ in listar_migracoes():
+            estado = "aplicada" if versao in aplicadas else "pendente"
+            print(f"{versao:04d} {nome:<40} {estado}")
+        return
+
+    migrar(engine, alvo=args.ate)
+    print("Banco de dados atualizado com sucesso!")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"Erro: {e}")
+        raise SystemExit(1)
@@ -0,0 +1,95 @@
+"""
+Migracoes versionadas do schema.
+
+Cada arquivo em migrations/versoes chamado vNNNN_descricao.py define uma
+funcao upgrade(conn). As versoes aplicadas ficam na tabela schema_versao.
+"""
+import importlib
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, inspect, select
+
+from migrations import versoes
+
+metadata = MetaData()
+
+schema_versao = Table(
+    "schema_versao", metadata,
+    Column("versao", Integer, primary_key=True, autoincrement=False),
+    Column("nome", String(100), nullable=False),
+    Column("aplicada_em", DateTime, nullable=False),
+)
+
+
+def listar_migracoes():
+    """Lista (versao, nome, modulo) de todas as migracoes, em ordem"""
+    migracoes = []
+    for info in pkgutil.iter_modules(versoes.__path__):
+        if not info.name.startswith("v"):
+            continue
+        versao, _, nome = info.name[1:].partition("_")
+        modulo = importlib.import_module(f"{versoes.__name__}.{info.name}")
+        migracoes.append((int(versao), nome, modulo))
+    return sorted(migracoes, key=lambda m: m[0])
+
+
+def versoes_aplicadas(engine):
+    """Conjunto das versoes ja aplicadas no banco"""
+    with engine.begin() as conn:
+        schema_versao.create(conn, checkfirst=True)
+        return set(conn.execute(select(schema_versao.c.versao)).scalars())
+
+
+def criar_banco(engine, log=print):
+    """Cria o database da URL da engine, se ainda nao existir (MySQL)"""
+    url = engine.url
+    if url.get_backend_name() not in ("mysql", "mariadb") or not url.database:
+        return
+    servidor = create_engine(url.set(database=None))
+    try:
+        with servidor.begin() as conn:
+            preparador = conn.dialect.identifier_preparer
+            conn.exec_driver_sql(f"CREATE DATABASE IF NOT EXISTS {preparador.quote(url.database)}")
+    finally:
+        servidor.dispose()
+    log(f"Banco de dados '{url.database}' criado/selecionado")
+
+
+def migrar(engine, alvo=None, log=print):
+    """Aplica as migracoes pendentes ate a versao alvo (padrao: a ultima)"""
+    aplicadas = versoes_aplicadas(engine)
+    for versao, nome, modulo in listar_migracoes():
+        if versao in aplicadas or (alvo is not None and versao > alvo):
+            continue
+        log(f"Aplicando {versao:04d} {nome}...")
+        with engine.begin() as conn:
+            modulo.upgrade(conn)
+            conn.execute(schema_versao.insert().values(
+                versao=versao, nome=nome, aplicada_em=datetime.now()
+            ))
+
+
+def criar_indice(conn, nome, tabela, colunas, unique=False):
+    """Cria o indice se ainda nao existir com esse nome"""
+    existentes = {i["name"] for i in inspect(conn).get_indexes(tabela)}
+    if nome in existentes:
+        return
+    tipo = "UNIQUE INDEX" if unique else "INDEX"
+    preparador = conn.dialect.identifier_preparer
+    conn.exec_driver_sql(
+        f"CREATE {tipo} {preparador.quote(nome)} ON {preparador.quote(tabela)} "
+        f"({', '.join(preparador.quote(c) for c in colunas)})"
+    )
+
+
+def remover_indice(conn, nome, tabela):
+    """Remove o indice se existir com esse nome"""
+    existentes = {i["name"] for i in inspect(conn).get_indexes(tabela)}
+    if nome not in existentes:
+        return
+    preparador = conn.dialect.identifier_preparer
+    if conn.dialect.name in ("mysql", "mariadb"):
+        conn.exec_driver_sql(f"DROP INDEX {preparador.quote(nome)} ON {preparador.quote(tabela)}")
+    else:
+        conn.exec_driver_sql(f"DROP INDEX {preparador.quote(nome)}")
@@ -0,0 +1,77 @@
+"""
+Schema inicial: as tabelas como existiam antes das migracoes versionadas.
+Em um banco ja criado, as tabelas existentes sao mantidas.
+"""
+from sqlalchemy import (
+    Column, Date, ForeignKey, Integer, MetaData, String, Table, UniqueConstraint
+)
+
+metadata = MetaData()
+
+Table(
+    "Local", metadata,
+    Column("idLocal", Integer, primary_key=True, autoincrement=True),
+    Column("Descricao", String(45), nullable=False),
+)
+
+Table(
+    "Tarefa", metadata,
+    Column("idTarefa", Integer, primary_key=True, autoincrement=True),
+    Column("Tarefa", String(45), nullable=False),
+    Column("Descricao", String(100)),
+    Column("Local_idLocal", Integer, ForeignKey("Local.idLocal")),
+)
+
+Table(
+    "usuario", metadata,
+    Column("idUsuario", Integer, primary_key=True, autoincrement=True),
+    Column("Nome", String(45), nullable=False),
+    Column("login", String(45), nullable=False, unique=True),
+    Column("senha", String(255), nullable=True),
+    Column("email", String(100), nullable=True),
+    Column("tipo_conta", String(20), nullable=False, default="simples"),
+)
+
+Table(
+    "tarefa_usuario", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("usuario_idUsuario", Integer, ForeignKey("usuario.idUsuario"), nullable=False),
+    Column("Tarefa_idTarefa", Integer, ForeignKey("Tarefa.idTarefa"), nullable=False),
+    Column("Data", Date),
+    Column("Periodo", String(45)),
+    Column("Feito", Integer, default=0),
+    Column("DataHoraConclusao", String(45)),
+)
+
+Table(
+    "category", metadata,
+    Column("category_id", Integer, primary_key=True, autoincrement=True),
+    Column("category_name", String(45), nullable=False),
+)
+
+Table(
+    "tarefa_email", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("Tarefa_idTarefa", Integer, ForeignKey("Tarefa.idTarefa"), nullable=False),
+    Column("email", String(100), nullable=False),
+    Column("Data", Date),
+    Column("Periodo", String(45)),
+    Column("Feito", Integer, default=0),
+    Column("DataHoraConclusao", String(45)),
+)
+
+Table(
+    "tarefa_conclusao_diaria", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("tarefa_email_id", Integer, ForeignKey("tarefa_email.id"), nullable=True),
+    Column("tarefa_usuario_id", Integer, ForeignKey("tarefa_usuario.id"), nullable=True),
+    Column("data", Date, nullable=False),
+    Column("data_hora_conclusao", String(45), nullable=False),
+    Column("status", Integer, default=1),
+    UniqueConstraint("tarefa_email_id", "data", name="uq_tarefa_email_data"),
+    UniqueConstraint("tarefa_usuario_id", "data", name="uq_tarefa_usuario_data"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
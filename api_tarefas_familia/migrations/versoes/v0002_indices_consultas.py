@@ -0,0 +1,15 @@
+"""
+Indices para os filtros mais usados pelos routers:
+tarefas por email, tarefas pendentes por usuario, atribuicoes por tarefa,
+tarefas por local, login por Gmail e historico por intervalo de datas.
+"""
+from migrations import criar_indice
+
+
+def upgrade(conn):
+    criar_indice(conn, "idx_tarefa_email_email", "tarefa_email", ["email"])
+    criar_indice(conn, "idx_tarefa_usuario_usuario_feito", "tarefa_usuario", ["usuario_idUsuario", "Feito"])
+    criar_indice(conn, "idx_tarefa_usuario_tarefa", "tarefa_usuario", ["Tarefa_idTarefa"])
+    criar_indice(conn, "idx_tarefa_local", "Tarefa", ["Local_idLocal"])
+    criar_indice(conn, "idx_usuario_email", "usuario", ["email"])
+    criar_indice(conn, "idx_tarefa_conclusao_data", "tarefa_conclusao_diaria", ["data"])
@@ -0,0 +1,31 @@
+"""
+Email unico entre as contas Gmail: o cadastro e o login por Gmail passam a
+depender do banco para barrar emails repetidos, em vez de consultar antes de
+inserir. Contas simples continuam podendo repetir o email (membros da
+familia com o email do responsavel). A unicidade fica em uma coluna gerada,
+email_gmail (o email quando tipo_conta = 'gmail', senao NULL), porque o
+MySQL nao tem indice parcial.
+Se ja houver contas Gmail com o mesmo email a migracao para e lista os
+emails a corrigir.
+"""
+from sqlalchemy import inspect, text
+
+from migrations import criar_indice
+
+
+def upgrade(conn):
+    repetidos = conn.execute(text(
+        "SELECT email FROM usuario WHERE tipo_conta = 'gmail' AND email IS NOT NULL "
+        "GROUP BY email HAVING COUNT(*) > 1"
+    )).scalars().all()
+    if repetidos:
+        raise RuntimeError(
+            f"Contas Gmail com o mesmo email em usuario, corrija antes de migrar: {', '.join(repetidos)}"
+        )
+
+    if "email_gmail" not in {c["name"] for c in inspect(conn).get_columns("usuario")}:
+        conn.exec_driver_sql(
+            "ALTER TABLE usuario ADD COLUMN email_gmail VARCHAR(100) "
+            "GENERATED ALWAYS AS (CASE WHEN tipo_conta = 'gmail' THEN email END) VIRTUAL"
+        )
+    criar_indice(conn, "uq_usuario_email_gmail", "usuario", ["email_gmail"], unique=True)
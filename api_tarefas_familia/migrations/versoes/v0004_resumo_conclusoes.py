@@ -0,0 +1,21 @@
+"""
+Tabela de resumo tarefa_conclusao_resumo: conclusoes por (dia, dono, tarefa),
+lida pelos relatorios. Depois de migrar, preencha com o historico existente:
+python backfill_resumo.py
+"""
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    "tarefa_conclusao_resumo", metadata,
+    Column("data", Date, primary_key=True),
+    Column("origem", String(10), primary_key=True),
+    Column("dono", String(100), primary_key=True),
+    Column("Tarefa_idTarefa", Integer, primary_key=True),
+    Column("concluidas", Integer, nullable=False, default=0),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
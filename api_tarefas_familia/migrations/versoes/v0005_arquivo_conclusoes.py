@@ -0,0 +1,24 @@
+"""
+Tabela de arquivo tarefa_conclusao_arquivo: conclusoes mais antigas que o
+horizonte de retencao saem de tarefa_conclusao_diaria para ca
+(python arquivar_conclusoes.py), mantendo a tabela quente pequena.
+"""
+from sqlalchemy import Column, Date, Index, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    "tarefa_conclusao_arquivo", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("tarefa_email_id", Integer, nullable=True),
+    Column("tarefa_usuario_id", Integer, nullable=True),
+    Column("data", Date, nullable=False),
+    Column("data_hora_conclusao", String(45), nullable=False),
+    Column("status", Integer, default=1),
+    Index("idx_arquivo_email_data", "tarefa_email_id", "data"),
+    Index("idx_arquivo_usuario_data", "tarefa_usuario_id", "data"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
@@ -0,0 +1,42 @@
+"""
+Tabela alteracao: registro das alteracoes lido pelo /sync (versao = id
+auto-incremento). Os registros que ja existem entram como alterados, entao
+/sync?since=0 devolve a base inteira.
+"""
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, MetaData, String, Table, text
+
+metadata = MetaData()
+
+alteracao = Table(
+    "alteracao", metadata,
+    Column("versao", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("tabela", String(45), nullable=False),
+    Column("registro_id", Integer, nullable=False),
+    Column("removido", Integer, nullable=False, default=0),
+    Column("criado_em", DateTime, nullable=False),
+    Index("idx_alteracao_tabela_registro", "tabela", "registro_id"),
+)
+
+# (tabela, chave primaria) das tabelas sincronizadas
+TABELAS = (
+    ("Local", "idLocal"),
+    ("category", "category_id"),
+    ("Tarefa", "idTarefa"),
+    ("tarefa_email", "id"),
+    ("tarefa_usuario", "id"),
+    ("tarefa_conclusao_diaria", "id"),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    preparador = conn.dialect.identifier_preparer
+    agora = datetime.now()
+    for tabela, chave in TABELAS:
+        conn.execute(text(
+            f"INSERT INTO alteracao (tabela, registro_id, removido, criado_em) "
+            f"SELECT :tabela, {preparador.quote(chave)}, 0, :agora FROM {preparador.quote(tabela)} "
+            f"ORDER BY {preparador.quote(chave)}"
+        ), {"tabela": tabela, "agora": agora})
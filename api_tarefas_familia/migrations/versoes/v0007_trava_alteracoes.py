@@ -0,0 +1,20 @@
+"""
+Tabela alteracao_trava: uma linha que toda transacao que grava em
+alteracao trava ate o commit. Assim as versoes so ficam visiveis em ordem
+e um buraco na sequencia e sempre um rollback, nunca um commit pendente.
+"""
+from sqlalchemy import BigInteger, Column, Integer, MetaData, Table, select
+
+metadata = MetaData()
+
+trava = Table(
+    "alteracao_trava", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False),
+    Column("escritas", BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0),
+)
+
+
+def upgrade(conn):
+    metadata.create_all(conn, checkfirst=True)
+    if conn.execute(select(trava.c.id).where(trava.c.id == 1)).first() is None:
+        conn.execute(trava.insert().values(id=1, escritas=0))
@@ -0,0 +1,18 @@
+"""
+Coluna lote_insercao em tarefa_email e tarefa_usuario: o POST em lote grava
+um token por INSERT de varias linhas e le os ids criados com um SELECT pelo
+token. No MySQL com innodb_autoinc_lock_mode = 2 (padrao do 8) os ids de um
+INSERT de varias linhas podem nao ser consecutivos.
+"""
+from sqlalchemy import inspect
+
+from migrations import criar_indice
+
+TABELAS = ("tarefa_email", "tarefa_usuario")
+
+
+def upgrade(conn):
+    for tabela in TABELAS:
+        if "lote_insercao" not in {c["name"] for c in inspect(conn).get_columns(tabela)}:
+            conn.exec_driver_sql(f"ALTER TABLE {tabela} ADD COLUMN lote_insercao VARCHAR(32) NULL")
+        criar_indice(conn, f"idx_{tabela}_lote_insercao", tabela, ["lote_insercao"])
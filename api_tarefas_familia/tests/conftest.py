@@ -0,0 +1,161 @@
+"""
+Fixtures compartilhadas pelos testes que rodam contra um banco SQLite local
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import orcamento_sql as orcamento
+from app.cache import CACHES
+from app.singleflight import SINGLEFLIGHTS
+from app.telemetria import TelemetriaMiddleware, coletor
+from app.database import Base, ExecutorAsync, ExecutorSync, admissao_db, get_db, get_db_executor, get_session_factory
+from app.routers import local, tarefa, usuario, tarefa_usuario, category, tarefa_email, tarefa_conclusao_diaria, estatisticas, eventos, sincronizacao, metricas
+
+
+@pytest.fixture(autouse=True)
+def limpar_caches():
+    """Cada teste usa um banco novo, entao os caches em memoria comecam vazios"""
+    for cache in CACHES:
+        cache.invalidar()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def singleflight_sem_janela(monkeypatch):
+    """
+    Leituras seguidas de um mesmo teste nao reaproveitam a resposta anterior;
+    os testes do single-flight definem a propria janela
+    """
+    for singleflight in SINGLEFLIGHTS:
+        singleflight.invalidar()
+        monkeypatch.setattr(singleflight, "janela", 0)
+    yield
+
+
+@pytest.fixture(autouse=True)
+def orcamento_sql_estrito(monkeypatch):
+    """Rota que passa do orcamento de SQL ou repete um SELECT (N+1) faz o teste falhar"""
+    monkeypatch.setattr(orcamento, "ORCAMENTO_SQL", "erro")
+    yield
+
+
+@pytest.fixture
+def caminho_db(tmp_path):
+    return tmp_path / "tarefas.db"
+
+
+@pytest.fixture
+def engine(caminho_db):
+    """Engine SQLite em arquivo temporario, com o schema criado"""
+    engine = create_engine(f"sqlite:///{caminho_db}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(params=["sync", "async"])
+def modo_db(request):
+    """Roda o teste nos dois modos de acesso ao banco"""
+    return request.param
+
+
+@pytest.fixture
+def async_engine(engine, caminho_db):
+    """Engine assincrona (aiosqlite) sobre o mesmo arquivo SQLite"""
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{caminho_db}", poolclass=NullPool)
+    yield async_engine
+    async_engine.sync_engine.dispose()
+
+
+@pytest.fixture
+def engine_app(modo_db, engine, async_engine):
+    """Engine sincrona usada pela aplicacao no modo do teste"""
+    return async_engine.sync_engine if modo_db == "async" else engine
+
+
+@pytest.fixture
+def db(engine):
+    """Sessao para popular o banco nos testes"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(modo_db, engine, async_engine):
+    """TestClient de uma aplicacao com todos os routers apontando para o SQLite"""
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        with admissao_db.reservar():
+            session = TestingSessionLocal()
+            try:
+                yield session
+            finally:
+                session.close()
+
+    async def override_get_db_executor():
+        async with admissao_db.reservar_async():
+            if modo_db == "async":
+                async with AsyncSession(async_engine, autoflush=False, expire_on_commit=False) as session:
+                    yield ExecutorAsync(session)
+            else:
+                session = TestingSessionLocal()
+                try:
+                    yield ExecutorSync(session)
+                finally:
+                    session.close()
+
+    app = FastAPI(dependencies=[orcamento.orcamento_sql()])
+    for modulo in (local, tarefa, usuario, tarefa_usuario, category, tarefa_email, tarefa_conclusao_diaria, estatisticas, eventos, sincronizacao, metricas):
+        app.include_router(modulo.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_db_executor] = override_get_db_executor
+    app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+    app.add_middleware(TelemetriaMiddleware)
+    coletor.limpar()
+    with TestClient(app) as client:
+        yield client
+
+
+class ContadorSQL:
+    """Registra os comandos SQL executados por uma engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.comandos = []
+        self.parametros = []
+
+    def _registrar(self, conn, cursor, statement, parameters, context, executemany):
+        self.comandos.append(statement)
+        self.parametros.append(parameters)
+
+    def __enter__(self):
+        self.comandos = []
+        self.parametros = []
+        event.listen(self.engine, "before_cursor_execute", self._registrar)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._registrar)
+
+    @property
+    def total(self):
+        return len(self.comandos)
+
+
+@pytest.fixture
+def contador_sql(engine_app):
+    """Conta os comandos SQL executados pela aplicacao dentro de um bloco ``with``"""
+    return ContadorSQL(engine_app)
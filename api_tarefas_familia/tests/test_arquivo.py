@@ -0,0 +1,88 @@
+"""
+Testes para o arquivo de conclusoes antigas (retencao)
+"""
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app.arquivo import arquivar_conclusoes, data_de_corte
+from app.models import TarefaConclusaoArquivo, TarefaConclusaoDiaria, TarefaConclusaoResumo
+from app.resumo import reconstruir_resumo
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+INICIO = date(2026, 1, 1)
+CORTE = INICIO + timedelta(days=6)
+
+
+def popular(db):
+    """Uma conclusao por dia durante 10 dias para um usuario e um email"""
+    usuario, atribuicoes = criar_tarefas_usuario(db, "Vera", 1)
+    emails = criar_tarefas_email(db, "vera@gmail.com", 1)
+    for i in range(10):
+        dia = INICIO + timedelta(days=i)
+        db.add(TarefaConclusaoDiaria(tarefa_usuario_id=atribuicoes[0].id, data=dia, data_hora_conclusao=f"{dia} 07:00:00"))
+        db.add(TarefaConclusaoDiaria(tarefa_email_id=emails[0].id, data=dia, data_hora_conclusao=f"{dia} 09:00:00"))
+    db.commit()
+    return usuario.idUsuario
+
+
+def historico_paginado(client, url):
+    itens, cursor = [], None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        itens += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return itens
+
+
+class TestArquivo:
+    """Testes do job de retencao e da leitura transparente do historico"""
+
+    def test_move_em_lotes(self, db):
+        """Testa que so as conclusoes anteriores ao corte saem da tabela quente"""
+        popular(db)
+        mensagens = []
+        total = arquivar_conclusoes(db, CORTE, tamanho_lote=5, log=mensagens.append)
+
+        assert total == 12
+        assert len(mensagens) == 3
+        assert db.query(TarefaConclusaoArquivo).count() == 12
+        assert db.query(TarefaConclusaoDiaria).count() == 8
+        assert all(c.data >= CORTE for c in db.query(TarefaConclusaoDiaria))
+        assert arquivar_conclusoes(db, CORTE, log=mensagens.append) == 0
+
+    def test_historico_le_quente_e_arquivo(self, client, db):
+        """Testa que paginas, filtros e exportacao nao mudam depois de arquivar"""
+        usuario_id = popular(db)
+        urls = [
+            f"/tarefas-dia/usuario/{usuario_id}/historico?limit=3",
+            "/tarefas-dia/email/vera@gmail.com/historico?limit=4",
+            f"/tarefas-dia/usuario/{usuario_id}/historico?limit=3&data_inicio={INICIO + timedelta(days=4)}",
+        ]
+        exportacao = "/tarefas-dia/email/vera@gmail.com/historico/export"
+        antes = [historico_paginado(client, url) for url in urls]
+        exportado_antes = client.get(exportacao).text
+
+        arquivar_conclusoes(db, CORTE, log=lambda *_: None)
+
+        assert [historico_paginado(client, url) for url in urls] == antes
+        assert len(antes[0]) == 10
+        assert len(antes[2]) == 6
+        assert client.get(exportacao).text == exportado_antes
+        assert len([json.loads(l) for l in exportado_antes.splitlines()]) == 10
+
+    def test_backfill_inclui_arquivo(self, db):
+        """Testa que o resumo reconstruido conta tambem as conclusoes arquivadas"""
+        popular(db)
+        arquivar_conclusoes(db, CORTE, log=lambda *_: None)
+        reconstruir_resumo(db)
+        db.commit()
+        assert db.query(TarefaConclusaoResumo).count() == 20
+
+    def test_horizonte_minimo(self):
+        """Testa que o horizonte precisa manter pelo menos o dia de hoje"""
+        assert data_de_corte(30) == date.today() - timedelta(days=30)
+        with pytest.raises(ValueError):
+            data_de_corte(0)
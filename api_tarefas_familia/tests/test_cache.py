@@ -0,0 +1,86 @@
+"""
+Testes para o cache de dados de referencia (Local, Category, Tarefa)
+"""
+import time
+
+from app.cache import CacheTTL
+from app.models import Tarefa, TarefaEmail
+
+
+class TestCacheTTL:
+    """Testes para a estrutura do cache"""
+
+    def test_lru_descarta_o_menos_usado(self):
+        cache = CacheTTL("teste", tamanho_max=2, ttl=60)
+        cache.guardar("a", 1)
+        cache.guardar("b", 2)
+        cache.obter("a")
+        cache.guardar("c", 3)
+        assert cache.obter("b") is None
+        assert cache.obter("a") == 1
+        assert cache.obter("c") == 3
+
+    def test_ttl_expira(self):
+        cache = CacheTTL("teste", tamanho_max=10, ttl=0.01)
+        cache.guardar("a", 1)
+        time.sleep(0.02)
+        assert cache.obter("a") is None
+        assert cache.estatisticas()["misses"] == 1
+
+    def test_carga_anterior_a_invalidacao_e_descartada(self):
+        """Testa que um valor carregado antes de uma escrita nao fica no cache depois de invalidar()"""
+        cache = CacheTTL("teste", tamanho_max=10, ttl=60)
+
+        def carregar_durante_escrita():
+            # A escrita concorrente invalida o cache enquanto o leitor consulta o banco
+            cache.invalidar()
+            return "antigo"
+
+        assert cache.obter_ou_carregar("a", carregar_durante_escrita) == "antigo"
+        assert cache.obter("a") is None
+        assert cache.estatisticas()["descartados"] == 1
+        assert cache.obter_ou_carregar("a", lambda: "novo") == "novo"
+        assert cache.obter("a") == "novo"
+
+
+class TestCacheNosRouters:
+    """Testes para o uso do cache nos endpoints"""
+
+    def test_leitura_quente_nao_consulta_o_banco(self, client, contador_sql):
+        """Testa que obter_* e listar_* com cache quente nao executam SQL"""
+        local = client.post("/locais/", json={"Descricao": "Sala"}).json()
+        client.get("/locais/")
+        client.get(f"/locais/{local['idLocal']}")
+
+        with contador_sql:
+            assert client.get("/locais/").json() == [local]
+            assert client.get(f"/locais/{local['idLocal']}").json() == local
+        assert contador_sql.total == 0
+
+        data = client.get("/metrics/cache").json()
+        assert data["locais"]["hits"] >= 2
+
+    def test_escrita_invalida_o_cache(self, client):
+        """Testa que atualizar e deletar invalidam o cache da entidade"""
+        tarefa = client.post("/tarefas/", json={"Tarefa": "Varrer"}).json()
+        tarefa_id = tarefa["idTarefa"]
+        assert client.get(f"/tarefas/{tarefa_id}").json()["Tarefa"] == "Varrer"
+
+        client.put(f"/tarefas/{tarefa_id}", json={"Tarefa": "Varrer sala"})
+        assert client.get(f"/tarefas/{tarefa_id}").json()["Tarefa"] == "Varrer sala"
+
+        client.delete(f"/tarefas/{tarefa_id}")
+        assert client.get(f"/tarefas/{tarefa_id}").status_code == 404
+
+    def test_nome_da_tarefa_atualizado_nas_tarefas_do_dia(self, client, db):
+        """Testa que o nome vindo do cache acompanha a atualizacao da tarefa"""
+        tarefa = Tarefa(Tarefa="Lavar louca")
+        db.add(tarefa)
+        db.flush()
+        db.add(TarefaEmail(Tarefa_idTarefa=tarefa.idTarefa, email="ana@gmail.com"))
+        db.commit()
+        tarefa_id = tarefa.idTarefa
+
+        assert client.get("/tarefas-dia/email/ana@gmail.com").json()[0]["Tarefa_nome"] == "Lavar louca"
+        client.put(f"/tarefas/{tarefa_id}", json={"Tarefa": "Secar louca"})
+        assert client.get("/tarefas-dia/email/ana@gmail.com").json()[0]["Tarefa_nome"] == "Secar louca"
@@ -0,0 +1,120 @@
+"""
+Testes para o commit em grupo das conclusoes
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from app.commit_em_grupo import CommitEmGrupo
+from app.models import TarefaConclusaoDiaria
+from app.routers.tarefa_conclusao_diaria import conclusoes_em_grupo
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+
+class ExecutorFalso:
+    """Executor que roda a funcao sem sessao e guarda os grupos recebidos"""
+
+    def __init__(self, erro=None):
+        self.grupos = []
+        self.erro = erro
+
+    async def run(self, fn, *args):
+        self.grupos.append(args[0])
+        if self.erro:
+            raise self.erro
+        return fn(None, *args)
+
+
+def dobrar(db, pedidos):
+    return [p * 2 for p in pedidos]
+
+
+class TestCommitEmGrupo:
+    """Testes da classe CommitEmGrupo"""
+
+    def test_pedidos_concorrentes_formam_um_grupo(self):
+        """Testa que pedidos na mesma janela sao gravados juntos e cada um recebe o seu resultado"""
+        grupo = CommitEmGrupo("teste", dobrar, ativo=True, janela=0.02, maximo=100)
+        executor = ExecutorFalso()
+
+        async def cenario():
+            return await asyncio.gather(*(grupo.executar(executor, i) for i in range(20)))
+
+        assert asyncio.run(cenario()) == [i * 2 for i in range(20)]
+        assert executor.grupos == [list(range(20))]
+        assert grupo.estatisticas()["media_por_grupo"] == 20
+
+    def test_grupo_cheio_grava_sem_esperar_a_janela(self):
+        """Testa que o grupo e gravado ao chegar no maximo de pedidos"""
+        grupo = CommitEmGrupo("teste", dobrar, ativo=True, janela=10, maximo=5)
+        executor = ExecutorFalso()
+
+        async def cenario():
+            return await asyncio.wait_for(
+                asyncio.gather(*(grupo.executar(executor, i) for i in range(10))), timeout=1
+            )
+
+        asyncio.run(cenario())
+        assert executor.grupos == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+
+    def test_erro_vai_para_todo_o_grupo(self):
+        """Testa que a falha da transacao chega a todos os pedidos do grupo"""
+        grupo = CommitEmGrupo("teste", dobrar, ativo=True, janela=0.01)
+        executor = ExecutorFalso(erro=RuntimeError("falhou"))
+
+        async def cenario():
+            return await asyncio.gather(*(grupo.executar(executor, i) for i in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(cenario()))
+
+
+@pytest.fixture
+def em_grupo(monkeypatch):
+    monkeypatch.setattr(conclusoes_em_grupo, "ativo", True)
+    monkeypatch.setattr(conclusoes_em_grupo, "janela", 0.05)
+
+
+def em_paralelo(client, urls):
+    async def cenario():
+        transporte = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+            return await asyncio.gather(*(cliente.post(url) for url in urls))
+
+    return asyncio.run(cenario())
+
+
+class TestConclusoesEmGrupo:
+    """Testa os endpoints de concluir com COMMIT_EM_GRUPO ativo"""
+
+    def test_uma_transacao_com_o_resultado_de_cada_requisicao(self, client, db, contador_sql, em_grupo):
+        """Testa conclusoes, duplicadas e inexistentes gravadas com um unico INSERT"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Duda", 3)
+        emails = criar_tarefas_email(db, "duda@gmail.com", 2)
+        urls = [f"/tarefas-dia/usuario/{a.id}/concluir" for a in atribuicoes]
+        urls += [f"/tarefas-dia/email/{e.id}/concluir" for e in emails]
+        urls += [f"/tarefas-dia/usuario/{atribuicoes[0].id}/concluir", "/tarefas-dia/email/999/concluir"]
+
+        with contador_sql:
+            respostas = em_paralelo(client, urls)
+        assert [r.status_code for r in respostas] == [201] * 5 + [400, 404]
+        assert respostas[5].json()["detail"] == "Tarefa ja foi concluida hoje"
+        assert respostas[6].json()["detail"] == "Tarefa email nao encontrada"
+        assert sum(c.startswith("INSERT INTO tarefa_conclusao_diaria") for c in contador_sql.comandos) == 1
+
+        criadas = {c.id: c for c in db.query(TarefaConclusaoDiaria)}
+        assert len(criadas) == 5
+        corpo = respostas[3].json()
+        assert corpo["tarefa_email_id"] == emails[0].id and corpo["tarefa_usuario_id"] is None
+        assert corpo["data_hora_conclusao"] == criadas[corpo["id"]].data_hora_conclusao
+
+    def test_ja_concluida_antes_do_grupo(self, client, db, em_grupo):
+        """Testa o 400 para a tarefa concluida numa requisicao anterior"""
+        emails = criar_tarefas_email(db, "enzo@gmail.com", 1)
+        url = f"/tarefas-dia/email/{emails[0].id}/concluir"
+        assert client.post(url).status_code == 201
+        assert client.post(url).status_code == 400
+
+        estatisticas = client.get("/metrics/commit-grupo").json()["conclusoes"]
+        assert estatisticas["ativo"] is True
+        assert estatisticas["grupos"] >= 2
@@ -0,0 +1,48 @@
+"""
+Testes de requisicoes duplicadas em paralelo nos caminhos de escrita
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models import TarefaConclusaoDiaria, Usuario
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+REQUISICOES = 8
+
+
+def em_paralelo(funcao):
+    with ThreadPoolExecutor(max_workers=REQUISICOES) as executor:
+        return list(executor.map(lambda _: funcao(), range(REQUISICOES)))
+
+
+class TestEscritasConcorrentes:
+    """Dispara a mesma escrita varias vezes ao mesmo tempo"""
+
+    def test_concluir_duplicado(self, client, db):
+        """Testa que so uma conclusao do dia e criada e as demais recebem 400"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Lia", 1)
+        emails = criar_tarefas_email(db, "lia@gmail.com", 1)
+
+        for url in (f"/tarefas-dia/usuario/{atribuicoes[0].id}/concluir",
+                    f"/tarefas-dia/email/{emails[0].id}/concluir"):
+            respostas = em_paralelo(lambda: client.post(url))
+            status = sorted(r.status_code for r in respostas)
+            assert status == [201] + [400] * (REQUISICOES - 1)
+            assert all(r.json()["detail"] == "Tarefa ja foi concluida hoje" for r in respostas if r.status_code == 400)
+
+        assert db.query(TarefaConclusaoDiaria).count() == 2
+
+    def test_criar_usuario_duplicado(self, client, db):
+        """Testa que o login repetido vira 400 em vez de erro 500"""
+        respostas = em_paralelo(lambda: client.post("/usuarios/", json={
+            "Nome": "Rui", "login": "rui", "senha": "x"
+        }))
+        assert sorted(r.status_code for r in respostas) == [201] + [400] * (REQUISICOES - 1)
+        assert {r.json()["detail"] for r in respostas if r.status_code == 400} == {"Login ja cadastrado"}
+        assert db.query(Usuario).count() == 1
+
+    def test_login_gmail_simultaneo(self, client, db):
+        """Testa que varios primeiros logins ao mesmo tempo criam um unico usuario"""
+        respostas = em_paralelo(lambda: client.post("/usuarios/login/gmail", json={"email": "sol@gmail.com"}))
+        assert all(r.status_code == 200 and r.json()["sucesso"] for r in respostas)
+        assert len({r.json()["usuario"]["idUsuario"] for r in respostas}) == 1
+        assert db.query(Usuario).count() == 1
@@ -0,0 +1,86 @@
+"""
+Testes para /tarefas-dia/estatisticas
+"""
+from datetime import date, timedelta
+
+from app.models import TarefaConclusaoDiaria
+from app.resumo import reconstruir_resumo
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+INICIO = date(2026, 3, 1)
+
+
+def concluir(db, dia, **kwargs):
+    db.add(TarefaConclusaoDiaria(data=dia, data_hora_conclusao=f"{dia} 08:00:00", status=1, **kwargs))
+
+
+def popular(db):
+    """Usuario com 2 tarefas (dias 1 a 3 completos, dia 5 com uma) e email com 1 tarefa (dia 2), com o resumo reconstruido"""
+    usuario, atribuicoes = criar_tarefas_usuario(db, "Nina", 2)
+    emails = criar_tarefas_email(db, "theo@gmail.com", 1)
+    for i in range(3):
+        for a in atribuicoes:
+            concluir(db, INICIO + timedelta(days=i), tarefa_usuario_id=a.id)
+    concluir(db, INICIO + timedelta(days=4), tarefa_usuario_id=atribuicoes[0].id)
+    concluir(db, INICIO + timedelta(days=1), tarefa_email_id=emails[0].id)
+    concluir(db, INICIO + timedelta(days=20), tarefa_email_id=emails[0].id)
+    db.commit()
+    reconstruir_resumo(db)
+    db.commit()
+    return usuario.idUsuario, atribuicoes, emails
+
+
+def url(agrupar):
+    return f"/tarefas-dia/estatisticas?data_inicio={INICIO}&data_fim={INICIO + timedelta(days=4)}&agrupar={agrupar}"
+
+
+class TestEstatisticas:
+    """Testes das contagens, taxas e sequencias"""
+
+    def test_por_dia(self, client, db):
+        """Testa contagens por dia e a sequencia de dias completos da familia"""
+        popular(db)
+
+        data = client.get(url("dia")).json()
+        assert data["concluidas"] == 8
+        assert data["atribuidas"] == 15
+        assert data["taxa_conclusao"] == round(8 / 15, 4)
+        assert [g["concluidas"] for g in data["grupos"]] == [2, 3, 2, 0, 1]
+        assert all(g["atribuidas"] == 3 for g in data["grupos"])
+        assert data["maior_sequencia"] == 1
+        assert data["sequencia_atual"] == 0
+
+    def test_por_membro(self, client, db):
+        """Testa taxa e sequencias de cada membro"""
+        usuario_id, _, _ = popular(db)
+
+        grupos = client.get(url("membro")).json()["grupos"]
+        por_membro = {g["usuario_idUsuario"] or g["email"]: g for g in grupos}
+        nina = por_membro[usuario_id]
+        assert nina["Nome"] == "Nina"
+        assert (nina["concluidas"], nina["atribuidas"]) == (7, 10)
+        assert (nina["maior_sequencia"], nina["sequencia_atual"]) == (3, 0)
+        theo = por_membro["theo@gmail.com"]
+        assert (theo["concluidas"], theo["atribuidas"], theo["taxa_conclusao"]) == (1, 5, 0.2)
+
+    def test_por_tarefa(self, client, db):
+        """Testa o agrupamento por tarefa com o nome vindo do cache"""
+        _, atribuicoes, _ = popular(db)
+
+        grupos = client.get(url("tarefa")).json()["grupos"]
+        primeira = next(g for g in grupos if g["Tarefa_idTarefa"] == atribuicoes[0].Tarefa_idTarefa)
+        assert primeira["Tarefa_nome"] == "Tarefa 0"
+        assert primeira["concluidas"] == 4
+        assert (primeira["maior_sequencia"], primeira["sequencia_atual"]) == (3, 1)
+
+    def test_poucos_comandos(self, client, db, contador_sql):
+        """Testa que o numero de comandos nao depende do numero de conclusoes"""
+        popular(db)
+        with contador_sql:
+            client.get(url("membro"))
+        assert contador_sql.total <= 3
+
+    def test_intervalo_invalido(self, client):
+        """Testa intervalo invertido e intervalo longo demais"""
+        assert client.get("/tarefas-dia/estatisticas?data_inicio=2026-02-01&data_fim=2026-01-01").status_code == 400
+        assert client.get("/tarefas-dia/estatisticas?data_inicio=2024-01-01&data_fim=2026-01-01").status_code == 400
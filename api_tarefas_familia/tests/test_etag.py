@@ -0,0 +1,60 @@
+"""
+Testes para ETag / If-None-Match nos endpoints consultados em polling
+"""
+from app.etag import etag_do_corpo
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+
+class TestEtag:
+    """Testes do cabecalho ETag e da resposta 304"""
+
+    def test_304_quando_nada_mudou(self, client, db):
+        """Testa que o If-None-Match com o ETag atual retorna 304 sem corpo"""
+        criar_tarefas_email(db, "ana@gmail.com", 3)
+
+        for url in ("/tarefas-dia/email/ana@gmail.com", "/tarefas-email/email/ana@gmail.com"):
+            primeira = client.get(url)
+            assert primeira.status_code == 200
+            etag = primeira.headers["ETag"]
+
+            segunda = client.get(url, headers={"If-None-Match": etag})
+            assert segunda.status_code == 304
+            assert segunda.content == b""
+            assert segunda.headers["ETag"] == etag
+
+            fraca = client.get(url, headers={"If-None-Match": f'"outro", W/{etag}'})
+            assert fraca.status_code == 304
+
+    def test_etag_do_corpo_serializado(self, client, db):
+        """Testa que as tarefas por email e o detalhado tem o mesmo corpo e o ETag desse corpo"""
+        criar_tarefas_email(db, "cris@gmail.com", 3)
+        lista = client.get("/tarefas-email/email/cris@gmail.com")
+        detalhado = client.get("/tarefas-email/email/cris@gmail.com/detalhado")
+
+        assert lista.content == detalhado.content
+        assert lista.headers["ETag"] == detalhado.headers["ETag"] == etag_do_corpo(lista.content)
+
+    def test_etag_muda_ao_concluir(self, client, db):
+        """Testa que concluir e desfazer uma tarefa mudam o ETag"""
+        atribuicoes = criar_tarefas_email(db, "bia@gmail.com", 2)
+        url = "/tarefas-dia/email/bia@gmail.com"
+        antes = client.get(url).headers["ETag"]
+
+        assert client.post(f"/tarefas-dia/email/{atribuicoes[0].id}/concluir").status_code == 201
+        depois = client.get(url, headers={"If-None-Match": antes})
+        assert depois.status_code == 200
+        assert depois.headers["ETag"] != antes
+
+        assert client.delete(f"/tarefas-dia/email/{atribuicoes[0].id}/desfazer").status_code == 204
+        assert client.get(url).headers["ETag"] == antes
+
+    def test_etag_usuario(self, client, db):
+        """Testa o ETag no quadro do dia de um usuario"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Caio", 2)
+        usuario_id = usuario.idUsuario
+        url = f"/tarefas-dia/usuario/{usuario_id}"
+        etag = client.get(url).headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        client.post(f"/tarefas-dia/usuario/{atribuicoes[1].id}/concluir")
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,216 @@
+"""
+Testes para o pub/sub em memoria e o endpoint /tarefas-dia/stream
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.eventos import barramento, canais_do_dono
+from app.routers.eventos import gerar_eventos
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+
+def ler_evento(mensagem):
+    """(tipo, dados) de uma mensagem SSE"""
+    linhas = dict(linha.split(": ", 1) for linha in mensagem.strip().split("\n"))
+    return linhas["event"], json.loads(linhas["data"])
+
+
+class Ouvinte:
+    """Assinaturas em um event loop proprio, como o de um servidor"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.assinaturas = []
+
+    def assinar(self, *canais, tamanho_fila=100):
+        async def assinar():
+            return barramento.assinar(canais, tamanho_fila)
+
+        assinatura = self.loop.run_until_complete(assinar())
+        self.assinaturas.append(assinatura)
+        return assinatura
+
+    def recebidos(self, assinatura):
+        # Roda os callbacks agendados por outras threads
+        self.loop.run_until_complete(asyncio.sleep(0))
+        mensagens = []
+        while not assinatura.fila.empty():
+            mensagens.append(ler_evento(assinatura.fila.get_nowait()))
+        return mensagens
+
+    def fechar(self):
+        for assinatura in self.assinaturas:
+            barramento.cancelar(assinatura)
+        self.loop.close()
+
+
+@pytest.fixture
+def ouvinte():
+    ouvinte = Ouvinte()
+    yield ouvinte
+    ouvinte.fechar()
+
+
+class TestBarramento:
+    """Testes da entrega dos eventos aos assinantes"""
+
+    def test_filtra_por_canal(self, ouvinte):
+        """Testa que cada membro so recebe os proprios eventos e a familia recebe todos"""
+        familia = ouvinte.assinar("familia")
+        ana = ouvinte.assinar("email:ana@gmail.com")
+        usuario = ouvinte.assinar("usuario:7")
+
+        barramento.publicar(canais_do_dono(email="ana@gmail.com"), "conclusao", {"ids": [1]})
+        barramento.publicar(canais_do_dono(usuario_id=7), "conclusao", {"ids": [2]})
+
+        assert [dados["ids"] for _, dados in ouvinte.recebidos(familia)] == [[1], [2]]
+        assert ouvinte.recebidos(ana) == [("conclusao", {"ids": [1]})]
+        assert ouvinte.recebidos(usuario) == [("conclusao", {"ids": [2]})]
+
+    def test_assinante_em_varios_canais_recebe_uma_vez(self, ouvinte):
+        """Testa que o evento nao e duplicado para quem assina dois canais do mesmo dono"""
+        assinatura = ouvinte.assinar("familia", "usuario:3")
+        assert barramento.publicar(canais_do_dono(usuario_id=3), "atribuicao", {"ids": [9]}) == 1
+        assert len(ouvinte.recebidos(assinatura)) == 1
+
+    def test_cliente_lento_perde_os_mais_antigos(self, ouvinte):
+        """Testa que a fila cheia descarta o evento mais antigo em vez de crescer"""
+        assinatura = ouvinte.assinar("familia", tamanho_fila=3)
+        for i in range(5):
+            barramento.publicar(["familia"], "conclusao", {"ids": [i]})
+
+        assert [dados["ids"][0] for _, dados in ouvinte.recebidos(assinatura)] == [2, 3, 4]
+        assert assinatura.descartados == 2
+
+    def test_cancelar_remove_o_canal(self, ouvinte):
+        """Testa que a assinatura cancelada deixa de receber"""
+        assinatura = ouvinte.assinar("email:bia@gmail.com")
+        barramento.cancelar(assinatura)
+        assert not barramento.tem_assinantes()
+        assert barramento.publicar(["familia", "email:bia@gmail.com"], "conclusao", {}) == 0
+
+    def test_fan_out_para_milhares_de_assinantes(self, ouvinte):
+        """Testa a entrega de eventos publicados por outra thread a 5000 assinantes"""
+        assinaturas = [ouvinte.assinar("familia") for _ in range(5000)]
+        assert barramento.total_assinantes() == 5000
+
+        inicio = time.perf_counter()
+        publicacao = threading.Thread(target=lambda: [
+            barramento.publicar(["familia"], "conclusao", {"ids": [i]}) for i in range(10)
+        ])
+        publicacao.start()
+        publicacao.join()
+        ouvinte.loop.run_until_complete(asyncio.sleep(0))
+        decorrido = time.perf_counter() - inicio
+
+        assert all(assinatura.fila.qsize() == 10 for assinatura in assinaturas)
+        assert [ler_evento(assinaturas[-1].fila.get_nowait())[1]["ids"][0] for _ in range(10)] == list(range(10))
+        assert decorrido < 2
+
+
+class TestStream:
+    """Testes do gerador SSE do /tarefas-dia/stream"""
+
+    def test_envia_eventos_e_cancela_ao_fechar(self):
+        """Testa retry, eventos do canal e o cancelamento da assinatura"""
+        async def cenario():
+            gerador = gerar_eventos(["email:caio@gmail.com"])
+            assert (await gerador.__anext__()).startswith("retry:")
+            assert barramento.total_assinantes() == 1
+
+            barramento.publicar(canais_do_dono(email="caio@gmail.com"), "conclusao", {"ids": [5]})
+            evento = await gerador.__anext__()
+            await gerador.aclose()
+            return evento
+
+        evento = asyncio.run(cenario())
+        assert ler_evento(evento) == ("conclusao", {"ids": [5]})
+        assert not barramento.tem_assinantes()
+
+    def test_ping_sem_eventos(self, monkeypatch):
+        """Testa o comentario de keepalive quando nada acontece"""
+        monkeypatch.setattr("app.routers.eventos.INTERVALO_PING", 0.01)
+
+        async def cenario():
+            gerador = gerar_eventos(["familia"])
+            await gerador.__anext__()
+            ping = await gerador.__anext__()
+            await gerador.aclose()
+            return ping
+
+        assert asyncio.run(cenario()) == ": ping\n\n"
+
+
+class TestPublicacaoNosEndpoints:
+    """Testa que as escritas publicam o evento depois do commit"""
+
+    def test_concluir_e_desfazer(self, client, db, ouvinte):
+        """Testa os eventos de conclusao individuais e em lote"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Rita", 2)
+        emails = criar_tarefas_email(db, "rui@gmail.com", 1)
+        usuario_id, ids_usuario, id_email = usuario.idUsuario, [a.id for a in atribuicoes], emails[0].id
+        familia = ouvinte.assinar("familia")
+        rita = ouvinte.assinar(f"usuario:{usuario_id}")
+
+        client.post(f"/tarefas-dia/usuario/{ids_usuario[0]}/concluir")
+        client.post("/tarefas-dia/concluir-lote", json={
+            "tarefa_usuario_ids": [ids_usuario[1]],
+            "tarefa_email_ids": [id_email],
+        })
+        client.delete(f"/tarefas-dia/email/{id_email}/desfazer")
+
+        eventos = ouvinte.recebidos(familia)
+        assert [(tipo, dados["acao"], dados["origem"], dados["ids"]) for tipo, dados in eventos] == [
+            ("conclusao", "concluida", "usuario", [ids_usuario[0]]),
+            ("conclusao", "concluida", "usuario", [ids_usuario[1]]),
+            ("conclusao", "concluida", "email", [id_email]),
+            ("conclusao", "desfeita", "email", [id_email]),
+        ]
+        assert [dados["dono"] for _, dados in ouvinte.recebidos(rita)] == [usuario_id, usuario_id]
+
+    def test_conclusao_repetida_nao_publica(self, client, db, ouvinte):
+        """Testa que a segunda conclusao do dia (400) nao gera evento"""
+        emails = criar_tarefas_email(db, "sara@gmail.com", 1)
+        id_email = emails[0].id
+        client.post(f"/tarefas-dia/email/{id_email}/concluir")
+        familia = ouvinte.assinar("familia")
+
+        assert client.post(f"/tarefas-dia/email/{id_email}/concluir").status_code == 400
+        assert ouvinte.recebidos(familia) == []
+
+    def test_mudancas_de_atribuicao(self, client, db, ouvinte):
+        """Testa criar, mover para outro email e remover uma atribuicao"""
+        emails = criar_tarefas_email(db, "tito@gmail.com", 1)
+        tarefa_id = emails[0].Tarefa_idTarefa
+        tito = ouvinte.assinar("email:tito@gmail.com")
+        uma = ouvinte.assinar("email:uma@gmail.com")
+
+        criada = client.post("/tarefas-email/", json={
+            "Tarefa_idTarefa": tarefa_id, "email": "tito@gmail.com", "Periodo": "Noite",
+        }).json()
+        client.put(f"/tarefas-email/{criada['id']}", json={"email": "uma@gmail.com"})
+        client.delete(f"/tarefas-email/{criada['id']}")
+
+        assert [dados["acao"] for _, dados in ouvinte.recebidos(tito)] == ["criada", "atualizada"]
+        assert [dados["acao"] for _, dados in ouvinte.recebidos(uma)] == ["atualizada", "removida"]
+
+    def test_donos_consultados_so_com_assinantes(self, client, db, contador_sql, ouvinte):
+        """Testa que, sem ninguem conectado, concluir nao faz a consulta dos donos"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Vera", 2)
+        ids = [a.id for a in atribuicoes]
+
+        def consultas_de_donos():
+            return [c for c in contador_sql.comandos if c.startswith("SELECT tarefa_usuario.id, tarefa_usuario.\"usuario_idUsuario\"")]
+
+        with contador_sql:
+            client.post(f"/tarefas-dia/usuario/{ids[0]}/concluir")
+        assert consultas_de_donos() == []
+
+        ouvinte.assinar("familia")
+        with contador_sql:
+            client.post(f"/tarefas-dia/usuario/{ids[1]}/concluir")
+        assert len(consultas_de_donos()) == 1
@@ -0,0 +1,109 @@
+"""
+Testes para a exportacao em streaming do historico de conclusoes
+"""
+import csv
+import io
+import json
+from datetime import date, timedelta
+from functools import partial
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import exportacao
+from app.database import admissao_db
+from app.models import TarefaConclusaoDiaria
+from app.orcamento_sql import ContagemSQL, OrcamentoSQLExcedido, contar_na_conexao
+from app.routers.tarefa_conclusao_diaria import CAMPOS_EXPORTACAO_EMAIL
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+
+def concluir_em(db, dias, **kwargs):
+    for dia in dias:
+        db.add(TarefaConclusaoDiaria(data=dia, data_hora_conclusao=f"{dia} 08:00:00", status=1, **kwargs))
+    db.commit()
+
+
+class TestExportacaoHistorico:
+    """Testes para /tarefas-dia/.../historico/export"""
+
+    def test_ndjson_em_blocos(self, client, db, monkeypatch):
+        """Testa que todas as linhas saem em ordem mesmo com varios blocos"""
+        monkeypatch.setattr(exportacao, "TAMANHO_BLOCO", 3)
+        atribuicoes = criar_tarefas_email(db, "ana@gmail.com", 1)
+        dias = [date(2026, 1, 1) + timedelta(days=i) for i in range(10)]
+        concluir_em(db, dias, tarefa_email_id=atribuicoes[0].id)
+
+        response = client.get("/tarefas-dia/email/ana@gmail.com/historico/export?data_inicio=2026-01-02")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        linhas = [json.loads(l) for l in response.text.splitlines()]
+        assert [l["data"] for l in linhas] == [str(d) for d in reversed(dias[1:])]
+        assert linhas[0]["Tarefa_nome"] == "Tarefa 0"
+        assert linhas[0]["email"] == "ana@gmail.com"
+
+    def test_csv_usuario(self, client, db):
+        """Testa o CSV com cabecalho no historico por usuario"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Rita", 2)
+        usuario_id = usuario.idUsuario
+        concluir_em(db, [date(2026, 2, 1)], tarefa_usuario_id=atribuicoes[0].id)
+        concluir_em(db, [date(2026, 2, 2)], tarefa_usuario_id=atribuicoes[1].id)
+
+        response = client.get(f"/tarefas-dia/usuario/{usuario_id}/historico/export?format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="historico.csv"' in response.headers["content-disposition"]
+        linhas = list(csv.DictReader(io.StringIO(response.text)))
+        assert [l["tarefa_usuario_id"] for l in linhas] == [str(atribuicoes[1].id), str(atribuicoes[0].id)]
+        assert linhas[0]["Nome_usuario"] == "Rita"
+
+    def test_csv_vazio_tem_cabecalho(self, client):
+        """Testa que sem conclusoes o CSV traz so o cabecalho"""
+        response = client.get("/tarefas-dia/email/ninguem@gmail.com/historico/export?format=csv")
+        assert response.text.strip() == ",".join(CAMPOS_EXPORTACAO_EMAIL)
+
+    def test_formato_invalido(self, client):
+        """Testa que um formato desconhecido e rejeitado"""
+        response = client.get("/tarefas-dia/email/ana@gmail.com/historico/export?format=xml")
+        assert response.status_code == 422
+
+
+    def test_vaga_do_banco_ate_o_fim_do_corpo(self, client, db, monkeypatch):
+        """Testa que a exportacao ocupa uma vaga do admissao_db e a devolve no fim"""
+        atribuicoes = criar_tarefas_email(db, "ana@gmail.com", 1)
+        concluir_em(db, [date(2026, 1, 1)], tarefa_email_id=atribuicoes[0].id)
+        admitidas = admissao_db.admitidas
+
+        response = client.get("/tarefas-dia/email/ana@gmail.com/historico/export")
+        assert len(response.text.splitlines()) == 1
+        assert admissao_db.admitidas == admitidas + 1
+        assert admissao_db.em_uso == 0
+
+        monkeypatch.setattr(admissao_db, "capacidade", 0)
+        monkeypatch.setattr(admissao_db, "espera", 0.01)
+        response = client.get("/tarefas-dia/email/ana@gmail.com/historico/export")
+        assert response.status_code == 503
+
+
+class TestLinhasDasQueries:
+    """Testes do gerador de linhas"""
+
+    def test_fechar_antes_do_fim_libera_e_conta(self, db):
+        """Testa que liberar roda ao fechar o gerador e que os comandos entram no orcamento"""
+        atribuicoes = criar_tarefas_email(db, "ana@gmail.com", 1)
+        concluir_em(db, [date(2026, 1, 1), date(2026, 1, 2)], tarefa_email_id=atribuicoes[0].id)
+        fabrica = sessionmaker(bind=db.get_bind())
+        montar = lambda s: [s.query(TarefaConclusaoDiaria.id).order_by(TarefaConclusaoDiaria.id)] * 2
+        liberadas = []
+
+        linhas = exportacao.linhas_das_queries(fabrica, montar, ["id"], lambda: liberadas.append(1))
+        next(linhas)
+        linhas.close()
+        assert liberadas == [1]
+
+        contagem = ContagemSQL(maximo=1)
+        contar = partial(contar_na_conexao, contagem=contagem, metodo="GET", rota="/export")
+        linhas = exportacao.linhas_das_queries(fabrica, montar, ["id"], lambda: liberadas.append(2), contar)
+        with pytest.raises(OrcamentoSQLExcedido, match="2 comandos SQL, orcamento de 1"):
+            list(linhas)
+        assert liberadas == [1, 2]
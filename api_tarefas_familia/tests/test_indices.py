@@ -0,0 +1,132 @@
+"""
+Testes para os indices das consultas: as migracoes criam os indices
+declarados nos models e nenhuma consulta dos routers varre uma tabela inteira
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.database import Base
+from app.models import Local, Tarefa, Usuario, TarefaUsuario, TarefaEmail, TarefaConclusaoDiaria
+from migrations import migrar
+
+
+def varreduras_completas(conn, sql, parametros):
+    """Tabelas lidas por inteiro no plano de execucao da consulta"""
+    if conn.dialect.name == "sqlite":
+        plano = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parametros).all()
+        return [
+            linha.detail.split()[1] for linha in plano
+            if linha.detail.startswith("SCAN ") and "CONSTANT ROW" not in linha.detail
+        ]
+    if conn.dialect.name == "mysql":
+        plano = conn.exec_driver_sql(f"EXPLAIN {sql}", parametros).mappings().all()
+        return [linha["table"] for linha in plano if linha["type"] == "ALL"]
+    raise NotImplementedError(conn.dialect.name)
+
+
+def popular(db):
+    local = Local(Descricao="Cozinha")
+    db.add(local)
+    db.flush()
+    tarefas = [Tarefa(Tarefa=f"Tarefa {i}", Local_idLocal=local.idLocal) for i in range(5)]
+    usuarios = [Usuario(Nome=f"Membro {i}", login=f"membro{i}", senha="x", email=f"membro{i}@gmail.com") for i in range(3)]
+    db.add_all(tarefas + usuarios)
+    db.flush()
+    for i, tarefa in enumerate(tarefas):
+        for usuario in usuarios:
+            tu = TarefaUsuario(usuario_idUsuario=usuario.idUsuario, Tarefa_idTarefa=tarefa.idTarefa, Feito=i % 2)
+            te = TarefaEmail(Tarefa_idTarefa=tarefa.idTarefa, email=usuario.email, Feito=i % 2)
+            db.add_all([tu, te])
+            db.flush()
+            for dias in range(3):
+                dia = date.today() - timedelta(days=dias)
+                db.add(TarefaConclusaoDiaria(tarefa_usuario_id=tu.id, data=dia, data_hora_conclusao=str(dia), status=1))
+                db.add(TarefaConclusaoDiaria(tarefa_email_id=te.id, data=dia, data_hora_conclusao=str(dia), status=1))
+    db.commit()
+    return local.idLocal, tarefas[0].idTarefa, usuarios[0].idUsuario
+
+
+class TestMigracoes:
+    """Testes para as migracoes versionadas"""
+
+    def test_criam_os_indices_dos_models(self, tmp_path):
+        """Testa que o banco migrado tem os mesmos indices declarados nos models"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrado.db'}")
+        migrar(engine, log=lambda *_: None)
+        migrar(engine, log=lambda *_: None)
+
+        inspetor = inspect(engine)
+        for tabela in Base.metadata.sorted_tables:
+            esperados = {i.name for i in tabela.indexes if i.name.startswith(("idx_", "uq_"))}
+            existentes = {i["name"] for i in inspetor.get_indexes(tabela.name)}
+            assert esperados <= existentes, tabela.name
+        engine.dispose()
+
+    def test_email_unico_so_entre_contas_gmail(self, tmp_path):
+        """Testa que a 0003 aceita contas simples com o mesmo email e para com contas Gmail repetidas"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrado.db'}")
+        migrar(engine, alvo=2, log=lambda *_: None)
+        inserir = text("INSERT INTO usuario (Nome, login, email, tipo_conta) VALUES (:login, :login, :email, :tipo)")
+        with engine.begin() as conn:
+            conn.execute(inserir, [
+                {"login": "pai", "email": "pai@gmail.com", "tipo": "simples"},
+                {"login": "filho", "email": "pai@gmail.com", "tipo": "simples"},
+                {"login": "mae@gmail.com", "email": "mae@gmail.com", "tipo": "gmail"},
+                {"login": "mae2", "email": "mae@gmail.com", "tipo": "gmail"},
+            ])
+        with pytest.raises(RuntimeError, match="mae@gmail.com"):
+            migrar(engine, log=lambda *_: None)
+
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM usuario WHERE login = 'mae2'"))
+        migrar(engine, log=lambda *_: None)
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT email_gmail FROM usuario ORDER BY idUsuario")).scalars().all() == [
+                None, None, "mae@gmail.com"
+            ]
+        engine.dispose()
+
+
+class TestPlanosDeConsulta:
+    """Roda EXPLAIN nas consultas dos routers sobre um banco populado"""
+
+    @pytest.mark.parametrize("modo_db", ["sync"], indirect=True)
+    def test_consultas_usam_indices(self, client, db, engine, contador_sql):
+        """Testa que nenhuma consulta filtrada faz varredura completa de tabela"""
+        local_id, tarefa_id, usuario_id = popular(db)
+        inicio = (date.today() - timedelta(days=1)).isoformat()
+
+        with contador_sql:
+            for url in [
+                "/tarefas-dia/email/membro0@gmail.com",
+                "/tarefas-dia/usuario/{usuario_id}",
+                f"/tarefas-dia/email/membro0@gmail.com/historico?data_inicio={inicio}",
+                f"/tarefas-dia/usuario/{{usuario_id}}/historico?data_inicio={inicio}",
+                "/tarefas-email/email/membro0@gmail.com",
+                "/tarefas-email/email/membro0@gmail.com/pendentes",
+                "/tarefas-email/email/membro0@gmail.com/detalhado",
+                "/tarefas-usuarios/usuario/{usuario_id}",
+                "/tarefas-usuarios/pendentes/usuario/{usuario_id}",
+                "/tarefas-usuarios/tarefa/{tarefa_id}",
+                "/tarefas/local/{local_id}",
+                "/tarefas/{tarefa_id}",
+                "/locais/{local_id}",
+                "/usuarios/{usuario_id}",
+                "/sync?since=1",
+            ]:
+                url = url.format(usuario_id=usuario_id, tarefa_id=tarefa_id, local_id=local_id)
+                assert client.get(url).status_code == 200, url
+            client.post("/usuarios/login", json={"login": "membro0", "senha": "x"})
+            client.post("/usuarios/login/gmail", json={"email": "membro1@gmail.com"})
+
+        consultas = [
+            (sql, parametros)
+            for sql, parametros in zip(contador_sql.comandos, contador_sql.parametros)
+            if sql.lstrip().upper().startswith("SELECT")
+        ]
+        assert len(consultas) >= 16
+        with engine.connect() as conn:
+            for sql, parametros in consultas:
+                assert varreduras_completas(conn, sql, parametros) == [], sql
@@ -0,0 +1,35 @@
+"""
+Testes para a inicializacao da aplicacao sem acesso ao banco
+"""
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Conta as conexoes abertas pelo import e pela primeira requisicao; o banco
+# da DATABASE_URL nem existe
+SCRIPT = """
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+conexoes = []
+event.listen(Pool, "connect", lambda *args: conexoes.append(args))
+
+import main
+from fastapi.testclient import TestClient
+
+with TestClient(main.app) as client:
+    assert client.get("/health").status_code == 200
+print(len(conexoes))
+"""
+
+
+def test_import_e_health_sem_conexao_com_o_banco(tmp_path):
+    """Testa que importar main e responder /health nao abre conexao com o banco"""
+    ambiente = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'nao_existe' / 'tarefas.db'}"}
+    resultado = subprocess.run(
+        [sys.executable, "-c", SCRIPT], cwd=RAIZ, env=ambiente, capture_output=True, text=True, timeout=60
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    assert resultado.stdout.strip() == "0"
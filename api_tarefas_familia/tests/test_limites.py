@@ -0,0 +1,200 @@
+"""
+Testes para o limite de requisicoes por cliente e o limite de acesso ao banco
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from app.database import admissao_db
+from app.limites import LimiteConcorrencia, LimiteRequisicoes, LimiteRequisicoesMiddleware
+from app.telemetria import Coletor, TelemetriaMiddleware
+
+
+class TestTokenBucket:
+    """Testes do balde de fichas"""
+
+    def test_rajada_e_reposicao(self):
+        """Testa a rajada ate a capacidade e a reposicao das fichas com o tempo"""
+        limites = LimiteRequisicoes({"*": {"capacidade": 2, "por_minuto": 60}})
+        regra = limites.regra("GET", "/qualquer")
+
+        assert limites.consumir(regra, "1.2.3.4", agora=100) == 0
+        assert limites.consumir(regra, "1.2.3.4", agora=100) == 0
+        assert limites.consumir(regra, "1.2.3.4", agora=100) == pytest.approx(1)
+        assert limites.consumir(regra, "5.6.7.8", agora=100) == 0
+        assert limites.consumir(regra, "1.2.3.4", agora=101) == 0
+        assert (regra.permitidas, regra.rejeitadas) == (4, 1)
+
+    def test_clientes_guardados_sao_limitados(self):
+        """Testa que os baldes mais antigos sao descartados acima de max_clientes"""
+        limites = LimiteRequisicoes({"*": {"capacidade": 1, "por_minuto": 1}}, max_clientes=2)
+        regra = limites.regra("GET", "/")
+        for cliente in ("a", "b", "c"):
+            limites.consumir(regra, cliente, agora=0)
+        assert limites.estatisticas()["clientes"] == 2
+        # "a" saiu e comeca com o balde cheio de novo
+        assert limites.consumir(regra, "a", agora=0) == 0
+
+
+class Login(BaseModel):
+    login: str
+
+
+@pytest.fixture
+def cliente_limitado():
+    """Aplicacao minima com o middleware e regras pequenas"""
+    limites = LimiteRequisicoes({
+        "POST /usuarios/login": {"capacidade": 2, "por_minuto": 1, "chave": "login"},
+        "GET /tarefas-dia/email/{email}": {"capacidade": 1, "por_minuto": 1, "chave": "email"},
+        "*": {"capacidade": 3, "por_minuto": 1},
+    })
+    app = FastAPI()
+
+    @app.post("/usuarios/login")
+    def login(dados: Login):
+        return {"login": dados.login}
+
+    @app.get("/tarefas-dia/email/{email}")
+    def quadro(email: str):
+        return []
+
+    @app.get("/health")
+    def health():
+        return {"status": "healthy"}
+
+    app.add_middleware(LimiteRequisicoesMiddleware, limites=limites)
+    app.state.coletor = Coletor(ativo=True)
+    app.add_middleware(TelemetriaMiddleware, coletor_metricas=app.state.coletor)
+    with TestClient(app) as client:
+        yield client, limites
+
+
+class TestMiddleware:
+    """Testes do LimiteRequisicoesMiddleware"""
+
+    def test_login_limitado_por_login(self, cliente_limitado):
+        """Testa o balde por login lido do corpo, que continua chegando ao endpoint"""
+        client, _ = cliente_limitado
+        for _ in range(2):
+            response = client.post("/usuarios/login", json={"login": "Ana"})
+            assert response.json() == {"login": "Ana"}
+
+        bloqueada = client.post("/usuarios/login", json={"login": "ana "})
+        assert bloqueada.status_code == 429
+        assert int(bloqueada.headers["Retry-After"]) >= 1
+        assert client.post("/usuarios/login", json={"login": "bruno"}).status_code == 200
+
+    def test_email_da_rota_e_ip_nas_demais(self, cliente_limitado):
+        """Testa o balde pelo email do caminho e a regra "*" por IP"""
+        client, limites = cliente_limitado
+        assert client.get("/tarefas-dia/email/ana@gmail.com").status_code == 200
+        assert client.get("/tarefas-dia/email/ana@gmail.com").status_code == 429
+        assert client.get("/tarefas-dia/email/bia@gmail.com").status_code == 200
+
+        assert [client.get("/health").status_code for _ in range(4)] == [200, 200, 200, 429]
+        regras = limites.estatisticas()["regras"]
+        assert regras["GET /tarefas-dia/email/{email}"]["rejeitadas"] == 1
+        assert regras["*"]["rejeitadas"] == 1
+
+    def test_429_na_telemetria_da_rota(self, cliente_limitado):
+        """Testa que o 429 aparece na metrica da rota limitada, nao como rota desconhecida"""
+        client, _ = cliente_limitado
+        client.get("/tarefas-dia/email/ana@gmail.com")
+        client.get("/tarefas-dia/email/ana@gmail.com")
+        requisicoes = client.app.state.coletor.requisicoes
+        assert requisicoes[("GET", "/tarefas-dia/email/{email}", "200")] == 1
+        assert requisicoes[("GET", "/tarefas-dia/email/{email}", "429")] == 1
+
+
+class TestAdmissaoBanco:
+    """Testes do limite de requisicoes usando o banco ao mesmo tempo"""
+
+    def test_espera_e_rejeicao(self):
+        """Testa que quem espera entra quando a vaga libera e quem passa do tempo e rejeitado"""
+        limite = LimiteConcorrencia(capacidade=1, espera=1)
+        assert limite.entrar()
+        threading.Timer(0.05, limite.sair).start()
+        assert limite.entrar()
+
+        limite.espera = 0.02
+        assert not limite.entrar()
+
+        async def entrar_async():
+            return await limite.entrar_async()
+
+        assert asyncio.run(entrar_async()) is False
+        limite.sair()
+        assert asyncio.run(entrar_async()) is True
+        estatisticas = limite.estatisticas()
+        assert (estatisticas["admitidas"], estatisticas["rejeitadas"], estatisticas["em_uso"]) == (3, 2, 1)
+
+    def test_espera_async_acordada_na_ordem(self):
+        """Testa que sair() entrega a vaga ao primeiro que espera no event loop"""
+        limite = LimiteConcorrencia(capacidade=1, espera=1)
+        assert limite.entrar()
+
+        async def esperar():
+            primeiro = asyncio.create_task(limite.entrar_async())
+            segundo = asyncio.create_task(limite.entrar_async())
+            await asyncio.sleep(0.01)
+            assert limite.estatisticas()["aguardando"] == 2
+            threading.Timer(0.02, limite.sair).start()
+            assert await primeiro is True
+            assert not segundo.done()
+            segundo.cancel()
+            return await asyncio.gather(segundo, return_exceptions=True)
+
+        assert isinstance(asyncio.run(esperar())[0], asyncio.CancelledError)
+        limite.sair()
+        estatisticas = limite.estatisticas()
+        assert (estatisticas["em_uso"], estatisticas["aguardando"]) == (0, 0)
+        assert (estatisticas["admitidas"], estatisticas["rejeitadas"]) == (2, 1)
+
+    def test_fila_unica_entre_threads_e_event_loop(self):
+        """Testa que a thread que chegou antes recebe a vaga antes do event loop"""
+        limite = LimiteConcorrencia(capacidade=1, espera=1)
+        assert limite.entrar()
+        resultados = []
+        thread = threading.Thread(target=lambda: resultados.append(("thread", limite.entrar())))
+        thread.start()
+        while limite.estatisticas()["aguardando"] < 1:
+            time.sleep(0.001)
+
+        async def esperar():
+            tarefa = asyncio.create_task(limite.entrar_async())
+            await asyncio.sleep(0.01)
+            limite.sair()
+            await asyncio.to_thread(thread.join)
+            assert not tarefa.done()
+            limite.sair()
+            resultados.append(("async", await tarefa))
+
+        asyncio.run(esperar())
+        assert resultados == [("thread", True), ("async", True)]
+
+    def test_503_quando_o_banco_esta_ocupado(self, client, monkeypatch):
+        """Testa o 503 rapido nas dependencies get_db e get_db_executor"""
+        monkeypatch.setattr(admissao_db, "capacidade", 1)
+        monkeypatch.setattr(admissao_db, "espera", 0.05)
+        antes = client.get("/metrics/limites").json()["db"]["rejeitadas"]
+
+        assert admissao_db.entrar()
+        try:
+            inicio = time.monotonic()
+            for url in ("/tarefas-usuarios/", "/tarefas-email/"):
+                response = client.get(url)
+                assert response.status_code == 503, url
+                assert response.headers["Retry-After"] == "1"
+            assert time.monotonic() - inicio < 1
+        finally:
+            admissao_db.sair()
+
+        assert client.get("/tarefas-email/").status_code == 200
+        depois = client.get("/metrics/limites").json()["db"]
+        assert depois["rejeitadas"] - antes == 2
+        assert depois["em_uso"] == 0
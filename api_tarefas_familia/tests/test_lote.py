@@ -0,0 +1,136 @@
+"""
+Testes para os endpoints de criacao em lote
+"""
+from sqlalchemy import event
+
+from app import lote
+from app.models import Tarefa, TarefaEmail, TarefaUsuario, Usuario
+
+
+def criar_tarefas(db, quantidade):
+    tarefas = [Tarefa(Tarefa=f"Tarefa {i}") for i in range(quantidade)]
+    db.add_all(tarefas)
+    db.commit()
+    return [t.idTarefa for t in tarefas]
+
+
+class TestTarefasEmailLote:
+    """Testes para /tarefas-email/bulk nos dois modos de banco"""
+
+    def test_cria_itens_e_reporta_erros(self, client, db):
+        """Testa que itens invalidos sao reportados pelo indice sem impedir os demais"""
+        ids_tarefa = criar_tarefas(db, 2)
+        itens = [
+            {"Tarefa_idTarefa": ids_tarefa[0], "email": "ana@gmail.com", "Periodo": "Manha"},
+            {"Tarefa_idTarefa": 9999, "email": "ana@gmail.com"},
+            {"Tarefa_idTarefa": ids_tarefa[1], "email": "ana@gmail.com", "Periodo": "x" * 46},
+            {"Tarefa_idTarefa": ids_tarefa[1], "email": "bia@gmail.com"},
+        ]
+
+        response = client.post("/tarefas-email/bulk", json={"itens": itens})
+        assert response.status_code == 201
+        data = response.json()
+        assert [c["indice"] for c in data["criados"]] == [0, 3]
+        assert data["erros"] == [
+            {"indice": 1, "detail": "Tarefa nao encontrada"},
+            {"indice": 2, "detail": "Periodo excede 45 caracteres"},
+        ]
+
+        for criado in data["criados"]:
+            registro = db.get(TarefaEmail, criado["id"])
+            assert registro.email == itens[criado["indice"]]["email"]
+            assert registro.Tarefa_idTarefa == itens[criado["indice"]]["Tarefa_idTarefa"]
+
+    def test_um_insert_por_bloco(self, client, db, contador_sql, monkeypatch):
+        """Testa que as linhas sao gravadas com um INSERT por bloco, na ordem"""
+        monkeypatch.setattr(lote, "TAMANHO_BLOCO", 100)
+        ids_tarefa = criar_tarefas(db, 3)
+        itens = [{"Tarefa_idTarefa": ids_tarefa[i % 3], "email": f"u{i}@gmail.com"} for i in range(250)]
+
+        with contador_sql:
+            response = client.post("/tarefas-email/bulk", json={"itens": itens})
+        assert response.status_code == 201
+        inserts = [c for c in contador_sql.comandos if c.lstrip().startswith("INSERT INTO tarefa_email")]
+        assert len(inserts) == 3
+        # O registro de alteracoes do /sync e gravado com um unico executemany
+        assert sum(c.lstrip().startswith("INSERT INTO alteracao") for c in contador_sql.comandos) == 1
+
+        criados = response.json()["criados"]
+        assert len(criados) == 250
+        emails = dict(db.query(TarefaEmail.id, TarefaEmail.email).all())
+        assert all(emails[c["id"]] == f"u{c['indice']}@gmail.com" for c in criados)
+
+    def test_lote_vazio_e_rejeitado(self, client):
+        """Testa que um lote sem itens e rejeitado na validacao"""
+        assert client.post("/tarefas-email/bulk", json={"itens": []}).status_code == 422
+
+
+class TestTarefasUsuarioLote:
+    """Testes para /tarefas-usuarios/bulk"""
+
+    def test_cria_itens_e_reporta_erros(self, client, db):
+        """Testa usuario e tarefa inexistentes no mesmo lote"""
+        ids_tarefa = criar_tarefas(db, 1)
+        usuario = Usuario(Nome="Caio", login="caio", senha="x")
+        db.add(usuario)
+        db.commit()
+        usuario_id = usuario.idUsuario
+
+        response = client.post("/tarefas-usuarios/bulk", json={"itens": [
+            {"usuario_idUsuario": usuario_id, "Tarefa_idTarefa": ids_tarefa[0], "Periodo": "Tarde"},
+            {"usuario_idUsuario": 9999, "Tarefa_idTarefa": ids_tarefa[0]},
+            {"usuario_idUsuario": usuario_id, "Tarefa_idTarefa": 9999},
+        ]})
+        assert response.status_code == 201
+        data = response.json()
+        assert [c["indice"] for c in data["criados"]] == [0]
+        assert [e["indice"] for e in data["erros"]] == [1, 2]
+
+        registro = db.get(TarefaUsuario, data["criados"][0]["id"])
+        assert registro.usuario_idUsuario == usuario_id
+        assert registro.Periodo == "Tarde"
+
+
+class TestInserirEmLote:
+    """Testes de inserir_em_lote direto na sessao"""
+
+    def linhas(self, db, quantidade):
+        tarefa_id = criar_tarefas(db, 1)[0]
+        return [{"Tarefa_idTarefa": tarefa_id, "email": f"u{i}@gmail.com"} for i in range(quantidade)]
+
+    def contar_inserts(self, engine):
+        inserts = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *_: inserts.append(statement)
+                     if statement.startswith("INSERT INTO tarefa_email") else None)
+        return inserts
+
+    def test_bloco_limitado_pelos_parametros(self, db, engine):
+        """Testa que o bloco x colunas fica dentro dos 999 parametros do SQLite"""
+        colunas = len(TarefaEmail.__table__.columns)
+        assert lote.tamanho_do_bloco(db.connection(), TarefaEmail.__table__) * colunas <= 999
+
+        linhas = self.linhas(db, 300)
+        inserts = self.contar_inserts(engine)
+        ids = lote.inserir_em_lote(db, TarefaEmail, linhas)
+        db.commit()
+        assert len(inserts) == -(-300 // (999 // colunas))
+        emails = dict(db.query(TarefaEmail.id, TarefaEmail.email).all())
+        assert [emails[id] for id in ids] == [linha["email"] for linha in linhas]
+
+    def test_sem_returning_le_ids_pelo_token(self, db, engine, monkeypatch):
+        """Testa que sem RETURNING o bloco e um INSERT e os ids vem de um SELECT pelo token"""
+        linhas = self.linhas(db, 5)
+        monkeypatch.setattr(engine.dialect, "insert_returning", False)
+        inserts = self.contar_inserts(engine)
+        selects = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *_: selects.append(statement)
+                     if "lote_insercao =" in statement else None)
+
+        ids = lote.inserir_em_lote(db, TarefaEmail, linhas)
+        db.commit()
+        assert len(inserts) == 1
+        assert len(selects) == 1
+        emails = dict(db.query(TarefaEmail.id, TarefaEmail.email).all())
+        assert [emails[id] for id in ids] == [linha["email"] for linha in linhas]
@@ -0,0 +1,40 @@
+"""
+Testes para os endpoints de Metricas
+"""
+import pytest
+from sqlalchemy import exc
+
+from app import database
+from app.database import MetricasPool, criar_engine
+
+
+class TestMetricasPool:
+    """Testes para /metrics/pool"""
+
+    @pytest.fixture
+    def engine_pequena(self, caminho_db, monkeypatch):
+        metricas = MetricasPool()
+        engine = criar_engine(f"sqlite:///{caminho_db}", metricas, pool_size=1, max_overflow=0, pool_timeout=0.05)
+        monkeypatch.setattr(database, "engine", engine)
+        monkeypatch.setattr(database, "metricas_pool", metricas)
+        yield engine
+        engine.dispose()
+
+    @pytest.mark.parametrize("modo_db", ["sync"], indirect=True)
+    def test_checkouts_em_uso_e_timeouts(self, client, engine_pequena):
+        """Testa que o endpoint reflete conexoes em uso e timeouts do pool"""
+        conexao = engine_pequena.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine_pequena.connect()
+
+        data = client.get("/metrics/pool").json()
+        assert data["sync"]["em_uso"] == 1
+        assert data["sync"]["checkouts"] == 1
+        assert data["sync"]["timeouts"] == 1
+        assert data["sync"]["espera_max_ms"] >= 50
+        assert data["async"] is None
+
+        conexao.close()
+        data = client.get("/metrics/pool").json()
+        assert data["sync"]["em_uso"] == 0
+        assert data["sync"]["ociosas"] == 1
@@ -0,0 +1,94 @@
+"""
+Testes para o orcamento de SQL por requisicao e a deteccao de N+1
+"""
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import orcamento_sql as orcamento
+from app.orcamento_sql import ContagemSQL, OrcamentoSQLExcedido, formato_do_comando, orcamento_sql
+from tests.test_tarefas_dia import criar_tarefas_email
+
+
+class TestContagem:
+    """Testes da contagem e dos formatos dos comandos"""
+
+    def test_formato_ignora_espacos_e_tamanho_do_in(self):
+        """Testa que IN com quantidades diferentes de parametros tem o mesmo formato"""
+        assert formato_do_comando("SELECT a\n  FROM t WHERE id IN (?, ?, ?)") == \
+            formato_do_comando("SELECT a FROM t WHERE id IN (?)")
+        assert formato_do_comando("SELECT a FROM t WHERE id IN (%(id_1)s, %(id_2)s)") == \
+            "SELECT a FROM t WHERE id IN (?)"
+
+    def test_violacoes(self):
+        """Testa o orcamento estourado e o SELECT repetido; escritas repetidas nao contam como N+1"""
+        contagem = ContagemSQL(maximo=3, repeticoes=2)
+        for _ in range(3):
+            contagem.registrar("INSERT INTO t VALUES (?)")
+        assert contagem.violacoes() == []
+
+        for _ in range(3):
+            contagem.registrar("SELECT a FROM t WHERE id = ?")
+        tipos = [tipo for tipo, _ in contagem.violacoes()]
+        assert tipos == ["orcamento", "repeticao"]
+
+
+@pytest.fixture
+def cliente_n_mais_1(engine):
+    """Aplicacao minima com uma rota dentro do orcamento e uma com N+1"""
+    app = FastAPI(dependencies=[orcamento_sql()])
+
+    @app.get("/uma-consulta", dependencies=[orcamento_sql(1)])
+    def uma_consulta():
+        with engine.connect() as conn:
+            return {"ids": [r[0] for r in conn.execute(text("SELECT idTarefa FROM Tarefa"))]}
+
+    @app.get("/n-mais-1")
+    def n_mais_1():
+        with engine.connect() as conn:
+            ids = [r[0] for r in conn.execute(text("SELECT idTarefa FROM Tarefa"))]
+            for id in ids:
+                conn.execute(text("SELECT Tarefa FROM Tarefa WHERE idTarefa = :id"), {"id": id})
+        return {"ids": ids}
+
+    @app.get("/acima-do-orcamento", dependencies=[orcamento_sql(1)])
+    async def acima_do_orcamento():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        return {}
+
+    return TestClient(app)
+
+
+class TestRotas:
+    """Testa a dependency nas rotas"""
+
+    def test_modo_erro_falha_a_requisicao(self, db, cliente_n_mais_1):
+        """Testa que N+1 e orcamento estourado levantam OrcamentoSQLExcedido no modo dos testes"""
+        criar_tarefas_email(db, "jade@gmail.com", 5)
+        assert cliente_n_mais_1.get("/uma-consulta").status_code == 200
+        with pytest.raises(OrcamentoSQLExcedido, match="mesmo SELECT 5 vezes"):
+            cliente_n_mais_1.get("/n-mais-1")
+        with pytest.raises(OrcamentoSQLExcedido, match="2 comandos SQL, orcamento de 1"):
+            cliente_n_mais_1.get("/acima-do-orcamento")
+        assert orcamento.violacoes_por_rota[("GET", "/n-mais-1", "repeticao")] >= 1
+
+    def test_modo_log_so_avisa(self, db, cliente_n_mais_1, monkeypatch, caplog):
+        """Testa que no modo padrao a resposta sai normalmente e o N+1 vai para o log"""
+        monkeypatch.setattr(orcamento, "ORCAMENTO_SQL", "log")
+        criar_tarefas_email(db, "jade@gmail.com", 5)
+        with caplog.at_level(logging.WARNING, logger="app.orcamento_sql"):
+            response = cliente_n_mais_1.get("/n-mais-1")
+        assert response.status_code == 200
+        assert len(response.json()["ids"]) == 5
+        assert "GET /n-mais-1" in caplog.text
+
+    def test_rotas_declaram_orcamento(self, client, db):
+        """Testa que o quadro do dia declara o orcamento e fica dentro dele com varias tarefas"""
+        criar_tarefas_email(db, "jade@gmail.com", 20)
+        assert client.get("/tarefas-dia/email/jade@gmail.com").status_code == 200
+        assert "api_orcamento_sql_violacoes_total" in client.get("/metrics").text
@@ -0,0 +1,98 @@
+"""
+Testes para a paginacao por cursor (X-Next-Cursor)
+"""
+from datetime import date, timedelta
+
+from app.models import Local, Tarefa, TarefaEmail, TarefaConclusaoDiaria
+
+
+def percorrer(client, url, limit):
+    """Segue o cabecalho X-Next-Cursor ate a ultima pagina"""
+    paginas = []
+    params = {"limit": limit}
+    while True:
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        paginas.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return paginas
+        params = {"limit": limit, "cursor": cursor}
+
+
+class TestPaginacaoPorId:
+    """Testes para a paginacao pela chave primaria"""
+
+    def test_percorre_todos_os_locais(self, client, db):
+        """Testa que as paginas cobrem todos os registros sem repetir"""
+        db.add_all([Local(Descricao=f"Local {i}") for i in range(7)])
+        db.commit()
+
+        paginas = percorrer(client, "/locais/", 3)
+        assert [len(p) for p in paginas] == [3, 3, 1]
+        ids = [l["idLocal"] for p in paginas for l in p]
+        assert ids == sorted(ids) and len(set(ids)) == 7
+
+    def test_remocao_entre_paginas_nao_desloca(self, client, db):
+        """Testa que uma remocao entre paginas nao faz pular nem repetir registros"""
+        locais = [Local(Descricao=f"Local {i}") for i in range(4)]
+        db.add_all(locais)
+        db.commit()
+
+        primeira = client.get("/locais/", params={"limit": 2})
+        db.delete(locais[0])
+        db.commit()
+        segunda = client.get("/locais/", params={"limit": 2, "cursor": primeira.headers["X-Next-Cursor"]})
+        assert [l["idLocal"] for l in segunda.json()] == [locais[2].idLocal, locais[3].idLocal]
+
+    def test_skip_continua_funcionando(self, client, db):
+        """Testa a compatibilidade com skip/limit"""
+        db.add_all([Local(Descricao=f"Local {i}") for i in range(3)])
+        db.commit()
+        response = client.get("/locais/", params={"skip": 1, "limit": 5})
+        assert len(response.json()) == 2
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_tarefas_email(self, client, db):
+        """Testa a paginacao de /tarefas-email/"""
+        tarefa = Tarefa(Tarefa="Lavar louca")
+        db.add(tarefa)
+        db.flush()
+        db.add_all([TarefaEmail(Tarefa_idTarefa=tarefa.idTarefa, email="ana@gmail.com") for _ in range(5)])
+        db.commit()
+
+        paginas = percorrer(client, "/tarefas-email/", 2)
+        assert [len(p) for p in paginas] == [2, 2, 1]
+
+    def test_cursor_invalido(self, client):
+        """Testa que um cursor malformado retorna 400"""
+        response = client.get("/locais/", params={"cursor": "nao-e-um-cursor"})
+        assert response.status_code == 400
+
+
+class TestPaginacaoHistorico:
+    """Testes para a paginacao do historico por (data, id)"""
+
+    def test_percorre_historico_com_datas_repetidas(self, client, db):
+        """Testa que a paginacao por (data, id) respeita a ordem e empates de data"""
+        tarefa = Tarefa(Tarefa="Arrumar cama")
+        db.add(tarefa)
+        db.flush()
+        atribuicoes = [TarefaEmail(Tarefa_idTarefa=tarefa.idTarefa, email="ana@gmail.com") for _ in range(2)]
+        db.add_all(atribuicoes)
+        db.flush()
+        for dias in range(3):
+            dia = date.today() - timedelta(days=dias)
+            for a in atribuicoes:
+                db.add(TarefaConclusaoDiaria(tarefa_email_id=a.id, data=dia, data_hora_conclusao=str(dia), status=1))
+        db.commit()
+
+        completo = client.get("/tarefas-dia/email/ana@gmail.com/historico").json()
+        assert len(completo) == 6
+
+        paginas = percorrer(client, "/tarefas-dia/email/ana@gmail.com/historico", 4)
+        assert [len(p) for p in paginas] == [4, 2]
+        itens = [h for p in paginas for h in p]
+        assert [(h["data"], h["id"]) for h in itens] == sorted(
+            [(h["data"], h["id"]) for h in completo], reverse=True
+        )
@@ -0,0 +1,64 @@
+"""
+Testes para o resumo diario de conclusoes (tarefa_conclusao_resumo)
+"""
+from datetime import date
+
+from app.models import TarefaConclusaoResumo
+from app.resumo import reconstruir_resumo
+from tests.test_tarefas_dia import criar_tarefas_email, criar_tarefas_usuario
+
+
+def resumo(db):
+    db.expire_all()
+    return {
+        (r.data, r.origem, r.dono, r.Tarefa_idTarefa): r.concluidas
+        for r in db.query(TarefaConclusaoResumo).all()
+        if r.concluidas
+    }
+
+
+class TestResumo:
+    """O resumo mantido pelos handlers deve bater com o reconstruido do historico"""
+
+    def test_concluir_e_desfazer_mantem_resumo(self, client, db):
+        """Testa concluir, desfazer e os endpoints em lote"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Olga", 3)
+        emails = criar_tarefas_email(db, "paulo@gmail.com", 2)
+        usuario_id = usuario.idUsuario
+        hoje = date.today()
+
+        client.post(f"/tarefas-dia/usuario/{atribuicoes[0].id}/concluir")
+        client.post(f"/tarefas-dia/email/{emails[0].id}/concluir")
+        client.post("/tarefas-dia/concluir-lote", json={
+            "tarefa_usuario_ids": [atribuicoes[1].id, atribuicoes[2].id],
+            "tarefa_email_ids": [emails[1].id],
+        })
+        mantido = resumo(db)
+        assert mantido[(hoje, "usuario", str(usuario_id), atribuicoes[0].Tarefa_idTarefa)] == 1
+        assert mantido[(hoje, "email", "paulo@gmail.com", emails[1].Tarefa_idTarefa)] == 1
+        assert len(mantido) == 5
+
+        client.delete(f"/tarefas-dia/usuario/{atribuicoes[0].id}/desfazer")
+        client.request("DELETE", "/tarefas-dia/desfazer-lote", json={"tarefa_email_ids": [emails[0].id]})
+        mantido = resumo(db)
+        assert len(mantido) == 3
+
+        reconstruir_resumo(db)
+        db.commit()
+        assert resumo(db) == mantido
+
+    def test_mesma_tarefa_duas_vezes(self, client, db):
+        """Testa a contagem quando o dono tem a mesma tarefa em dois periodos"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Quim", 1)
+        segunda = client.post("/tarefas-usuarios/", json={
+            "usuario_idUsuario": atribuicoes[0].usuario_idUsuario,
+            "Tarefa_idTarefa": atribuicoes[0].Tarefa_idTarefa,
+            "Periodo": "Noite",
+        }).json()
+
+        client.post(f"/tarefas-dia/usuario/{atribuicoes[0].id}/concluir")
+        client.post(f"/tarefas-dia/usuario/{segunda['id']}/concluir")
+        assert list(resumo(db).values()) == [2]
+
+        client.delete(f"/tarefas-dia/usuario/{segunda['id']}/desfazer")
+        assert list(resumo(db).values()) == [1]
@@ -0,0 +1,73 @@
+"""
+Testes para a serializacao rapida das listas (TypeAdapter e orjson)
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.models import TarefaConclusaoDiaria
+from app.routers import tarefa_conclusao_diaria, tarefa_email
+from tests.test_tarefas_dia import concluir_hoje, criar_tarefas_email, criar_tarefas_usuario
+
+SERIALIZADORES = (
+    tarefa_email.TAREFAS_DETALHADAS,
+    tarefa_conclusao_diaria.HISTORICO,
+    tarefa_conclusao_diaria.TAREFAS_DO_DIA,
+    tarefa_conclusao_diaria.TAREFAS_DO_DIA_USUARIO,
+)
+
+
+def popular(db):
+    _, atribuicoes = criar_tarefas_usuario(db, "Gil", 2)
+    emails = criar_tarefas_email(db, "gil@gmail.com", 2)
+    for dias in range(3):
+        db.add(TarefaConclusaoDiaria(
+            data=date.today() - timedelta(days=dias + 1), data_hora_conclusao="2026-01-01 08:00:00",
+            status=1, tarefa_usuario_id=atribuicoes[0].id,
+        ))
+    concluir_hoje(db, tarefa_email_id=emails[0].id)
+    return atribuicoes[0].usuario_idUsuario
+
+
+def urls(usuario_id):
+    return [
+        "/tarefas-email/email/gil@gmail.com/detalhado",
+        "/tarefas-dia/email/gil@gmail.com/historico",
+        f"/tarefas-dia/usuario/{usuario_id}/historico?limit=2",
+        "/tarefas-dia/email/gil@gmail.com",
+        f"/tarefas-dia/usuario/{usuario_id}",
+    ]
+
+
+class TestSerializacao:
+    """Os dois caminhos de serializacao geram o mesmo corpo"""
+
+    def test_campos_do_schema(self, client, db):
+        """Testa que os historicos trazem todos os campos do schema, inclusive os nulos"""
+        usuario_id = popular(db)
+        response = client.get(f"/tarefas-dia/usuario/{usuario_id}/historico?limit=2")
+        assert response.headers["X-Next-Cursor"]
+        assert response.json()[0] == {
+            "id": response.json()[0]["id"],
+            "tarefa_email_id": None,
+            "tarefa_usuario_id": response.json()[0]["tarefa_usuario_id"],
+            "Tarefa_nome": "Tarefa 0",
+            "Tarefa_descricao": None,
+            "email": None,
+            "Nome_usuario": "Gil",
+            "data": str(date.today() - timedelta(days=1)),
+            "data_hora_conclusao": "2026-01-01 08:00:00",
+            "status": 1,
+        }
+
+    def test_orjson_igual_ao_type_adapter(self, client, db, monkeypatch):
+        """Testa que o orjson (sem validacao) gera exatamente os mesmos bytes que o TypeAdapter"""
+        pytest.importorskip("orjson")
+        usuario_id = popular(db)
+        corpos = {}
+        for usar_orjson in (False, True):
+            for serializador in SERIALIZADORES:
+                monkeypatch.setattr(serializador, "usar_orjson", usar_orjson)
+            corpos[usar_orjson] = [client.get(url).content for url in urls(usuario_id)]
+        assert corpos[True] == corpos[False]
+        assert all(corpo.startswith(b"[{") for corpo in corpos[True])
@@ -0,0 +1,189 @@
+"""
+Testes para a sincronizacao incremental (/sync?since=N)
+"""
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Alteracao, AlteracaoTrava, Category, Local
+from app.sincronizacao import SINCRONIZADOS, ler_alteracoes
+from migrations import migrar
+from tests.test_tarefas_dia import concluir_hoje, criar_tarefas_email, criar_tarefas_usuario
+
+
+def sync(client, since=0, **params):
+    response = client.get("/sync", params={"since": since, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestSync:
+    """Testes do /sync"""
+
+    def test_base_inteira_e_depois_nada(self, client, db):
+        """Testa que since=0 traz tudo e a versao devolvida nao repete nada"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Xico", 2)
+        criar_tarefas_email(db, "yara@gmail.com", 1)
+
+        data = sync(client)
+        assert sorted(a["id"] for a in data["tarefas_usuario"]["alterados"]) == sorted(a.id for a in atribuicoes)
+        assert len(data["tarefas_email"]["alterados"]) == 1
+        assert len(data["tarefas"]["alterados"]) == 3
+        assert data["mais"] is False
+
+        vazio = sync(client, data["versao"])
+        assert vazio["versao"] == data["versao"]
+        assert all(not vazio[t]["alterados"] and not vazio[t]["removidos"] for t in ("tarefas", "tarefas_email", "conclusoes"))
+
+    def test_alteracoes_e_remocoes(self, client, db):
+        """Testa update, delete (tombstone) e o estado final de um registro alterado varias vezes"""
+        emails = criar_tarefas_email(db, "zeca@gmail.com", 2)
+        ids = [e.id for e in emails]
+        versao = sync(client)["versao"]
+
+        client.put(f"/tarefas-email/{ids[0]}", json={"Periodo": "Tarde"})
+        client.put(f"/tarefas-email/{ids[0]}", json={"Periodo": "Noite"})
+        client.delete(f"/tarefas-email/{ids[1]}")
+
+        data = sync(client, versao)
+        assert [(a["id"], a["Periodo"]) for a in data["tarefas_email"]["alterados"]] == [(ids[0], "Noite")]
+        assert data["tarefas_email"]["removidos"] == [ids[1]]
+        assert data["versao"] > versao
+
+    def test_escritas_em_core(self, client, db):
+        """Testa conclusoes e atribuicoes gravadas fora do ORM (INSERT ... SELECT, lote, DELETE)"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Aldo", 3)
+        ids = [a.id for a in atribuicoes]
+        versao = sync(client)["versao"]
+
+        client.post(f"/tarefas-dia/usuario/{ids[0]}/concluir")
+        client.post("/tarefas-dia/concluir-lote", json={"tarefa_usuario_ids": [ids[1], ids[2]]})
+        criados = client.post("/tarefas-usuarios/bulk", json={"itens": [
+            {"usuario_idUsuario": usuario.idUsuario, "Tarefa_idTarefa": atribuicoes[0].Tarefa_idTarefa},
+        ]}).json()["criados"]
+
+        data = sync(client, versao)
+        conclusoes = data["conclusoes"]["alterados"]
+        assert sorted(c["tarefa_usuario_id"] for c in conclusoes) == ids
+        assert [a["id"] for a in data["tarefas_usuario"]["alterados"]] == [criados[0]["id"]]
+
+        versao = data["versao"]
+        client.request("DELETE", "/tarefas-dia/desfazer-lote", json={"tarefa_usuario_ids": ids[:2]})
+        data = sync(client, versao)
+        assert data["conclusoes"]["removidos"] == sorted(c["id"] for c in conclusoes if c["tarefa_usuario_id"] in ids[:2])
+
+    def test_paginacao(self, client, db):
+        """Testa limit e mais: as paginas cobrem todas as alteracoes sem repetir"""
+        criar_tarefas_email(db, "bela@gmail.com", 5)
+        vistos, versao, paginas = [], 0, 0
+        while True:
+            data = sync(client, versao, limit=4)
+            vistos += [a["id"] for a in data["tarefas_email"]["alterados"]]
+            versao = data["versao"]
+            paginas += 1
+            if not data["mais"]:
+                break
+        assert len(vistos) == len(set(vistos)) == 5
+        assert paginas > 1
+
+    def test_custo_depende_das_alteracoes(self, client, db, contador_sql):
+        """Testa que, com a base grande, uma alteracao custa as mesmas consultas e uma linha"""
+        emails = criar_tarefas_email(db, "caua@gmail.com", 200)
+        versao = sync(client)["versao"]
+        client.put(f"/tarefas-email/{emails[0].id}", json={"Periodo": "Tarde"})
+
+        with contador_sql:
+            data = sync(client, versao)
+        assert contador_sql.total == 2
+        assert len(data["tarefas_email"]["alterados"]) == 1
+
+    def test_todas_as_tabelas_dentro_do_orcamento(self, client, db):
+        """Testa since=0 com alteracoes em todas as tabelas sincronizadas"""
+        db.add(Local(Descricao="Sala"))
+        db.add(Category(category_name="Limpeza"))
+        db.commit()
+        _, atribuicoes = criar_tarefas_usuario(db, "Zeca", 1)
+        emails = criar_tarefas_email(db, "zeca@gmail.com", 1)
+        concluir_hoje(db, tarefa_email_id=emails[0].id)
+        concluir_hoje(db, tarefa_usuario_id=atribuicoes[0].id)
+
+        data = sync(client)
+        for nome in SINCRONIZADOS.values():
+            assert data[nome]["alterados"], nome
+
+    def test_limite_invalido(self, client):
+        """Testa a validacao de since e limit"""
+        assert client.get("/sync", params={"since": -1}).status_code == 422
+        assert client.get("/sync", params={"limit": 0}).status_code == 422
+
+
+class TestVersoes:
+    """Testes da leitura do registro de alteracoes"""
+
+    def test_rollback_nao_segura_a_leitura(self, client, db):
+        """Testa que um buraco de rollback e pulado na hora, sem mais=true sem avanco"""
+        db.add(Local(Descricao="Sala"))
+        db.commit()
+        primeira = db.query(Alteracao).one().versao
+
+        db.add(Local(Descricao="Rascunho"))
+        db.flush()
+        db.rollback()
+        # No MySQL o rollback deixa a versao seguinte sem uso
+        local = Local(Descricao="Cozinha")
+        db.add(local)
+        db.flush()
+        db.query(Alteracao).filter(Alteracao.registro_id == local.idLocal).update({"versao": primeira + 2})
+        db.commit()
+
+        data = sync(client)
+        assert data["versao"] == primeira + 2
+        assert data["mais"] is False
+        assert [l["Descricao"] for l in data["locais"]["alterados"]] == ["Sala", "Cozinha"]
+
+        data = sync(client, data["versao"])
+        assert data["versao"] == primeira + 2
+        assert data["mais"] is False
+
+    def test_transacao_trava_o_registro_uma_vez(self, db, engine):
+        """Testa que a transacao trava alteracao_trava antes da primeira versao e so uma vez"""
+        comandos = []
+        registrar = lambda conn, cursor, statement, *args: comandos.append(statement)
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            db.add(Local(Descricao="Sala"))
+            db.flush()
+            db.add(Category(category_name="Limpeza"))
+            db.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        travas = [i for i, c in enumerate(comandos) if c.startswith("UPDATE alteracao_trava")]
+        registros = [i for i, c in enumerate(comandos) if c.startswith("INSERT INTO alteracao ")]
+        assert len(travas) == 1
+        assert len(registros) == 2
+        assert travas[0] < registros[0]
+        assert db.query(AlteracaoTrava).one().escritas == 1
+
+    def test_sem_linha_de_trava_falha(self, db):
+        """Testa que a escrita falha, em vez de gravar sem a trava, se a linha sumir"""
+        db.query(AlteracaoTrava).delete()
+        db.commit()
+        db.add(Local(Descricao="Sala"))
+        with pytest.raises(RuntimeError, match="alteracao_trava"):
+            db.commit()
+        db.rollback()
+        assert db.query(Alteracao).count() == 0
+
+    def test_migracao_registra_linhas_existentes(self, tmp_path):
+        """Testa que a migracao 0006 inclui no registro as linhas que ja existiam"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'migrado.db'}")
+        migrar(engine, alvo=5, log=lambda *_: None)
+        with engine.begin() as conn:
+            conn.execute(text('INSERT INTO "Local" ("Descricao") VALUES (\'Quintal\'), (\'Garagem\')'))
+        migrar(engine, log=lambda *_: None)
+
+        with sessionmaker(bind=engine)() as db:
+            data = ler_alteracoes(db, 0, 100)
+        assert [l.Descricao for l in data["locais"]["alterados"]] == ["Quintal", "Garagem"]
+        engine.dispose()
@@ -0,0 +1,159 @@
+"""
+Testes para a coalescencia de leituras identicas (single-flight)
+"""
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.singleflight import SingleFlight, leituras_tarefas_dia
+from tests.test_tarefas_dia import criar_tarefas_email
+
+
+class Carga:
+    """Carga assincrona que conta as execucoes"""
+
+    def __init__(self, resultado="ok", espera=0.02, erro=None):
+        self.resultado = resultado
+        self.espera = espera
+        self.erro = erro
+        self.execucoes = 0
+
+    async def __call__(self):
+        self.execucoes += 1
+        await asyncio.sleep(self.espera)
+        if self.erro:
+            raise self.erro
+        return self.resultado
+
+
+class TestSingleFlight:
+    """Testes da classe SingleFlight"""
+
+    def test_chamadas_concorrentes_compartilham_a_carga(self):
+        """Testa que 20 chamadas concorrentes com a mesma chave executam a carga uma vez"""
+        singleflight = SingleFlight("teste", janela=0)
+        carga = Carga()
+
+        async def cenario():
+            return await asyncio.gather(*(singleflight.executar("a", carga) for _ in range(20)))
+
+        assert asyncio.run(cenario()) == ["ok"] * 20
+        assert carga.execucoes == 1
+        assert singleflight.estatisticas()["executadas"] == 1
+        assert singleflight.estatisticas()["compartilhadas"] == 19
+
+    def test_chaves_diferentes_nao_compartilham(self):
+        """Testa que parametros diferentes executam cargas separadas"""
+        singleflight = SingleFlight("teste", janela=0)
+        carga = Carga()
+
+        async def cenario():
+            await asyncio.gather(singleflight.executar("a", carga), singleflight.executar("b", carga))
+
+        asyncio.run(cenario())
+        assert carga.execucoes == 2
+
+    def test_janela_depois_de_pronto(self):
+        """Testa que o resultado vale durante a janela e expira depois dela"""
+        singleflight = SingleFlight("teste", janela=0.05)
+        carga = Carga(espera=0)
+
+        async def cenario():
+            await singleflight.executar("a", carga)
+            await singleflight.executar("a", carga)
+            assert carga.execucoes == 1
+            await asyncio.sleep(0.1)
+            await singleflight.executar("a", carga)
+
+        asyncio.run(cenario())
+        assert carga.execucoes == 2
+
+    def test_erro_vai_para_todos_e_nao_fica_na_janela(self):
+        """Testa que a excecao chega a todos os que esperavam e a proxima chamada tenta de novo"""
+        singleflight = SingleFlight("teste", janela=10)
+        carga = Carga(erro=ValueError("falhou"))
+
+        async def cenario():
+            resultados = await asyncio.gather(
+                *(singleflight.executar("a", carga) for _ in range(3)), return_exceptions=True
+            )
+            assert all(isinstance(r, ValueError) for r in resultados)
+            with pytest.raises(ValueError):
+                await singleflight.executar("a", carga)
+
+        asyncio.run(cenario())
+        assert carga.execucoes == 2
+
+    def test_invalidar_de_outra_thread(self):
+        """Testa que uma escrita no threadpool faz a proxima leitura recalcular"""
+        singleflight = SingleFlight("teste", janela=10)
+        carga = Carga(espera=0)
+
+        async def cenario():
+            await singleflight.executar("a", carga)
+            escrita = threading.Thread(target=singleflight.invalidar)
+            escrita.start()
+            escrita.join()
+            await singleflight.executar("a", carga)
+
+        asyncio.run(cenario())
+        assert carga.execucoes == 2
+
+    def test_lider_cancelado_nao_cancela_os_outros(self):
+        """Testa que os demais recebem o resultado mesmo se o primeiro desistir"""
+        singleflight = SingleFlight("teste", janela=0)
+        carga = Carga(espera=0.05)
+
+        async def cenario():
+            lider = asyncio.create_task(singleflight.executar("a", carga))
+            await asyncio.sleep(0)
+            seguidor = asyncio.create_task(singleflight.executar("a", carga))
+            await asyncio.sleep(0.01)
+            lider.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await lider
+            # O lider so termina de cancelar depois que a carga terminou
+            assert carga.execucoes == 1
+            return await seguidor
+
+        assert asyncio.run(cenario()) == "ok"
+
+
+class TestLeiturasCoalescidas:
+    """Testa o single-flight nos quadros do dia"""
+
+    def test_requisicoes_concorrentes_fazem_uma_consulta(self, client, db, contador_sql, monkeypatch):
+        """Testa que 20 GETs concorrentes do mesmo quadro rodam a consulta uma vez"""
+        monkeypatch.setattr(leituras_tarefas_dia, "janela", 5)
+        criar_tarefas_email(db, "davi@gmail.com", 5)
+
+        async def cenario():
+            transporte = httpx.ASGITransport(app=client.app)
+            async with httpx.AsyncClient(transport=transporte, base_url="http://teste") as cliente:
+                return await asyncio.gather(*(cliente.get("/tarefas-dia/email/davi@gmail.com") for _ in range(20)))
+
+        antes = client.get("/metrics/singleflight").json()["tarefas_dia"]
+        with contador_sql:
+            respostas = asyncio.run(cenario())
+        assert {r.status_code for r in respostas} == {200}
+        assert len({r.content for r in respostas}) == 1
+        assert len({r.headers["ETag"] for r in respostas}) == 1
+        assert len(respostas[0].json()) == 5
+        assert sum("FROM tarefa_email" in c for c in contador_sql.comandos) == 1
+
+        depois = client.get("/metrics/singleflight").json()["tarefas_dia"]
+        assert depois["executadas"] - antes["executadas"] == 1
+        assert depois["compartilhadas"] - antes["compartilhadas"] == 19
+
+    def test_escrita_descarta_a_resposta_da_janela(self, client, db, monkeypatch):
+        """Testa que, mesmo dentro da janela, a leitura apos concluir ve a conclusao"""
+        monkeypatch.setattr(leituras_tarefas_dia, "janela", 60)
+        atribuicoes = criar_tarefas_email(db, "elis@gmail.com", 1)
+        id_email = atribuicoes[0].id
+        url = "/tarefas-dia/email/elis@gmail.com"
+
+        assert client.get(url).json()[0]["concluida"] is False
+        client.post(f"/tarefas-dia/email/{id_email}/concluir")
+        assert client.get(url).json()[0]["concluida"] is True
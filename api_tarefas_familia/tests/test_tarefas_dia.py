@@ -0,0 +1,247 @@
+"""
+Testes para os endpoints de Tarefas-Dia
+"""
+from datetime import date
+
+from app.models import Tarefa, Usuario, TarefaUsuario, TarefaEmail, TarefaConclusaoDiaria
+
+
+def criar_tarefas_email(db, email, quantidade):
+    tarefas = [Tarefa(Tarefa=f"Tarefa {i}", Descricao=f"Descricao {i}") for i in range(quantidade)]
+    db.add_all(tarefas)
+    db.flush()
+    atribuicoes = [TarefaEmail(Tarefa_idTarefa=t.idTarefa, email=email, Periodo="Manha") for t in tarefas]
+    db.add_all(atribuicoes)
+    db.commit()
+    return atribuicoes
+
+
+def criar_tarefas_usuario(db, nome, quantidade):
+    usuario = Usuario(Nome=nome, login=nome.lower(), senha="x")
+    tarefas = [Tarefa(Tarefa=f"Tarefa {i}") for i in range(quantidade)]
+    db.add(usuario)
+    db.add_all(tarefas)
+    db.flush()
+    atribuicoes = [
+        TarefaUsuario(usuario_idUsuario=usuario.idUsuario, Tarefa_idTarefa=t.idTarefa, Periodo="Tarde")
+        for t in tarefas
+    ]
+    db.add_all(atribuicoes)
+    db.commit()
+    return usuario, atribuicoes
+
+
+def concluir_hoje(db, **kwargs):
+    db.add(TarefaConclusaoDiaria(data=date.today(), data_hora_conclusao="2026-01-01 08:00:00", status=1, **kwargs))
+    db.commit()
+
+
+class TestTarefasDoDiaEmail:
+    """Testes para /tarefas-dia/email/{email}"""
+
+    def test_status_de_conclusao(self, client, db):
+        """Testa que somente as tarefas concluidas hoje aparecem como concluidas"""
+        atribuicoes = criar_tarefas_email(db, "ana@gmail.com", 3)
+        concluir_hoje(db, tarefa_email_id=atribuicoes[1].id)
+
+        response = client.get("/tarefas-dia/email/ana@gmail.com")
+        assert response.status_code == 200
+        data = {t["tarefa_email_id"]: t for t in response.json()}
+        assert len(data) == 3
+        assert data[atribuicoes[1].id]["concluida"] is True
+        assert data[atribuicoes[1].id]["data_hora_conclusao"] == "2026-01-01 08:00:00"
+        assert data[atribuicoes[0].id]["concluida"] is False
+        assert data[atribuicoes[0].id]["data_hora_conclusao"] is None
+
+    def test_uma_consulta_por_requisicao(self, client, db, contador_sql):
+        """Testa que o numero de comandos SQL nao cresce com o numero de tarefas"""
+        atribuicoes = criar_tarefas_email(db, "bia@gmail.com", 40)
+        for a in atribuicoes[:20]:
+            concluir_hoje(db, tarefa_email_id=a.id)
+
+        # Cache de Tarefa frio: atribuicoes + uma consulta para as 40 tarefas
+        with contador_sql:
+            response = client.get("/tarefas-dia/email/bia@gmail.com")
+        assert response.status_code == 200
+        assert len(response.json()) == 40
+        assert contador_sql.total == 2
+
+        with contador_sql:
+            response = client.get("/tarefas-dia/email/bia@gmail.com")
+        assert len(response.json()) == 40
+        assert contador_sql.total == 1
+
+
+class TestTarefasDoDiaUsuario:
+    """Testes para /tarefas-dia/usuario/{usuario_id}"""
+
+    def test_status_de_conclusao(self, client, db):
+        """Testa que somente as tarefas concluidas hoje aparecem como concluidas"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Carlos", 2)
+        concluir_hoje(db, tarefa_usuario_id=atribuicoes[0].id)
+
+        response = client.get(f"/tarefas-dia/usuario/{usuario.idUsuario}")
+        assert response.status_code == 200
+        data = {t["tarefa_usuario_id"]: t for t in response.json()}
+        assert data[atribuicoes[0].id]["concluida"] is True
+        assert data[atribuicoes[1].id]["concluida"] is False
+        assert data[atribuicoes[1].id]["Nome_usuario"] == "Carlos"
+
+    def test_uma_consulta_por_requisicao(self, client, db, contador_sql):
+        """Testa que o numero de comandos SQL nao cresce com o numero de tarefas"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Duda", 40)
+        for a in atribuicoes[::2]:
+            concluir_hoje(db, tarefa_usuario_id=a.id)
+        usuario_id = usuario.idUsuario
+
+        with contador_sql:
+            response = client.get(f"/tarefas-dia/usuario/{usuario_id}")
+        assert response.status_code == 200
+        assert len(response.json()) == 40
+        assert contador_sql.total == 2
+
+        with contador_sql:
+            response = client.get(f"/tarefas-dia/usuario/{usuario_id}")
+        assert len(response.json()) == 40
+        assert contador_sql.total == 1
+
+
+class TestTarefasDoDiaFamilia:
+    """Testes para /tarefas-dia/familia"""
+
+    def test_agrupa_por_membro_e_periodo(self, client, db):
+        """Testa que usuarios e emails aparecem agrupados por membro e periodo"""
+        emails = criar_tarefas_email(db, "ana@gmail.com", 2)
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Carlos", 3)
+        concluir_hoje(db, tarefa_email_id=emails[0].id)
+        concluir_hoje(db, tarefa_usuario_id=atribuicoes[2].id)
+        usuario_id = usuario.idUsuario
+
+        response = client.get("/tarefas-dia/familia")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["data"] == date.today().isoformat()
+        membros = {m["usuario_idUsuario"] or m["email"]: m for m in data["membros"]}
+        assert set(membros) == {usuario_id, "ana@gmail.com"}
+
+        carlos = membros[usuario_id]
+        assert carlos["Nome"] == "Carlos"
+        assert [p["Periodo"] for p in carlos["periodos"]] == ["Tarde"]
+        concluidas = [t["concluida"] for t in carlos["periodos"][0]["tarefas"]]
+        assert concluidas == [False, False, True]
+
+        ana = membros["ana@gmail.com"]
+        tarefas = ana["periodos"][0]["tarefas"]
+        assert [t["tarefa_email_id"] for t in tarefas] == [e.id for e in emails]
+        assert [t["concluida"] for t in tarefas] == [True, False]
+
+    def test_usuario_e_email_do_mesmo_membro_juntos(self, client, db):
+        """Testa que as atribuicoes pelo email de um usuario entram no membro dele"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Eva", 1)
+        usuario.email = "eva@gmail.com"
+        db.commit()
+        usuario_id = usuario.idUsuario
+        emails = criar_tarefas_email(db, "eva@gmail.com", 1)
+        criar_tarefas_email(db, "ze@gmail.com", 1)
+
+        membros = client.get("/tarefas-dia/familia").json()["membros"]
+        assert [(m["usuario_idUsuario"], m["email"]) for m in membros] == [
+            (usuario_id, "eva@gmail.com"), (None, "ze@gmail.com"),
+        ]
+        eva = membros[0]
+        assert eva["Nome"] == "Eva"
+        assert [p["Periodo"] for p in eva["periodos"]] == ["Manha", "Tarde"]
+        assert eva["periodos"][0]["tarefas"][0]["tarefa_email_id"] == emails[0].id
+        assert eva["periodos"][1]["tarefas"][0]["tarefa_usuario_id"] == atribuicoes[0].id
+
+    def test_conclusoes_de_outra_data(self, client, db):
+        """Testa que a conclusao de hoje nao aparece ao consultar outra data"""
+        emails = criar_tarefas_email(db, "ana@gmail.com", 1)
+        concluir_hoje(db, tarefa_email_id=emails[0].id)
+
+        response = client.get("/tarefas-dia/familia", params={"data": "2020-01-01"})
+        assert response.status_code == 200
+        tarefa = response.json()["membros"][0]["periodos"][0]["tarefas"][0]
+        assert tarefa["concluida"] is False
+
+    def test_uma_consulta_por_requisicao(self, client, db, contador_sql):
+        """Testa que a familia inteira e montada com um unico comando SQL (cache de Tarefa quente)"""
+        criar_tarefas_email(db, "ana@gmail.com", 10)
+        criar_tarefas_email(db, "bia@gmail.com", 10)
+        criar_tarefas_usuario(db, "Carlos", 10)
+        criar_tarefas_usuario(db, "Duda", 10)
+
+        with contador_sql:
+            response = client.get("/tarefas-dia/familia")
+        assert response.status_code == 200
+        assert len(response.json()["membros"]) == 4
+        assert contador_sql.total == 2
+
+        with contador_sql:
+            response = client.get("/tarefas-dia/familia")
+        assert len(response.json()["membros"]) == 4
+        assert contador_sql.total == 1
+
+
+class TestConclusaoEmLote:
+    """Testes para /tarefas-dia/concluir-lote e /tarefas-dia/desfazer-lote"""
+
+    def test_concluir_lote(self, client, db, contador_sql):
+        """Testa os resultados por id e que o lote nao faz um comando por tarefa"""
+        usuario, atribuicoes = criar_tarefas_usuario(db, "Davi", 30)
+        emails = criar_tarefas_email(db, "eva@gmail.com", 2)
+        ids_usuario = [a.id for a in atribuicoes]
+        ids_email = [e.id for e in emails]
+        concluir_hoje(db, tarefa_usuario_id=ids_usuario[0])
+
+        with contador_sql:
+            response = client.post("/tarefas-dia/concluir-lote", json={
+                "tarefa_usuario_ids": ids_usuario + [9999],
+                "tarefa_email_ids": ids_email,
+            })
+        assert response.status_code == 200
+        assert len(contador_sql.comandos) < 10
+        data = response.json()
+        resultados = {r["id"]: r["resultado"] for r in data["tarefas_usuario"]}
+        assert resultados[ids_usuario[0]] == "ja_concluida"
+        assert resultados[9999] == "nao_encontrada"
+        assert all(resultados[id] == "concluida" for id in ids_usuario[1:])
+        assert [r["resultado"] for r in data["tarefas_email"]] == ["concluida", "concluida"]
+
+        assert db.query(TarefaConclusaoDiaria).count() == 32
+        quadro = client.get(f"/tarefas-dia/usuario/{usuario.idUsuario}").json()
+        assert all(t["concluida"] for t in quadro)
+
+    def test_concluir_lote_ignora_duplicados(self, client, db):
+        """Testa que ids repetidos e um segundo lote nao duplicam conclusoes"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Gil", 2)
+        ids = [a.id for a in atribuicoes]
+
+        client.post("/tarefas-dia/concluir-lote", json={"tarefa_usuario_ids": ids + ids})
+        response = client.post("/tarefas-dia/concluir-lote", json={"tarefa_usuario_ids": ids})
+        assert [r["resultado"] for r in response.json()["tarefas_usuario"]] == ["ja_concluida"] * 2
+        assert db.query(TarefaConclusaoDiaria).count() == 2
+
+    def test_desfazer_lote(self, client, db):
+        """Testa que somente as conclusoes de hoje dos ids pedidos sao removidas"""
+        _, atribuicoes = criar_tarefas_usuario(db, "Hugo", 3)
+        emails = criar_tarefas_email(db, "ines@gmail.com", 1)
+        ids = [a.id for a in atribuicoes]
+        concluir_hoje(db, tarefa_usuario_id=ids[0])
+        concluir_hoje(db, tarefa_usuario_id=ids[1])
+        concluir_hoje(db, tarefa_email_id=emails[0].id)
+
+        response = client.request("DELETE", "/tarefas-dia/desfazer-lote", json={
+            "tarefa_usuario_ids": [ids[0], ids[2]],
+            "tarefa_email_ids": [emails[0].id],
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tarefas_usuario"] == [
+            {"id": ids[0], "resultado": "desfeita"},
+            {"id": ids[2], "resultado": "nao_concluida"},
+        ]
+        assert data["tarefas_email"] == [{"id": emails[0].id, "resultado": "desfeita"}]
+
+        restantes = db.query(TarefaConclusaoDiaria.tarefa_usuario_id).all()
+        assert restantes == [(ids[1],)]
@@ -0,0 +1,47 @@
+"""
+Testes para os endpoints de Tarefas-Email
+"""
+from app.models import Tarefa
+
+
+class TestTarefasEmail:
+    """Testes para endpoints de Tarefas-Email nos dois modos de banco"""
+
+    def test_criar_e_listar_por_email(self, client, db):
+        """Testa criacao e listagem detalhada por email"""
+        tarefa = Tarefa(Tarefa="Arrumar cama", Descricao="Quarto")
+        db.add(tarefa)
+        db.commit()
+
+        response = client.post("/tarefas-email/", json={
+            "Tarefa_idTarefa": tarefa.idTarefa,
+            "email": "ana@gmail.com",
+            "Periodo": "Manha"
+        })
+        assert response.status_code == 201
+        criada = response.json()
+        assert criada["Feito"] == 0
+
+        response = client.get("/tarefas-email/email/ana@gmail.com/detalhado")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["id"] == criada["id"]
+        assert data[0]["Tarefa_nome"] == "Arrumar cama"
+
+    def test_concluir_e_deletar(self, client, db):
+        """Testa conclusao e remocao de uma tarefa-email"""
+        tarefa = Tarefa(Tarefa="Regar plantas")
+        db.add(tarefa)
+        db.commit()
+        criada = client.post("/tarefas-email/", json={
+            "Tarefa_idTarefa": tarefa.idTarefa,
+            "email": "bia@gmail.com"
+        }).json()
+
+        response = client.patch(f"/tarefas-email/{criada['id']}/concluir")
+        assert response.status_code == 200
+        assert response.json()["Feito"] == 1
+
+        assert client.delete(f"/tarefas-email/{criada['id']}").status_code == 204
+        assert client.get(f"/tarefas-email/{criada['id']}").status_code == 404
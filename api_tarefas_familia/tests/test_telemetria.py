@@ -0,0 +1,70 @@
+"""
+Testes para as metricas por rota no formato do Prometheus (/metrics)
+"""
+from app.telemetria import Coletor, MedicaoRequisicao
+from tests.test_tarefas_dia import criar_tarefas_email
+
+
+def amostras(texto):
+    """{"nome{rotulos}": valor} das linhas de amostra do texto do Prometheus"""
+    resultado = {}
+    for linha in texto.splitlines():
+        if linha and not linha.startswith("#"):
+            serie, valor = linha.rsplit(" ", 1)
+            resultado[serie] = float(valor)
+    return resultado
+
+
+class TestColetor:
+    """Testes do formato de exposicao"""
+
+    def test_histograma_cumulativo(self):
+        """Testa buckets cumulativos, +Inf, soma e total de um histograma"""
+        coletor = Coletor()
+        for duracao in (0.001, 0.02, 0.3, 20):
+            coletor.registrar("GET", "/x", "200", duracao, MedicaoRequisicao())
+        valores = amostras(coletor.exportar())
+
+        serie = 'api_requisicao_duracao_segundos_bucket{metodo="GET",rota="/x",le="%s"}'
+        assert valores[serie % "0.005"] == 1
+        assert valores[serie % "0.025"] == 2
+        assert valores[serie % "0.5"] == 3
+        assert valores[serie % "10.0"] == 3
+        assert valores[serie % "+Inf"] == 4
+        assert valores['api_requisicao_duracao_segundos_count{metodo="GET",rota="/x"}'] == 4
+        assert valores['api_requisicoes_total{metodo="GET",rota="/x",status="200"}'] == 4
+
+    def test_rotulos_escapados(self):
+        """Testa o escape de aspas, barra invertida e quebra de linha nos rotulos"""
+        coletor = Coletor()
+        coletor.registrar("GET", 'a"b\\c\nd', "200", 0.1, MedicaoRequisicao())
+        assert 'rota="a\\"b\\\\c\\nd"' in coletor.exportar()
+
+
+class TestMetricasPorRota:
+    """Testa o middleware e os eventos do SQLAlchemy nos endpoints"""
+
+    def test_rota_status_e_comandos_sql(self, client, db, contador_sql):
+        """Testa que a serie usa o template da rota e conta os mesmos comandos que a engine executou"""
+        criar_tarefas_email(db, "iris@gmail.com", 3)
+        with contador_sql:
+            assert client.get("/tarefas-dia/email/iris@gmail.com").status_code == 200
+        assert client.get("/tarefas-dia/email/iris@gmail.com/historico").status_code == 200
+        assert client.get("/nao-existe").status_code == 404
+
+        response = client.get("/metrics")
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        valores = amostras(response.text)
+        rota = 'metodo="GET",rota="/tarefas-dia/email/{email}"'
+        assert valores['api_requisicoes_total{%s,status="200"}' % rota] == 1
+        assert valores['api_sql_comandos_por_requisicao_sum{%s}' % rota] == contador_sql.total
+        assert valores['api_sql_segundos_total{%s}' % rota] > 0
+        assert valores['api_requisicoes_total{metodo="GET",rota="desconhecida",status="404"}'] == 1
+        assert not any("iris@gmail.com" in serie for serie in valores)
+
+    def test_estado_do_pool_e_dos_limites(self, client):
+        """Testa as series de pool, limite de requisicoes e admissao no banco"""
+        valores = amostras(client.get("/metrics").text)
+        assert 'api_pool_checkouts_total{engine="sync"}' in valores
+        assert 'api_limite_rejeitadas_total{regra="*"}' in valores
+        assert "api_admissao_db_rejeitadas_total" in valores
@@ -0,0 +1,90 @@
+"""
+Testes para os endpoints de Usuarios
+"""
+
+
+class TestLoginGmail:
+    """Testes para /usuarios/login/gmail nos dois modos de banco"""
+
+    def test_cria_usuario_no_primeiro_login(self, client):
+        """Testa que o primeiro login por Gmail cria o usuario"""
+        response = client.post("/usuarios/login/gmail", json={"email": "maria.silva@gmail.com"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["sucesso"] is True
+        assert data["usuario"]["Nome"] == "Maria Silva"
+        assert data["usuario"]["tipo_conta"] == "gmail"
+
+        response = client.post("/usuarios/login/gmail", json={"email": "maria.silva@gmail.com"})
+        assert response.json()["usuario"]["idUsuario"] == data["usuario"]["idUsuario"]
+        assert response.json()["mensagem"] == "Login realizado com sucesso"
+
+
+class TestLogin:
+    """Testes para /usuarios/login nos dois modos de banco"""
+
+    def test_login_sucesso_e_senha_invalida(self, client):
+        """Testa login com senha correta e incorreta"""
+        client.post("/usuarios/", json={"Nome": "Joao", "login": "joao", "senha": "segredo"})
+
+        response = client.post("/usuarios/login", json={"login": "joao", "senha": "segredo"})
+        assert response.json()["sucesso"] is True
+
+        response = client.post("/usuarios/login", json={"login": "joao", "senha": "errada"})
+        assert response.json()["sucesso"] is False
+        assert "invalida" in response.json()["mensagem"].lower()
+
+
+class TestCadastro:
+    """Testes para o cadastro de usuarios"""
+
+    def test_email_repetido(self, client):
+        """Testa que contas simples podem repetir o email e contas Gmail nao"""
+        response = client.post("/usuarios/", json={"Nome": "Ana", "login": "ana", "senha": "x", "email": "ana@gmail.com"})
+        assert response.status_code == 201
+        assert response.json()["tipo_conta"] == "simples"
+        assert response.json()["idUsuario"] > 0
+
+        # Membro da familia com o email do responsavel
+        response = client.post("/usuarios/", json={"Nome": "Ana 2", "login": "ana2", "senha": "x", "email": "ana@gmail.com"})
+        assert response.status_code == 201
+
+        response = client.post("/usuarios/", json={"Nome": "Ana 3", "login": "ana", "senha": "x"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Login ja cadastrado"
+
+        response = client.post("/usuarios/gmail", json={"Nome": "Ana", "email": "ana@gmail.com"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email ja cadastrado"
+
+        assert client.post("/usuarios/gmail", json={"Nome": "Bia", "email": "bia@gmail.com"}).status_code == 201
+        response = client.post("/usuarios/gmail", json={"Nome": "Bia", "email": "bia@gmail.com"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email ja cadastrado"
+
+    def test_login_gmail_prefere_a_conta_gmail(self, client):
+        """Testa que uma conta simples com o mesmo email nao esconde a conta Gmail"""
+        gmail = client.post("/usuarios/gmail", json={"Nome": "Caio", "email": "caio@gmail.com"}).json()
+        client.post("/usuarios/", json={"Nome": "Filho", "login": "filho", "senha": "x", "email": "caio@gmail.com"})
+
+        response = client.post("/usuarios/login/gmail", json={"email": "caio@gmail.com"})
+        assert response.json()["sucesso"] is True
+        assert response.json()["usuario"]["idUsuario"] == gmail["idUsuario"]
+
+    def test_atualizar_para_email_ou_login_em_uso(self, client):
+        """Testa que o PUT com email Gmail ou login ja usados responde 400, nao 500"""
+        client.post("/usuarios/gmail", json={"Nome": "Davi", "email": "davi@gmail.com"})
+        eva = client.post("/usuarios/gmail", json={"Nome": "Eva", "email": "eva@gmail.com"}).json()
+        client.post("/usuarios/", json={"Nome": "Fabio", "login": "fabio", "senha": "x"})
+
+        response = client.put(f"/usuarios/{eva['idUsuario']}", json={"email": "davi@gmail.com"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email ja cadastrado"
+
+        response = client.put(f"/usuarios/{eva['idUsuario']}", json={"login": "fabio"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Login ja cadastrado"
+
+        response = client.put(f"/usuarios/{eva['idUsuario']}", json={"Nome": "Eva Maria"})
+        assert response.status_code == 200
+        assert response.json()["email"] == "eva@gmail.com"